@@ -0,0 +1,195 @@
+"""
+Black Box - Pre/post-impact IMU ring buffer and crash evidence bundles
+Keeps the last few seconds of raw samples in preallocated arrays; on a trigger
+it keeps capturing a post-window and writes a compact bundle with GPS context.
+"""
+
+import os
+import json
+import struct
+import threading
+from array import array
+from datetime import datetime
+
+# Bundle layout: header (magic, metadata length) + JSON metadata + raw arrays
+BUNDLE_HEADER = struct.Struct("<4sI")
+BUNDLE_MAGIC = b"RBOX"
+
+
+class IMUBlackBox:
+    """Fixed-size ring of raw IMU samples; O(1) and allocation-free per sample"""
+
+    def __init__(self, directory, sample_rate_hz=500, pre_seconds=5.0, post_seconds=2.0,
+                 scale_divider=2048.0, gps_manager=None):
+        self.directory = directory
+        self.sample_rate_hz = sample_rate_hz
+        self.scale_divider = scale_divider
+        self.gps_manager = gps_manager
+
+        self.pre_samples = int(sample_rate_hz * pre_seconds)
+        self.post_samples = int(sample_rate_hz * post_seconds)
+        # Headroom so the pre-window is still in the ring when the post-window completes
+        self.capacity = self.pre_samples + self.post_samples + int(sample_rate_hz)
+
+        self.t = array('q', bytes(8 * self.capacity))
+        self.x = array('h', bytes(2 * self.capacity))
+        self.y = array('h', bytes(2 * self.capacity))
+        self.z = array('h', bytes(2 * self.capacity))
+        self.total = 0  # Samples ever written; ring index = total % capacity
+
+        self._capture = None  # Active trigger waiting for its post-window
+        self._lock = threading.Lock()
+        self.bundles_written = []
+        self._writers = []    # Bundle writer threads (wait_for_writes)
+
+    def append_batch(self, timestamp_ns, period_ns, samples):
+        """Store a batch of raw (x, y, z) samples; the newest is at timestamp_ns"""
+        capacity = self.capacity
+        index = self.total % capacity
+        t = timestamp_ns - (len(samples) - 1) * period_ns
+        tt, xx, yy, zz = self.t, self.x, self.y, self.z
+
+        for sx, sy, sz in samples:
+            tt[index] = t
+            xx[index] = sx
+            yy[index] = sy
+            zz[index] = sz
+            index += 1
+            if index == capacity:
+                index = 0
+            t += period_ns
+        self.total += len(samples)
+
+        # Hand the capture off under the lock: trigger() sets it from another thread
+        with self._lock:
+            capture = self._capture
+            if capture is None or self.total < capture['end_seq']:
+                return
+            self._capture = None
+            window = self._copy_window(capture)
+        writer = threading.Thread(target=self._write_bundle, args=(capture,) + window, daemon=True)
+        self._writers = [w for w in self._writers if w.is_alive()] + [writer]
+        writer.start()
+
+    def wait_for_writes(self, timeout=5.0):
+        """Block until every bundle started so far is on disk (or timeout)"""
+        for writer in list(self._writers):
+            writer.join(timeout)
+
+    def is_capturing(self):
+        with self._lock:
+            return self._capture is not None
+
+    def trigger(self, source, seq=None, peak_g=None):
+        """
+        Freeze the pre-window around sample `seq` (default: newest) and start
+        capturing the post-window. Returns False if a capture is already running.
+        """
+        with self._lock:
+            if self._capture is not None:
+                return False
+
+            trigger_seq = self.total - 1 if seq is None else seq
+            # GPS context is taken at the moment of impact, not when the bundle is written
+            location, speed, gps_status = None, None, None
+            if self.gps_manager:
+                try:
+                    fix = self.gps_manager.get_fix()
+                    location, speed = fix.location, fix.speed
+                    gps_status = self.gps_manager.get_gps_status()
+                except Exception as e:
+                    print(f"⚠️ Black box GPS snapshot failed: {e}")
+
+            self._capture = {
+                'source': source,
+                'trigger_seq': trigger_seq,
+                'start_seq': max(0, trigger_seq - self.pre_samples, self.total - self.capacity),
+                'end_seq': trigger_seq + 1 + self.post_samples,
+                'trigger_time': datetime.now(),
+                'peak_g': peak_g,
+                'location': location,
+                'speed': speed,
+                'gps_status': gps_status,
+            }
+            print(f"📼 Black box triggered ({source}) - capturing post-impact window")
+            return True
+
+    def _copy_window(self, capture):
+        """(trigger index, window columns) copied out of the ring (lock held)"""
+        end = min(capture['end_seq'], self.total)
+        start = max(capture['start_seq'], self.total - self.capacity)
+        window = [self._slice(column, start, end) for column in (self.t, self.x, self.y, self.z)]
+        return capture['trigger_seq'] - start, window
+
+    def _slice(self, column, start, end):
+        """Copy ring positions [start, end) into a new contiguous array"""
+        a = start % self.capacity
+        b = end % self.capacity
+        if end - start >= self.capacity:
+            return column[b:] + column[:b]
+        if a < b or end == start:
+            return column[a:b]
+        return column[a:] + column[:b]
+
+    def _write_bundle(self, capture, trigger_index, window):
+        try:
+            t, x, y, z = window
+            trigger_time = capture['trigger_time']
+            # Position at the impact sample itself, interpolated from the GPS history
+            impact_location = None
+            if self.gps_manager and len(t):
+                try:
+                    impact_location = self.gps_manager.location_at(t[trigger_index] / 1e9)
+                except Exception as e:
+                    print(f"⚠️ Black box geotag failed: {e}")
+            metadata = {
+                'source': capture['source'],
+                'trigger_time': trigger_time.isoformat(),
+                'trigger_index': trigger_index,
+                'samples': len(t),
+                'sample_rate_hz': self.sample_rate_hz,
+                'scale_divider': self.scale_divider,
+                'peak_g': capture['peak_g'],
+                'location': capture['location'],
+                'impact_location': impact_location,
+                'speed_kmh': capture['speed'],
+                'gps_status': capture['gps_status'],
+            }
+            meta_bytes = json.dumps(metadata, separators=(',', ':'), default=str).encode('utf-8')
+
+            os.makedirs(self.directory, exist_ok=True)
+            name = f"crash_{trigger_time.strftime('%Y%m%d_%H%M%S_%f')}_{capture['source']}.rbox"
+            path = os.path.join(self.directory, name)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(BUNDLE_HEADER.pack(BUNDLE_MAGIC, len(meta_bytes)))
+                f.write(meta_bytes)
+                for column in (t, x, y, z):
+                    f.write(column.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+
+            self.bundles_written.append(path)
+            print(f"📼 Crash evidence saved: {path}")
+        except Exception as e:
+            print(f"❌ Black box write error: {e}")
+
+
+def read_bundle(path):
+    """Load an evidence bundle. Returns (metadata dict, t, x, y, z arrays)."""
+    with open(path, "rb") as f:
+        magic, meta_len = BUNDLE_HEADER.unpack(f.read(BUNDLE_HEADER.size))
+        if magic != BUNDLE_MAGIC:
+            raise ValueError(f"Not a crash evidence bundle: {path}")
+        metadata = json.loads(f.read(meta_len).decode('utf-8'))
+        count = metadata['samples']
+
+        t = array('q')
+        t.frombytes(f.read(8 * count))
+        columns = [t]
+        for _ in range(3):
+            column = array('h')
+            column.frombytes(f.read(2 * count))
+            columns.append(column)
+    return (metadata, *columns)
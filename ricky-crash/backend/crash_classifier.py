@@ -0,0 +1,225 @@
+"""
+Crash Classifier - Sliding-window impact classification over IMU batches
+Vectorized features (peak, jerk, impulse, duration, post-impact stillness)
+replace the single-sample threshold so potholes and door slams are rejected.
+"""
+
+import time
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    print("⚠️ NumPy not found. Crash classifier disabled, using threshold detection.")
+    NUMPY_AVAILABLE = False
+
+
+class CrashClassifier:
+    # Classifier states
+    IDLE = "IDLE"              # Waiting for a sample over trigger_g
+    IN_EVENT = "IN_EVENT"      # Collecting the impact until it settles
+    STILLNESS = "STILLNESS"    # Collecting the post-impact window
+
+    def __init__(self, sample_rate_hz, scale_divider=2048.0, trigger_g=3.0,
+                 min_peak_g=3.5, severe_peak_g=6.0, min_impulse_g_s=0.02,
+                 min_duration_ms=10.0, min_jerk_g_per_s=0.0, settle_ms=50.0,
+                 max_event_ms=1000.0, stillness_seconds=1.0, stillness_std_g=0.1):
+        self.sample_rate_hz = float(sample_rate_hz)
+        self.inv_scale = 1.0 / scale_divider
+
+        # Thresholds (all configurable)
+        self.trigger_g = trigger_g                  # Starts an event
+        self.min_peak_g = min_peak_g                # Below this the event is a bump
+        self.severe_peak_g = severe_peak_g          # Above this no stillness check needed
+        self.min_impulse_g_s = min_impulse_g_s      # Area over trigger_g (G*s)
+        self.min_duration_ms = min_duration_ms      # Time spent over trigger_g
+        self.min_jerk_g_per_s = min_jerk_g_per_s
+        self.stillness_std_g = stillness_std_g      # Max std of |a| after the impact
+
+        self.settle_samples = max(1, int(settle_ms * self.sample_rate_hz / 1000.0))
+        self.max_event_samples = max(2, int(max_event_ms * self.sample_rate_hz / 1000.0))
+        self.stillness_samples = max(1, int(stillness_seconds * self.sample_rate_hz))
+
+        # Preallocated windows so per-batch cost does not depend on history
+        self._event = np.zeros(self.max_event_samples + 1, dtype=np.float32)
+        self._still = np.zeros(self.stillness_samples, dtype=np.float32)
+
+        # Stats
+        self.batches = 0
+        self.total_cost_ns = 0
+        self.max_cost_ns = 0
+        self.last_batch_envelope = (1.0, 1.0, 1.0)  # (min, max, last) |a| in G
+        self.decisions = []
+
+        self.seq = 0  # Samples seen; decisions refer to these indices
+        self.reset()
+
+    def reset(self):
+        """Drop any event in progress (sample counter keeps running)"""
+        self.state = self.IDLE
+        self._event_len = 0
+        self._last_above = 0
+        self._impact_seq = 0
+        self._still_len = 0
+        self._pending = None
+        self._last_mag = 1.0
+
+    def magnitudes(self, samples):
+        """|a| in G for a batch of raw (x, y, z) samples"""
+        raw = np.asarray(samples, dtype=np.float32)
+        return np.sqrt(np.einsum('ij,ij->i', raw, raw)) * self.inv_scale
+
+    def process_batch(self, samples):
+        """
+        Classify a batch of raw samples. Returns the list of decisions completed
+        in this batch (each a dict with 'crash', features and latency).
+        """
+        started = time.perf_counter_ns()
+        decisions = []
+        if len(samples) == 0:
+            return decisions
+
+        mag = self.magnitudes(samples)
+        n = len(mag)
+        self.last_batch_envelope = (float(mag.min()), float(mag.max()), float(mag[-1]))
+
+        pos = 0
+        while pos < n:
+            if self.state == self.IDLE:
+                above = np.flatnonzero(mag[pos:] > self.trigger_g)
+                if above.size == 0:
+                    break
+                start = pos + int(above[0])
+                # Sample before the edge, for jerk across the leading edge
+                self._event[0] = mag[start - 1] if start > 0 else self._last_mag
+                self._event_len = 1
+                self._last_above = 0
+                self._impact_seq = self.seq + start
+                self.state = self.IN_EVENT
+                pos = start
+            elif self.state == self.IN_EVENT:
+                pos = self._extend_event(mag, pos, decisions)
+            else:
+                pos = self._extend_stillness(mag, pos, decisions)
+
+        self._last_mag = float(mag[-1])
+        self.seq += n
+
+        cost = time.perf_counter_ns() - started
+        for decision in decisions:
+            decision['processing_ms'] = cost / 1e6
+        self.batches += 1
+        self.total_cost_ns += cost
+        self.max_cost_ns = max(self.max_cost_ns, cost)
+        return decisions
+
+    def _extend_event(self, mag, pos, decisions):
+        """Append samples to the impact until it settles; returns the new position"""
+        space = self.max_event_samples + 1 - self._event_len
+        take = mag[pos:pos + space]
+        base = self._event_len
+
+        # Event-relative indices of samples over the trigger (previous last one first)
+        above = np.flatnonzero(take > self.trigger_g) + base
+        marks = np.concatenate(([self._last_above], above))
+        gaps = np.diff(marks)
+        settled = np.flatnonzero(gaps > self.settle_samples)
+
+        if settled.size:
+            last_above = int(marks[settled[0]])
+        else:
+            last_above = int(marks[-1])
+        close_at = last_above + 1 + self.settle_samples  # Exclusive, event-relative
+
+        end = base + len(take)
+        if close_at <= end:
+            consumed = close_at - base
+        elif end >= self.max_event_samples + 1:
+            consumed = len(take)  # Event too long - close it as is
+        else:
+            consumed = len(take)
+            self._event[base:end] = take
+            self._event_len = end
+            self._last_above = last_above
+            return pos + consumed
+
+        self._event[base:base + consumed] = take[:consumed]
+        self._event_len = base + consumed
+        self._close_event(last_above + 1, self.seq + pos + consumed, decisions)
+        return pos + consumed
+
+    def _close_event(self, event_end, decided_seq, decisions):
+        features = self.features(self._event[:event_end])
+        rejected = self._rejection_reason(features)
+
+        if rejected or features['peak_g'] >= self.severe_peak_g:
+            self._decide(features, not rejected, rejected or "severe impact", decided_seq, decisions)
+            self.state = self.IDLE
+        else:
+            self._pending = features
+            self._still_len = 0
+            self.state = self.STILLNESS
+
+    def _extend_stillness(self, mag, pos, decisions):
+        take = mag[pos:pos + self.stillness_samples - self._still_len]
+        self._still[self._still_len:self._still_len + len(take)] = take
+        self._still_len += len(take)
+        pos += len(take)
+
+        if self._still_len >= self.stillness_samples:
+            features = self._pending
+            features['post_std_g'] = float(self._still.std())
+            still = features['post_std_g'] <= self.stillness_std_g
+            reason = "stillness after impact" if still else "vehicle kept moving"
+            self._decide(features, still, reason, self.seq + pos, decisions)
+            self._pending = None
+            self.state = self.IDLE
+        return pos
+
+    def features(self, window):
+        """Feature vector for an impact window (first sample is the pre-edge value)"""
+        rate = self.sample_rate_hz
+        over = window - self.trigger_g
+        above = over > 0
+        jerk = np.abs(np.diff(window)).max() * rate if len(window) > 1 else 0.0
+        return {
+            'peak_g': float(window.max()),
+            'jerk_g_per_s': float(jerk),
+            'impulse_g_s': float(over[above].sum() / rate),
+            'duration_ms': float(above.sum() * 1000.0 / rate),
+            'event_ms': float((len(window) - 1) * 1000.0 / rate),
+        }
+
+    def _rejection_reason(self, features):
+        if features['peak_g'] < self.min_peak_g:
+            return "peak too low"
+        if features['duration_ms'] < self.min_duration_ms:
+            return "too short"
+        if features['impulse_g_s'] < self.min_impulse_g_s:
+            return "impulse too low"
+        if features['jerk_g_per_s'] < self.min_jerk_g_per_s:
+            return "jerk too low"
+        return None
+
+    def _decide(self, features, crash, reason, decided_seq, decisions):
+        decision = dict(features)
+        decision.update({
+            'crash': crash,
+            'reason': reason,
+            'impact_seq': self._impact_seq,
+            'decided_seq': decided_seq,
+            'latency_ms': (decided_seq - self._impact_seq) * 1000.0 / self.sample_rate_hz,
+        })
+        decisions.append(decision)
+        self.decisions.append(decision)
+        if len(self.decisions) > 100:
+            del self.decisions[0]
+
+    def get_stats(self):
+        """Per-batch cost statistics"""
+        return {
+            'batches': self.batches,
+            'mean_batch_ms': (self.total_cost_ns / self.batches / 1e6) if self.batches else 0.0,
+            'max_batch_ms': self.max_cost_ns / 1e6,
+            'state': self.state,
+        }
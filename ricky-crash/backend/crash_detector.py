@@ -1,15 +1,31 @@
 """
 Crash Detector - Monitors MPU6050 for sudden impacts
 Updated: Integrated Live CSV Logging to Desktop
+Updated: FIFO-backed high-rate acquisition with per-sample detection
+Updated: Batched binary logging (convert with `python -m backend.imu_log`)
+Updated: Black box ring buffer writes pre/post-impact evidence bundles
+Updated: Sliding-window crash classifier (falls back to threshold without NumPy)
+Updated: Data-ready interrupt on the MPU INT pin (GPIO 4) instead of sleep polling
+Updated: Non-blocking cooldown state machine - sampling continues after a crash
+Updated: Live graph data decimated to min/max/last frames at display rate
+Updated: Feeds each batch to dead reckoning (distance during GPS outages)
 """
 
 import time
 import math
+import random
+import struct
 import threading
 import os
-import csv
-from datetime import datetime
-from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+
+from backend.mpu_acquisition import MPUFifoReader, GPIOEdgeSource
+from backend.gpio_manager import GPIO, GPIO_AVAILABLE, GPIOManager
+from backend.imu_log import IMULogWriter
+from backend.black_box import IMUBlackBox
+from backend.crash_classifier import CrashClassifier, NUMPY_AVAILABLE
+from backend.crash_state import CrashStateMachine
+from backend.live_decimator import LiveDecimator
 
 # Try importing SMBus for I2C communication
 try:
@@ -23,9 +39,12 @@ except ImportError:
         print("⚠️ SMBus not found. Crash detection running in Simulation Mode.")
         I2C_AVAILABLE = False
 
+_ACCEL_SAMPLE = struct.Struct(">hhh")
+
 class CrashDetector(QObject):
     crash_detected = pyqtSignal()  # Signal emitted on crash
-    live_data = pyqtSignal(float)  # Signal for live graph (G-Force)
+    live_data = pyqtSignal(float)  # Frame peak G-Force at display rate
+    live_frame = pyqtSignal(float, float, float)  # min, max, last G-Force per display frame
 
     # MPU6050 Registers
     PWR_MGMT_1 = 0x6B
@@ -33,35 +52,109 @@ class CrashDetector(QObject):
     ACCEL_XOUT_H = 0x3B
     DEVICE_ADDRESS = 0x68
 
-    def __init__(self, sensitivity_g=3.0, debug=False):
+    # Acquisition modes
+    MODE_POLL = "poll"   # One register read per interval (legacy ~20Hz)
+    MODE_FIFO = "fifo"   # On-chip FIFO drained in batches (500-1000Hz)
+
+    def __init__(self, sensitivity_g=3.0, debug=False, acquisition_mode="fifo",
+                 sample_rate_hz=500, bus=None, gps_manager=None, use_classifier=True,
+                 classifier_config=None, use_interrupt=True, edge_source=None,
+                 cooldown_seconds=10.0, display_rate_hz=30.0, dead_reckoning=None):
         super().__init__()
-        self.bus = None
+        self.bus = bus
         self.running = False
         self.sensitivity_threshold = sensitivity_g
         self.debug = debug
+        self.state_machine = CrashStateMachine(cooldown_seconds=cooldown_seconds)
+        self.decimator = LiveDecimator(display_rate_hz)
+        self.dead_reckoning = dead_reckoning  # backend/dead_reckoning.py
+        self.scale_divider = 2048.0  # LSB/G for the +/-16G range
+
+        # Acquisition settings
+        self.acquisition_mode = acquisition_mode
+        self.sample_rate_hz = sample_rate_hz
+        self.fifo_reader = None
+        self.poll_interval = 0.05    # Legacy polling interval
+        self.drain_interval = 0.02   # FIFO drain period (FIFO holds ~170 samples)
+
+        # Interrupt-driven acquisition (FIFO mode only)
+        self.use_interrupt = use_interrupt
+        self.edge_source = edge_source
+        self.interrupt_timeout = 0.5         # Seconds; only reached if the sensor stops
+        self.interrupt_batch_interval = 0.01 # Let a few samples gather after each edge
+        self.wakeups = 0
+        self.idle_wakeups = 0                # Wakeups that found no data
         
         # MPU6050 Pins (Automatically mapped by SMBus(1)):
         # SDA -> GPIO 2
         # SCL -> GPIO 3
-        self.interrupt_pin = 4  # GPIO 4 for INT (optional)
+        self.interrupt_pin = GPIOManager.PINS['mpu_int']  # GPIO 4 for INT (optional)
         
-        # Setup CSV Log Path
+        # Setup Binary Log Path (rotating *.rimu files, see backend/imu_log.py)
         self.save_directory = os.path.expanduser("/home/ricky/Desktop/ricky-crash/mpulog")
-        self.csv_filename = "mpu6050_log.csv"
-        self.file_path = os.path.join(self.save_directory, self.csv_filename)
+        self.log_fsync_interval = 10.0   # Seconds between fsyncs (SD card wear)
+        self.log_max_file_bytes = 16 * 1024 * 1024
+        self.log_writer = None
         
-        if I2C_AVAILABLE:
+        if I2C_AVAILABLE or self.bus is not None:
             self.setup_mpu()
 
+        # Black box: last seconds of raw samples, frozen into a bundle on impact/SOS
+        black_box_rate = self.fifo_reader.sample_rate_hz if self.fifo_reader else 1.0 / self.poll_interval
+        self.black_box = IMUBlackBox(
+            os.path.join(self.save_directory, "evidence"),
+            sample_rate_hz=black_box_rate,
+            scale_divider=self.scale_divider,
+            gps_manager=gps_manager
+        )
+
+        # Impact classifier: trigger threshold is the configured sensitivity
+        self.classifier = None
+        if use_classifier and NUMPY_AVAILABLE:
+            config = {'trigger_g': self.sensitivity_threshold}
+            config.update(classifier_config or {})
+            self.classifier = CrashClassifier(
+                black_box_rate, scale_divider=self.scale_divider, **config
+            )
+
     def setup_mpu(self):
         try:
-            self.bus = SMBus(1) # Hardware I2C Bus 1 (GPIO 2 & GPIO 3)
+            if self.bus is None:
+                self.bus = SMBus(1) # Hardware I2C Bus 1 (GPIO 2 & GPIO 3)
             self.bus.write_byte_data(self.DEVICE_ADDRESS, self.PWR_MGMT_1, 0)
             self.bus.write_byte_data(self.DEVICE_ADDRESS, self.ACCEL_CONFIG, 0x18)
             print(f"✅ MPU6050 Initialized (Threshold: {self.sensitivity_threshold}G)")
         except Exception as e:
             print(f"❌ MPU6050 Init Error: {e}")
             self.bus = None
+            return
+
+        if self.acquisition_mode == self.MODE_FIFO:
+            try:
+                self.fifo_reader = MPUFifoReader(
+                    self.bus, self.DEVICE_ADDRESS, sample_rate_hz=self.sample_rate_hz
+                )
+                self.fifo_reader.configure()
+                print(f"⚡ MPU6050 FIFO enabled at {self.fifo_reader.sample_rate_hz:.0f}Hz")
+            except Exception as e:
+                print(f"⚠️ MPU6050 FIFO setup failed, using polling: {e}")
+                self.fifo_reader = None
+
+        if self.fifo_reader and self.use_interrupt:
+            self.setup_interrupt()
+
+    def setup_interrupt(self):
+        """Enable the MPU data-ready interrupt and attach the INT pin edge source"""
+        try:
+            if self.edge_source is None:
+                if not GPIO_AVAILABLE:
+                    return
+                self.edge_source = GPIOEdgeSource(self.interrupt_pin, GPIO)
+            self.fifo_reader.enable_interrupt()
+            print(f"⚡ MPU6050 data-ready interrupt on GPIO {self.interrupt_pin}")
+        except Exception as e:
+            print(f"⚠️ MPU6050 interrupt setup failed, using timed drain: {e}")
+            self.edge_source = None
 
     def start(self):
         self.running = True
@@ -70,81 +163,190 @@ class CrashDetector(QObject):
     def stop(self):
         self.running = False
 
-    def _read_raw_data(self, addr):
-        high = self.bus.read_byte_data(self.DEVICE_ADDRESS, addr)
-        low = self.bus.read_byte_data(self.DEVICE_ADDRESS, addr + 1)
-        value = (high << 8) | low
-        if value > 32768: 
-            value = value - 65536
-        return value
+    def _read_accel_block(self):
+        """Read X/Y/Z in a single 6-byte I2C transaction"""
+        data = self.bus.read_i2c_block_data(self.DEVICE_ADDRESS, self.ACCEL_XOUT_H, 6)
+        return _ACCEL_SAMPLE.unpack(bytes(data))
+
+    def _acquire_batch(self, edge_ns=None):
+        """
+        Get the next batch of raw samples.
+        Returns (timestamp_ns of newest sample, sample period in ns, [(x, y, z), ...])
+        """
+        if self.fifo_reader:
+            timestamp_ns, samples = self.fifo_reader.read_batch()
+            period_ns = self.fifo_reader.sample_period_ns
+            if edge_ns is not None and samples:
+                # The edge marks the first sample after the last drain
+                timestamp_ns = min(timestamp_ns, edge_ns + (len(samples) - 1) * period_ns)
+            return timestamp_ns, period_ns, samples
+
+        period_ns = int(self.poll_interval * 1e9)
+        if self.bus:
+            return time.monotonic_ns(), period_ns, [self._read_accel_block()]
+
+        # Simulation Mode
+        z = int(self.scale_divider * (1.0 + random.uniform(-0.1, 0.1)))
+        return time.monotonic_ns(), period_ns, [(0, 0, z)]
+
+    def _process_batch(self, timestamp_ns, period_ns, samples):
+        """
+        Run every sample of a batch through logging, crash detection and the
+        detector state machine (time comes from the sample timestamps).
+        Returns the peak G-force if a new crash was raised, or None.
+        """
+        if not samples:
+            return None
+
+        # --- LOG (buffered, written by the log thread) ---
+        if self.log_writer:
+            self.log_writer.write_batch(timestamp_ns, period_ns, samples)
+
+        self.black_box.append_batch(timestamp_ns, period_ns, samples)
+        if self.dead_reckoning:
+            self.dead_reckoning.add_batch(timestamp_ns, period_ns, samples)
+
+        if self.classifier:
+            envelope, impacts = self._classify_batch(samples)
+        else:
+            envelope, impacts = self._threshold_batch(samples)
+
+        crash_g = None
+        self.state_machine.update(timestamp_ns / 1e9)
+        for impact_g, age in impacts:
+            # age = samples between the impact and the newest sample
+            impact_time = (timestamp_ns - age * period_ns) / 1e9
+            if not self.state_machine.on_impact(impact_g, impact_time):
+                continue
+            self.black_box.trigger("CRASH_SENSOR", seq=self.black_box.total - 1 - age, peak_g=impact_g)
+            print(f"💥 CRASH DETECTED: {impact_g:.2f}G")
+            self.crash_detected.emit()
+            self.state_machine.alert_sent()
+            crash_g = impact_g
+
+        # Emit Live Data for Graph UI once per display frame (envelope keeps spikes)
+        frame = self.decimator.add(*envelope, timestamp_ns)
+        if frame:
+            self.live_frame.emit(*frame)
+            self.live_data.emit(frame[1])
+        return crash_g
+
+    def _classify_batch(self, samples):
+        """Sliding-window classification. Returns ((min, max, last) G, [(impact G, age in samples)])."""
+        impacts = []
+        for decision in self.classifier.process_batch(samples):
+            if self.debug:
+                verdict = "CRASH" if decision['crash'] else "ignored"
+                print(f"🔍 Impact {verdict} ({decision['reason']}): peak {decision['peak_g']:.2f}G, "
+                      f"{decision['duration_ms']:.0f}ms, impulse {decision['impulse_g_s']:.3f}G·s, "
+                      f"decided in {decision['latency_ms']:.0f}ms")
+            if decision['crash']:
+                age = self.classifier.seq - 1 - decision['impact_seq']
+                impacts.append((decision['peak_g'], age))
+        return self.classifier.last_batch_envelope, impacts
+
+    def _threshold_batch(self, samples):
+        """Legacy single-sample rule. Returns ((min, max, last) G, [(crash G, age in samples)])."""
+        inv_scale = 1.0 / self.scale_divider
+        threshold_sq = self.sensitivity_threshold ** 2
+        peak_sq = 0.0
+        low_sq = float('inf')
+        crash_sq = None
+        crash_index = 0
+
+        for i, (raw_x, raw_y, raw_z) in enumerate(samples):
+            # Squared total force in G^2 (sqrt only for reported values)
+            ax = raw_x * inv_scale
+            ay = raw_y * inv_scale
+            az = raw_z * inv_scale
+            total_sq = ax * ax + ay * ay + az * az
+
+            if total_sq > peak_sq:
+                peak_sq = total_sq
+            if total_sq < low_sq:
+                low_sq = total_sq
+            if crash_sq is None and total_sq > threshold_sq:
+                crash_sq = total_sq
+                crash_index = i
+
+        envelope = (math.sqrt(low_sq), math.sqrt(peak_sq), math.sqrt(total_sq))
+        if crash_sq is None:
+            return envelope, []
+        return envelope, [(math.sqrt(crash_sq), len(samples) - 1 - crash_index)]
+
+    def _wait_for_data(self, interval):
+        """
+        Block until samples are ready. With the INT pin this sleeps in the kernel
+        until the data-ready edge; otherwise it is a plain timed sleep.
+        Returns the edge time in monotonic ns, or None.
+        """
+        if not self.edge_source:
+            time.sleep(interval)
+            return None
+
+        edge_ns = self.edge_source.wait(self.interrupt_timeout)
+        if edge_ns is not None and self.interrupt_batch_interval:
+            time.sleep(self.interrupt_batch_interval)
+        return edge_ns
+
+    @pyqtSlot(dict)
+    def record_sos_event(self, sos_data):
+        """Capture an evidence bundle for SOS activations that did not come from the sensor"""
+        source = sos_data.get('type', 'SOS_BUTTON')
+        if source != "CRASH_SENSOR":
+            self.black_box.trigger(source)
 
     def _monitor_loop(self):
-        print("🛡️ Crash Monitor Running (with CSV Logging)...")
-        scale_divider = 2048.0 
+        mode = "FIFO" if self.fifo_reader else "polling"
+        if self.edge_source:
+            mode += f" + INT on GPIO {self.interrupt_pin}"
+        print(f"🛡️ Crash Monitor Running ({mode}, with binary logging)...")
+        idle_interval = self.drain_interval if self.fifo_reader else self.poll_interval
         
-        # --- Initialize CSV File ---
-        csv_file = None
-        writer = None
+        # --- Initialize Log Writer ---
         try:
-            if not os.path.exists(self.save_directory):
-                os.makedirs(self.save_directory)
-            
-            file_exists = os.path.isfile(self.file_path)
-            csv_file = open(self.file_path, mode='a', newline='')
-            writer = csv.writer(csv_file)
-            
-            if not file_exists:
-                writer.writerow(["Timestamp", "Accel_X_G", "Accel_Y_G", "Accel_Z_G", "Total_G"])
-            print(f"📁 Logging MPU data to: {self.file_path}")
+            self.log_writer = IMULogWriter(
+                self.save_directory,
+                fsync_interval=self.log_fsync_interval,
+                max_file_bytes=self.log_max_file_bytes,
+                scale_divider=self.scale_divider
+            )
+            self.log_writer.start()
         except Exception as e:
-            print(f"❌ Failed to setup CSV logging: {e}")
+            print(f"❌ Failed to setup MPU logging: {e}")
+            self.log_writer = None
         # ---------------------------
 
         while self.running:
             try:
-                total_g = 1.0 # Default gravity
-                ax, ay, az = 0.0, 0.0, 1.0
-                
-                if self.bus:
-                    # Read Accelerometer Data
-                    acc_x = self._read_raw_data(self.ACCEL_XOUT_H)
-                    acc_y = self._read_raw_data(self.ACCEL_XOUT_H + 2)
-                    acc_z = self._read_raw_data(self.ACCEL_XOUT_H + 4)
-
-                    # Convert to G-Force
-                    ax = acc_x / scale_divider
-                    ay = acc_y / scale_divider
-                    az = acc_z / scale_divider
-
-                    # Calculate total force
-                    total_g = math.sqrt(ax**2 + ay**2 + az**2)
-                else:
-                    # Simulation Mode
-                    import random
-                    total_g = 1.0 + (random.uniform(-0.1, 0.1))
-
-                # --- LOG TO CSV ---
-                if writer and csv_file:
-                    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-                    writer.writerow([timestamp, f"{ax:.4f}", f"{ay:.4f}", f"{az:.4f}", f"{total_g:.4f}"])
-                    csv_file.flush() # Force save to disk immediately
-                # ------------------
-
-                # Emit Live Data for Graph UI (Throttle to ~20Hz)
-                self.live_data.emit(total_g)
-                
-                # Check for Crash
-                if total_g > self.sensitivity_threshold:
-                    print(f"💥 CRASH DETECTED: {total_g:.2f}G")
-                    self.crash_detected.emit()
-                    time.sleep(10) # Pause logging for 10s after crash
-                else:
-                    time.sleep(0.05) # Normal reading interval
+                edge_ns = self._wait_for_data(idle_interval)
+                timestamp_ns, period_ns, samples = self._acquire_batch(edge_ns)
+                self.wakeups += 1
+                if not samples:
+                    self.idle_wakeups += 1
+                # Never pauses: cooldown after a crash is handled by the state machine
+                self._process_batch(timestamp_ns, period_ns, samples)
 
             except Exception as e:
                 # Suppress spam if wire wiggles
                 time.sleep(1)
         
-        # Close file gracefully when app shuts down
-        if csv_file:
-            csv_file.close()
+        # Flush and close the log gracefully when app shuts down
+        if self.log_writer:
+            self.log_writer.stop()
+        if self.edge_source:
+            self.edge_source.close()
+
+    def get_acquisition_stats(self):
+        """Wakeup and FIFO counters for tuning the acquisition path"""
+        stats = {
+            'mode': "FIFO" if self.fifo_reader else ("polling" if self.bus else "simulation"),
+            'interrupt': self.edge_source is not None,
+            'wakeups': self.wakeups,
+            'idle_wakeups': self.idle_wakeups,
+        }
+        if self.fifo_reader:
+            stats['sample_rate_hz'] = self.fifo_reader.sample_rate_hz
+            stats['samples_read'] = self.fifo_reader.samples_read
+            stats['fifo_overflows'] = self.fifo_reader.overflow_count
+        return stats
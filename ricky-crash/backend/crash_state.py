@@ -0,0 +1,81 @@
+"""
+Crash State - Detector state machine (armed -> triggered -> cooldown -> re-armed)
+Replaces the blocking post-crash sleep: sampling never stops, repeat alerts
+are suppressed during cooldown and secondary impacts are still recorded.
+"""
+
+import time
+from datetime import datetime
+
+
+class CrashStateMachine:
+    ARMED = "ARMED"          # Next impact raises crash_detected
+    TRIGGERED = "TRIGGERED"  # Crash confirmed, alert being dispatched
+    COOLDOWN = "COOLDOWN"    # Alerts suppressed, impacts recorded as secondary
+
+    def __init__(self, cooldown_seconds=10.0, min_event_gap=0.2, max_events=200,
+                 clock=time.monotonic):
+        self.cooldown_seconds = cooldown_seconds
+        self.min_event_gap = min_event_gap  # Merge impacts closer than this (seconds)
+        self.max_events = max_events
+        self.clock = clock                  # Used when callers do not pass a time
+
+        self.state = self.ARMED
+        self.triggered_at = None
+        self.last_event_at = None
+        self.events = []  # Every impact seen, primary and secondary
+        self.crash_count = 0
+        self.suppressed_count = 0
+
+    def on_impact(self, peak_g, now=None):
+        """
+        Report a confirmed impact at monotonic time `now` (seconds).
+        Returns True if this is a new crash that should raise an alert.
+        """
+        now = self.clock() if now is None else now
+        self.update(now)
+
+        if self.state == self.ARMED:
+            self.state = self.TRIGGERED
+            self.triggered_at = now
+            self.crash_count += 1
+            self._record(now, peak_g, primary=True)
+            return True
+
+        # Already handling a crash: keep the evidence, do not alert again
+        self.suppressed_count += 1
+        if self.last_event_at is None or now - self.last_event_at >= self.min_event_gap:
+            self._record(now, peak_g, primary=False)
+            print(f"💥 Secondary impact during {self.state.lower()}: {peak_g:.2f}G "
+                  f"(+{now - self.triggered_at:.1f}s)")
+        return False
+
+    def alert_sent(self):
+        """TRIGGERED -> COOLDOWN once crash_detected has been emitted"""
+        if self.state == self.TRIGGERED:
+            self.state = self.COOLDOWN
+
+    def update(self, now=None):
+        """Advance time; re-arms once the cooldown has elapsed"""
+        now = self.clock() if now is None else now
+        if self.state != self.ARMED and now - self.triggered_at >= self.cooldown_seconds:
+            self.state = self.ARMED
+            print("🛡️ Crash detector re-armed")
+        return self.state
+
+    def _record(self, now, peak_g, primary):
+        self.last_event_at = now
+        self.events.append({
+            'time': now,
+            'wall_time': datetime.now().isoformat(),
+            'peak_g': round(peak_g, 3),
+            'primary': primary,
+            'seconds_after_crash': round(now - self.triggered_at, 3),
+        })
+        if len(self.events) > self.max_events:
+            del self.events[0]
+
+    def get_secondary_events(self, since=None):
+        """Secondary impacts, optionally only those after monotonic time `since`"""
+        return [e for e in self.events
+                if not e['primary'] and (since is None or e['time'] >= since)]
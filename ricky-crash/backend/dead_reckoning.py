@@ -0,0 +1,230 @@
+"""
+Dead Reckoning - Along-track distance from the MPU6050 while GPS is out
+Forward acceleration is integrated per FIFO batch with two weighted sums (no
+per-sample Python arithmetic), on the IMU thread. Every new GPSFix re-anchors
+the speed to GPS and refines the accelerometer bias (mounting tilt, offset).
+During an outage the speed is carried by the IMU with growing confidence
+bounds; when GPS returns, the outage distance is corrected with the speed
+mismatch and never allowed below the straight-line chord. A fix is applied
+exactly once, by whichever comes first: the IMU thread or a consumer calling
+apply_fix() (the fare engine settles an outage on the returning fix itself).
+"""
+
+import math
+import threading
+from operator import mul
+
+from backend.geodesy import haversine_km
+
+G = 9.80665
+AXES = {'x': 0, 'y': 1, 'z': 2}
+_M_PER_DEG = 111320.0
+
+
+class DeadReckoning:
+    def __init__(self, gps_manager=None, forward_axis='x', forward_sign=1, scale_divider=2048.0,
+                 gps_timeout_s=2.0, bias_tau_s=60.0, bias_sigma=0.05, accel_noise=0.3,
+                 stationary_std_g=0.015, stationary_s=1.0, max_speed_kmh=80.0):
+        self.gps_manager = gps_manager
+        self.axis = AXES[forward_axis]
+        self.scale = forward_sign * G / scale_divider  # Raw LSB -> forward m/s^2
+        self.gps_timeout_s = gps_timeout_s             # No new fix for this long = outage
+        self.bias_tau_s = bias_tau_s
+        self.min_bias_sigma = 0.02
+        self.initial_bias_sigma = bias_sigma           # 1-sigma bias uncertainty (m/s^2)
+        self.accel_noise = accel_noise                 # Velocity random walk (m/s per sqrt(s))
+        # Zero-velocity update: forward axis quieter than this means standing still
+        self.stationary_var = (stationary_std_g * scale_divider) ** 2
+        self.stationary_s = stationary_s
+        self.max_speed = max_speed_kmh / 3.6
+        self._lock = threading.Lock()  # Integration vs. fix application
+        self.reset()
+
+    def reset(self):
+        # Written by the IMU thread only; readers just load floats
+        self.speed = 0.0              # Along-track m/s
+        self.bias = 0.0               # m/s^2
+        self.bias_sigma = self.initial_bias_sigma
+        self.odometer_m = 0.0
+        self.t = None                 # Monotonic time of the last integrated sample
+        self.anchored = False
+        self.last_fix = None          # (t, lat, lon, speed m/s, heading)
+        self.odometer_at_fix_m = 0.0
+        self._seq = None
+        self._accel_integral = 0.0    # Measured accel x time since the last fix (bias)
+        self._accel_time = 0.0
+        self._quiet_s = 0.0
+        self.outage_start = None
+        self.outage_odometer_m = 0.0
+        self.last_outage = None
+        self.outages = 0
+
+    # --- IMU thread ---
+
+    def add_batch(self, timestamp_ns, period_ns, samples):
+        """Integrate one batch of raw (x, y, z) samples; the newest is at timestamp_ns"""
+        if not samples:
+            return
+        with self._lock:
+            if self.gps_manager is not None:
+                self._apply_fix_locked(self.gps_manager.fix)
+            self._integrate(timestamp_ns, period_ns, samples)
+
+    def apply_fix(self, fix):
+        """
+        Apply a GPS fix now (any thread) unless it already was. Returns the
+        odometer in km including the outage correction, if `fix` ended one.
+        """
+        with self._lock:
+            self._apply_fix_locked(fix)
+            return self.odometer_m / 1000.0
+
+    def _apply_fix_locked(self, fix):
+        if fix.seq == self._seq or (self._seq is not None and fix.seq < self._seq):
+            return
+        self._seq = fix.seq
+        if fix.fix and fix.lat is not None:
+            self._on_fix(fix)
+
+    def _integrate(self, timestamp_ns, period_ns, samples):
+        dt = period_ns / 1e9
+        t_end = timestamp_ns / 1e9
+        if not self.anchored:
+            self.t = t_end
+            return
+
+        forward = [sample[self.axis] for sample in samples]
+        # Samples at or before the last integrated one are already counted
+        first_t = t_end - (len(forward) - 1) * dt
+        if self.t is not None and first_t <= self.t:
+            forward = forward[int((self.t - first_t) / dt) + 1:]
+        n = len(forward)
+        if not n:
+            return
+        self.t = t_end
+
+        raw_sum = sum(forward)
+        # v_k = v0 + dt * sum_{j<=k} (a_j - b); distance = dt * sum_k v_k
+        weighted = sum(map(mul, forward, range(n, 0, -1)))
+        bias = self.bias
+        v0 = self.speed
+        v = v0 + dt * (raw_sum * self.scale - n * bias)
+        distance = n * dt * v0 + dt * dt * (weighted * self.scale - bias * n * (n + 1) / 2)
+
+        # Standing still: the forward axis only sees sensor noise
+        mean = raw_sum / n
+        if n > 1 and sum(map(mul, forward, forward)) / n - mean * mean < self.stationary_var:
+            self._quiet_s += n * dt
+            if self._quiet_s >= self.stationary_s:
+                v = 0.0
+                distance = 0.0
+        else:
+            self._quiet_s = 0.0
+
+        self.speed = min(max(v, 0.0), self.max_speed)
+        self.odometer_m += min(max(distance, 0.0), self.max_speed * n * dt)
+        if self.outage_start is None:
+            self._accel_integral += raw_sum * self.scale * dt
+            self._accel_time += n * dt
+            if t_end - self.last_fix[0] > self.gps_timeout_s:
+                self.outage_start = self.last_fix[0]
+                self.outage_odometer_m = self.odometer_at_fix_m
+                self.outages += 1
+                print("🧭 GPS lost - dead reckoning from the IMU")
+
+    def _on_fix(self, fix):
+        t = fix.timestamp
+        speed = fix.speed / 3.6
+        if self.outage_start is not None:
+            self._end_outage(fix, t, speed)
+        elif self.last_fix is not None:
+            # Bias = measured acceleration - GPS acceleration over the same span
+            span = t - self.last_fix[0]
+            if span > 0 and self._accel_time > 0.5 * span:
+                residual = (self._accel_integral / self._accel_time
+                            - (speed - self.last_fix[3]) / span - self.bias)
+                alpha = min(1.0, span / self.bias_tau_s)
+                self.bias += alpha * residual
+                self.bias_sigma = max(self.min_bias_sigma, math.sqrt(
+                    (1.0 - alpha) * self.bias_sigma ** 2 + alpha * residual * residual))
+
+        self.speed = speed
+        self.anchored = True
+        self.last_fix = (t, fix.lat, fix.lon, speed, fix.heading)
+        self.odometer_at_fix_m = self.odometer_m
+        self._accel_integral = 0.0
+        self._accel_time = 0.0
+
+    def _bounds_m(self, seconds, distance_m):
+        """(low, high) ~2-sigma distance bounds after integrating for `seconds`"""
+        sigma = math.sqrt(self.bias_sigma ** 2 * seconds ** 4 / 4.0
+                          + self.accel_noise ** 2 * seconds ** 3 / 3.0)
+        return max(0.0, distance_m - 2.0 * sigma), min(distance_m + 2.0 * sigma,
+                                                       self.max_speed * seconds)
+
+    def _end_outage(self, fix, t, gps_speed):
+        seconds = max(t - self.outage_start, 1e-3)
+        dr_m = self.odometer_m - self.outage_odometer_m
+        low, high = self._bounds_m(seconds, dr_m)
+
+        # A constant bias error makes the speed error grow linearly: remove its
+        # distance (v_err * T / 2), then the path cannot be shorter than the chord
+        speed_error = self.speed - gps_speed
+        corrected = min(max(dr_m - speed_error * seconds / 2.0, low), high)
+        chord = haversine_km(self.last_fix[1], self.last_fix[2], fix.lat, fix.lon) * 1000.0
+        corrected = max(corrected, chord)
+
+        self.odometer_m += corrected - dr_m
+        self.bias += 0.5 * speed_error / seconds
+        self.last_outage = {
+            'seconds': round(seconds, 1),
+            'imu_km': round(dr_m / 1000.0, 4),
+            'corrected_km': round(corrected / 1000.0, 4),
+            'chord_km': round(chord / 1000.0, 4),
+            'low_km': round(low / 1000.0, 4),
+            'high_km': round(high / 1000.0, 4),
+            'speed_error_kmh': round(speed_error * 3.6, 1),
+        }
+        self.outage_start = None
+        print(f"🧭 GPS back after {seconds:.0f} s - dead reckoning {dr_m:.0f} m, "
+              f"corrected to {corrected:.0f} m (chord {chord:.0f} m)")
+
+    # --- Readers (any thread) ---
+
+    def odometer_km(self):
+        return self.odometer_m / 1000.0
+
+    def odometer_at_fix_km(self):
+        """Odometer when the last GPS fix was applied (start of an outage)"""
+        return self.odometer_at_fix_m / 1000.0
+
+    def position(self):
+        """Last fix pushed along its heading by the distance since, or None"""
+        last = self.last_fix
+        if last is None or last[4] is None:
+            return None
+        ahead = self.odometer_m - self.odometer_at_fix_m
+        heading = math.radians(last[4])
+        lat = last[1] + ahead * math.cos(heading) / _M_PER_DEG
+        lon = last[2] + ahead * math.sin(heading) / (_M_PER_DEG * math.cos(math.radians(last[1])))
+        return lat, lon
+
+    def status(self):
+        """Current outage with its confidence bounds (or the last one)"""
+        start = self.outage_start
+        if start is None or self.t is None:
+            return {'active': False, 'speed_kmh': round(self.speed * 3.6, 1),
+                    'bias': round(self.bias, 4), 'last_outage': self.last_outage}
+        seconds = self.t - start
+        distance = self.odometer_m - self.outage_odometer_m
+        low, high = self._bounds_m(seconds, distance)
+        return {
+            'active': True,
+            'seconds': round(seconds, 1),
+            'distance_km': round(distance / 1000.0, 4),
+            'low_km': round(low / 1000.0, 4),
+            'high_km': round(high / 1000.0, 4),
+            'speed_kmh': round(self.speed * 3.6, 1),
+            'position': self.position(),
+            'last_outage': self.last_outage,
+        }
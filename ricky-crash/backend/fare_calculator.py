@@ -1,6 +1,15 @@
 """
 Fare Calculator - Calculates fares based on real GPS data
 Updated to use actual GPS coordinates and real-time tracking
+Updated: Records a simplified route trace per ride (backend/trip_trace.py)
+Updated: ROTARY distance during GPS outages comes from IMU dead reckoning
+Updated: Wheel encoder pulses are preferred for ROTARY distance when fitted
+Updated: Event-driven engine - every GPS fix is billed, idle without rides
+Updated: One shared odometer per fix; a ride's distance is odometer(now) - odometer(boarding)
+Updated: Pricing from versioned, compiled tariffs (backend/tariff.py)
+Updated: N seats (configurable) held as per-seat columns (backend/seat_table.py)
+Updated: Rides survive power loss - lifecycle events and fare checkpoints go to a
+         ride journal (backend/ride_journal.py), replayed at startup
 """
 
 import threading
@@ -12,6 +21,11 @@ import uuid
 
 # ✅ ADD THIS IMPORT
 from backend.fare_sync_service import FareSyncService
+from backend.trip_trace import TripTrace
+from backend.tariff import CompiledTariff, compile_tariff
+from backend.seat_table import SeatTable
+
+PRIVATE = -1  # Key of the private ride in pending fare updates
 
 
 class FareCalculator(QObject):
@@ -22,48 +36,80 @@ class FareCalculator(QObject):
     distance_updated = pyqtSignal(float)  # total distance
     duration_updated = pyqtSignal(int)  # duration in minutes
     
-    def __init__(self, gps_manager, fare_rate_per_km=12.0):
+    def __init__(self, gps_manager, fare_rate_per_km=12.0, dead_reckoning=None, wheel_encoder=None,
+                 tariff=None, seats=3, journal=None):
         super().__init__()
         self.gps_manager = gps_manager
-        self.fare_rate_per_km = fare_rate_per_km
+        self.dead_reckoning = dead_reckoning  # backend/dead_reckoning.py (fed by the IMU)
+        self.wheel_encoder = wheel_encoder    # backend/wheel_encoder.py (preferred when it has a signal)
+        # Rides keep the tariff they started with; a new version only affects new rides
+        if tariff is None:
+            tariff = compile_tariff(slabs=[{'rate_per_km': fare_rate_per_km}],
+                                    version=f"flat-{fare_rate_per_km:g}")
+        elif not isinstance(tariff, CompiledTariff):
+            tariff = compile_tariff(tariff)
+        self.tariff = tariff
+        self.fare_rate_per_km = tariff.rate_per_km
         self.running = False
         self.thread = None
         
         self.gps_stale_threshold = 60  # seconds
+        self.tick_interval = 1.0       # Fare tick without new fixes (waiting charges, ROTARY)
+        self.publish_interval = 0.2    # Max rate (and latency) of fare/distance signals
+        self._ride_active = threading.Event()
+        self._dirty = set()            # Passenger ids / PRIVATE with unpublished changes
+        self._last_publish = 0.0
+        self.fixes_processed = 0
+        self.fixes_skipped = 0         # Dropped from the GPS fix queue before the engine got to them (should stay 0)
         self.distance_source = "GPS"  # GPS or ROTARY
+        self._rotary_cursor_km = 0.0   # Fallback odometer already billed
+        self._rotary_tick_km = 0.0     # Fallback distance of the current tick
+        self.rotary_source = None      # "WHEEL" or "IMU" for the current outage
+
+        # Shared distance ledger: the vehicle's path is measured once per fix and
+        # every ride reads its distance off this odometer
+        self.odometer_km = 0.0
+        self._odometer_location = None  # Last GPS point counted into the odometer
+        self._wheel_at_fix_km = 0.0    # Wheel odometer at the last GPS location
         # Real-time GPS tracking
         self.last_gps_update = time.time()
         self.last_valid_gps_time = time.time()      # ✅ REAL GPS heartbeat
 
         self.current_location = None
+        self.current_speed = 0.0
+
+        # Route traces of rides in progress, keyed by ride_id
+        self.traces = {}
         
-        # Passenger states (3 passengers for sharing mode)
-        self.passengers = {}
-        for i in range(3):
-            self.passengers[i] = {
-                'onboard': False,
-                'fare': 0.0,
-                'start_location': None,
-                'last_location': None,
-                'start_time': None,
-                'total_distance': 0.0,
-                'ride_id': None,
-                'waiting_time': 0.0  # Time spent stationary
-            }
+        # Sharing mode: one column per field, one entry per seat
+        self.seats = SeatTable(seats)
+        self.seat_count = seats
         
         # Private mode state
         self.private_mode_active = False
         self.private_fare = 0.0
         self.private_start_location = None
-        self.private_last_location = None
+        self.private_odometer_start = 0.0
+        self.private_tariff = None
+        self.private_distance_fare = 0.0
+        self.private_slab = 0
         self.private_start_time = None
         self.private_distance = 0.0
         self.private_waiting_time = 0.0
         
-        # Speed-based calculations
-        self.minimum_speed_threshold = 2.0  # km/h - below this is considered waiting
-        
-        self.lock = threading.Lock()
+        self.lock = threading.RLock()  # Reentrant: finalize_all_rides ends rides under it
+
+        # Crash-safe ride journal: open rides come back before the UI does
+        self.journal = journal
+        self.checkpoint_interval = 5.0  # Fare progress batched into the journal (in memory)
+        self._last_checkpoint = 0.0
+        self._undelivered = []          # Completed rides the backend never confirmed
+        self.restored_seats = []
+        if self.journal:
+            try:
+                self._restore(self.journal.replay())
+            except Exception as e:
+                print(f"❌ Ride journal replay failed: {e}")
         
         # Connect to GPS signals
         self.gps_manager.location_updated.connect(self._on_location_update)
@@ -87,15 +133,110 @@ class FareCalculator(QObject):
 
     def start(self):
         """Start fare calculation thread"""
+        if self.journal:
+            self.journal.start()
         self.running = True
         self.thread = threading.Thread(target=self._calculation_loop, daemon=True)
         self.thread.start()
         print("💰 Fare Calculator started with GPS tracking")
 
+        # Completed before the power cut but never confirmed by the backend: send again
+        for record in self._undelivered:
+            self.ride_completed.emit(record['pid'], record['data'])
+        if self._undelivered:
+            print(f"📒 Re-sending {len(self._undelivered)} undelivered fares")
+        self._undelivered = []
+
+    def _restore(self, state):
+        """Reopen the rides in progress at the last journal checkpoint (before start())"""
+        tariffs = {self.tariff.version: self.tariff}
+
+        def tariff_of(record):
+            if record['version'] not in tariffs:
+                tariffs[record['version']] = compile_tariff(record['tariff'])
+            return tariffs[record['version']]
+
+        self.odometer_km = state['odometer_km']
+        for seat, ride in sorted(state['seats'].items()):
+            if seat >= self.seat_count:
+                print(f"⚠️ Journal ride on seat {seat+1} dropped: only {self.seat_count} seats")
+                continue
+            tariff = tariff_of(ride)
+            base = tariff.distance_fare(0.0)[0]
+            self.seats.restore(seat, ride['odo'], tariff, datetime.fromisoformat(ride['t']),
+                               ride['loc'], ride['ride'], ride.get('fare', 0.0),
+                               ride.get('distance', 0.0), ride.get('distance_fare', base),
+                               ride.get('waiting_s', 0.0))
+            self._start_trace(ride['ride'], None)  # Route from here on; the old trace was in RAM
+            self.restored_seats.append(seat)
+            print(f"📒 Passenger {seat+1} ride restored: ₹{ride.get('fare', 0.0):.2f}")
+
+        ride = state['private']
+        if ride:
+            tariff = self.private_tariff = tariff_of(ride)
+            self.private_mode_active = True
+            self.private_ride_id = ride['ride']
+            self.private_start_time = datetime.fromisoformat(ride['t'])
+            self.private_start_location = ride['loc']
+            self.private_odometer_start = ride['odo']
+            self.private_fare = ride.get('fare', 0.0)
+            self.private_distance = ride.get('distance', 0.0)
+            self.private_distance_fare = ride.get('distance_fare', tariff.distance_fare(0.0)[0])
+            self.private_slab = tariff.distance_fare(self.private_distance)[1]
+            self.private_waiting_time = ride.get('waiting_s', 0.0) / 60.0
+            self._start_trace(self.private_ride_id, None)
+            print(f"📒 Private ride restored: ₹{self.private_fare:.2f}")
+
+        for record in state['undelivered'].values():
+            data = dict(record['data'])
+            for key in ('start_time', 'end_time'):
+                if isinstance(data.get(key), str):
+                    data[key] = datetime.fromisoformat(data[key])
+            self._undelivered.append({'pid': record['pid'], 'data': data})
+        self._update_ride_active()
+
+    def _journal(self, record, urgent=False):
+        if self.journal:
+            self.journal.append(record, urgent)
+
+    def _checkpoint(self, current_time):
+        """Batch the fare progress of every open ride into the journal (lock held)"""
+        if not self.journal or current_time - self._last_checkpoint < self.checkpoint_interval:
+            return
+        self._last_checkpoint = current_time
+        record = {'e': 'checkpoint', 'odo': self.odometer_km, 'seats': self.seats.progress()}
+        if self.private_mode_active:
+            record['private'] = [self.private_fare, self.private_distance,
+                                 self.private_distance_fare, self.private_waiting_time * 60.0]
+        self.journal.append(record)
+
+    def ride_delivered(self, ride_id):
+        """The backend has the ride (FareSyncService): it is not re-sent after a restart"""
+        self._journal({'e': 'delivered', 'ride': ride_id})
+
     def _on_location_update(self, lat, lon):
         """Handle GPS location updates"""
         self.last_valid_gps_time = time.time()
         self.current_location = (lat, lon)
+        if self.wheel_encoder:
+            self._wheel_at_fix_km = self.wheel_encoder.distance_km()
+
+        # Every fix goes into the route of each ride in progress
+        if self.traces:
+            with self.lock:
+                for trace in self.traces.values():
+                    trace.add(lat, lon, self.last_valid_gps_time, self.current_speed)
+
+    def _start_trace(self, ride_id, location):
+        trace = TripTrace()
+        if location:
+            trace.add(location[0], location[1], time.time(), self.current_speed)
+        self.traces[ride_id] = trace
+
+    def _finish_trace(self, ride_id):
+        """Close a ride's trace; returns its route fields for ride_data"""
+        trace = self.traces.pop(ride_id, None)
+        return trace.finish().summary() if trace else {}
 
     def _on_speed_update(self, speed):
         """Handle GPS speed updates"""
@@ -103,152 +244,225 @@ class FareCalculator(QObject):
         self.current_speed = speed
 
     def _calculation_loop(self):
-      """Main fare calculation loop using real GPS data"""
+      """
+      Fare engine: processes every GPS fix as it is published while a ride is
+      active, and blocks without waking at all while nobody is riding.
+      Without fixes (outage, standing still) it still ticks every
+      tick_interval for waiting charges and ROTARY distance.
+      """
+      seq = None
       while self.running:
         try:
-            current_location = self.gps_manager.get_location()
-            current_speed = self.gps_manager.get_speed()
-            current_time = time.time()
-
-            # 🔧 CHANGE 3 — GPS STALE / RECOVERY DETECTION (FLAG ONLY)
-            gps_stale_duration = current_time - self.last_valid_gps_time
+            if not self._ride_active.is_set():
+                self._ride_active.wait()  # No ride: zero work until one starts
+                seq = None
+                self.last_gps_update = time.time()
+                continue
 
-            if gps_stale_duration > self.gps_stale_threshold:
-                if self.distance_source != "ROTARY":
-                    print("⚠️ GPS stale > 60s. Switching to ROTARY distance calculation")
-                    self.distance_source = "ROTARY"
+            fixes = self.gps_manager.wait_for_fixes(seq, timeout=self._wait_timeout())
+            current_time = time.time()
+            if fixes:
+                if seq is not None and fixes[0].seq > seq + 1:
+                    self.fixes_skipped += fixes[0].seq - seq - 1
+                # Bill every fix published since the last pass at its own time,
+                # so a busy pass doesn't cut corners off the path
+                now_monotonic = time.monotonic()
+                for fix in fixes:
+                    fix_time = current_time - (now_monotonic - fix.timestamp)
+                    if fix.fix and fix.lat is not None:
+                        self.last_valid_gps_time = fix_time
+                    self.fixes_processed += 1
+                    self._process_fix(fix, fix_time)
+                seq = fixes[-1].seq
             else:
-                if self.distance_source != "GPS":
-                    print("✅ GPS signal restored. Switching back to GPS distance calculation")
-                    self.distance_source = "GPS"
-
-            time_delta = current_time - self.last_gps_update
+                # Tick without a new fix: reuse the last snapshot
+                fix = self.gps_manager.get_fix()
+                seq = fix.seq
+                self._process_fix(fix, current_time)
+            self._publish(current_time)
 
-            if current_location and time_delta >= 1.0:  # Update every second
-                with self.lock:
-                    # Update sharing mode passengers
-                    for pid, passenger in self.passengers.items():
-                        if passenger['onboard']:
-                            self._update_passenger_fare(
-                                pid, passenger, current_location, current_speed, time_delta
-                            )
+        except Exception as e:
+            print(f"❌ Fare calculation error: {e}")
+            time.sleep(1)
 
-                    # Update private mode
-                    if self.private_mode_active:
-                        self._update_private_fare(
-                            current_location, current_speed, time_delta
-                        )
+    def _wait_timeout(self):
+        """Sleep until the next fix, the next tick, or the pending publish - whichever is first"""
+        if not self._dirty:
+            return self.tick_interval
+        due = self.publish_interval - (time.time() - self._last_publish)
+        return min(self.tick_interval, max(0.0, due))
+
+    def _process_fix(self, fix, current_time):
+        # One snapshot: location and speed always come from the same fix
+        current_location = fix.location
+        current_speed = fix.speed
+
+        # 🔧 CHANGE 3 — GPS STALE / RECOVERY DETECTION (FLAG ONLY)
+        gps_stale_duration = current_time - self.last_valid_gps_time
+
+        if gps_stale_duration > self.gps_stale_threshold:
+            if self.distance_source != "ROTARY":
+                print("⚠️ GPS stale > 60s. Switching to ROTARY distance calculation")
+                self.distance_source = "ROTARY"
+                if self.wheel_encoder and self.wheel_encoder.has_signal():
+                    self.rotary_source = "WHEEL"
+                elif self.dead_reckoning:
+                    self.rotary_source = "IMU"
+                else:
+                    self.rotary_source = None
+                # Bill the whole outage, not only the part after the threshold
+                self._rotary_cursor_km = self._rotary_odometer_km(at_last_fix=True)
+        else:
+            if self.distance_source != "GPS":
+                print("✅ GPS signal restored. Switching back to GPS distance calculation")
+                self._settle_rotary(fix, current_location, current_speed)
+                self.distance_source = "GPS"
+
+        time_delta = current_time - self.last_gps_update
+        if not current_location or time_delta <= 0:
+            return
 
-                self.last_gps_update = current_time
+        if self.distance_source == "ROTARY":
+            odometer = self._rotary_odometer_km()
+            self._rotary_tick_km = odometer - self._rotary_cursor_km
+            self._rotary_cursor_km = odometer
+            if self.rotary_source == "WHEEL":
+                current_speed = self._rotary_tick_km / time_delta * 3600.0
+            elif self.rotary_source == "IMU":
+                current_speed = self.dead_reckoning.speed * 3.6
+        with self.lock:
+            # Measure this fix once, then bill every ride off the odometer
+            self._advance_odometer(current_location, time_delta)
+            self._bill_rides(current_speed, time_delta)
+            self._checkpoint(current_time)
 
-            time.sleep(0.5)  # Check every 500ms for responsive updates
+        self.last_gps_update = current_time
 
-        except Exception as e:
-            print(f"❌ Fare calculation error: {e}")
-            time.sleep(1)
+    def _publish(self, current_time):
+        """Emit coalesced fare/distance updates, at most once per publish_interval"""
+        if not self._dirty or current_time - self._last_publish < self.publish_interval:
+            return
+        with self.lock:
+            dirty, self._dirty = self._dirty, set()
+            fares = [(pid, self.seats.fare_of(pid)) for pid in dirty if pid != PRIVATE]
+            private = None
+            if PRIVATE in dirty:
+                minutes = 0
+                if self.private_start_time:
+                    minutes = int((datetime.now() - self.private_start_time).total_seconds() / 60)
+                private = (self.private_fare, self.private_distance, minutes)
+        self._last_publish = current_time
+
+        for pid, fare in fares:
+            self.fare_updated.emit(pid, fare)
+        if private:
+            self.total_fare_updated.emit(private[0])
+            self.distance_updated.emit(private[1])
+            self.duration_updated.emit(private[2])
+
+    def _update_ride_active(self, location=None):
+        """Wake the fare engine while any ride is in progress (call with the lock held)"""
+        if self.private_mode_active or self.seats.occupied:
+            if not self._ride_active.is_set():
+                # The odometer was idle: start measuring from here
+                self._odometer_location = location
+            self._ride_active.set()
+        else:
+            self._ride_active.clear()
+
+    def _advance_odometer(self, current_location, time_delta):
+        """Add the vehicle's movement since the last fix/tick to the ledger (lock held)"""
+        if self.distance_source == "GPS":
+            if self._odometer_location is None:
+                self._odometer_location = current_location
+                return
+            step = self._calculate_distance(self._odometer_location, current_location)
+            # Only count significant movement (> 5 meters)
+            if step > 0.005:
+                self.odometer_km += step
+                self._odometer_location = current_location
+        else:
+            # No GPS jitter to filter; may be negative (correction when GPS returns)
+            self.odometer_km += self._get_rotary_distance(time_delta)
+
+    def _bill_rides(self, current_speed, time_delta):
+        now = datetime.now()  # Night/holiday multipliers
+        # Update sharing mode passengers (all seats at once); published by _publish()
+        self._dirty.update(self.seats.bill(self.odometer_km, current_speed, time_delta, now))
+
+        # Update private mode
+        if self.private_mode_active:
+            self._update_private_fare(current_speed, time_delta, now)
 
     def _get_rotary_distance(self, time_delta):
        """
-       Rotary encoder fallback distance calculation.
-       Hardware integration will be added later.
-
-       Expected future logic:
-       - Read pulse count
-       - pulses -> wheel rotations
-       - rotations -> distance
+       Fallback distance (km) for the current tick while GPS is stale.
+       Comes from the wheel encoder (or the dead-reckoning odometer without
+       one), computed once per tick and added to the shared odometer.
        """
-       return 0.0
-
-    def _update_passenger_fare(self, pid, passenger, current_location, current_speed, time_delta):
-      """Update fare for individual passenger using real GPS"""
-      if not passenger['last_location']:
-        passenger['last_location'] = current_location
-        return
-
-      # 🔧 CHANGE 4 — source-based distance selection
-      if self.distance_source == "GPS":
-        distance_moved = self._calculate_distance(
-            passenger['last_location'], current_location
-        )
-      else:
-        distance_moved = self._get_rotary_distance(time_delta)
-
-      # Only count significant movement (> 5 meters)
-      if distance_moved > 0.005:  # 5 meters in km
-        # Distance-based fare
-        distance_fare = distance_moved * self.fare_rate_per_km
-        passenger['fare'] += distance_fare
-        passenger['total_distance'] += distance_moved
-
-        # Update last location
-        passenger['last_location'] = current_location
-
-    # Add waiting time charges if speed is low
-      if current_speed < self.minimum_speed_threshold:
-        waiting_charge_per_minute = 2.0  # ₹2 per minute waiting
-        waiting_charge = (time_delta / 60.0) * waiting_charge_per_minute
-        passenger['fare'] += waiting_charge
-        passenger['waiting_time'] += time_delta / 60.0
-
-      # Emit fare update
-      self.fare_updated.emit(pid, passenger['fare'])
+       return self._rotary_tick_km
+
+    def _rotary_odometer_km(self, at_last_fix=False):
+        if self.rotary_source == "WHEEL":
+            if at_last_fix:
+                return self._wheel_at_fix_km
+            return self.wheel_encoder.distance_km()  # Lock-free read
+        if self.rotary_source == "IMU":
+            if at_last_fix:
+                return self.dead_reckoning.odometer_at_fix_km()
+            return self.dead_reckoning.odometer_km()
+        return 0.0
+
+    def _settle_rotary(self, fix, current_location, current_speed):
+        """GPS is back: bill what the fallback still owes (incl. IMU correction), re-anchor on GPS"""
+        if not current_location:
+            return
+        if self.rotary_source == "IMU":
+            # End the outage on this fix now; the IMU thread would apply it later
+            self.dead_reckoning.apply_fix(fix)
+        with self.lock:
+            odometer = self._rotary_odometer_km()
+            self._rotary_tick_km = odometer - self._rotary_cursor_km
+            self._rotary_cursor_km = odometer
+            self._advance_odometer(current_location, 0.0)
+            # The outage is billed: measure GPS distance from here on
+            self._odometer_location = current_location
+            self._bill_rides(current_speed, 0.0)
 
-    
     def finalize_all_rides(self):
         """Force complete all active passenger rides and private mode"""
         with self.lock:
             # Finish private mode
-            if self.private_mode_active:
-                ride_data = self.stop_private_mode()
-                if ride_data:
-                    # Emit ride_completed for private ride with passenger_id=-1
-                    self.ride_completed.emit(-1, ride_data)
-                    print("✅ Private ride sent on finalize")
+            if self.private_mode_active and self.stop_private_mode():
+                print("✅ Private ride sent on finalize")
 
             # Finish all sharing mode rides
-            for pid, passenger in self.passengers.items():
-                if passenger['onboard']:
+            for pid in range(self.seat_count):
+                if self.seats.onboard[pid]:
                     # Force alight
                     self.handle_passenger_change(pid, onboard=False)
                     print(f"✅ Passenger {pid+1} ride finalized on mode switch")
 
 
-    def _update_private_fare(self, current_location, current_speed, time_delta):
-        """Update private mode fare using real GPS"""
-        if not self.private_last_location:
-            self.private_last_location = current_location
-            return
-        
-        # Calculate distance moved
-        distance_moved = self._calculate_distance(
-            self.private_last_location, current_location
-        )
-        
-        # Only count significant movement
-        if distance_moved > 0.005:  # 5 meters
-            distance_fare = distance_moved * self.fare_rate_per_km
-            self.private_fare += distance_fare
-            self.private_distance += distance_moved
-            
-            self.private_last_location = current_location
-            
-            # Emit updates
-            self.total_fare_updated.emit(self.private_fare)
-            self.distance_updated.emit(self.private_distance)
+    def _update_private_fare(self, current_speed, time_delta, now):
+        """Update private mode fare from the shared odometer and its tariff"""
+        tariff = self.private_tariff
+        multiplier = tariff.multiplier(now)
+
+        distance = self.odometer_km - self.private_odometer_start
+        if distance != self.private_distance:
+            distance_fare, self.private_slab = tariff.distance_fare(distance, self.private_slab)
+            self.private_fare += (distance_fare - self.private_distance_fare) * multiplier
+            self.private_distance_fare = distance_fare
+            self.private_distance = distance
         
         # Add waiting charges
-        if current_speed < self.minimum_speed_threshold:
-            waiting_charge_per_minute = 2.0
-            waiting_charge = (time_delta / 60.0) * waiting_charge_per_minute
-            self.private_fare += waiting_charge
+        if current_speed < tariff.waiting_below_kmh:
+            self.private_fare += tariff.waiting_fare(time_delta, self.private_waiting_time * 60.0) * multiplier
             self.private_waiting_time += time_delta / 60.0
-            
-            self.total_fare_updated.emit(self.private_fare)
-        
-        # Update duration
-        if self.private_start_time:
-            duration_minutes = (datetime.now() - self.private_start_time).total_seconds() / 60
-            self.duration_updated.emit(int(duration_minutes))
+
+        # Fare, distance and duration are published by _publish()
+        self._dirty.add(PRIVATE)
 
     def _calculate_distance(self, loc1, loc2):
         """Calculate distance between two coordinates using GPS manager"""
@@ -259,96 +473,109 @@ class FareCalculator(QObject):
 
     def handle_passenger_change(self, passenger_id, onboard):
         """Handle passenger boarding/alighting with GPS data"""
-        if passenger_id >= len(self.passengers):
+        if passenger_id >= self.seat_count:
             return
             
         with self.lock:
-            passenger = self.passengers[passenger_id]
+            seats = self.seats
             current_location = self.gps_manager.get_location()
             
-            if onboard and not passenger['onboard']:
-                # Passenger boarding
-                passenger['onboard'] = True
-                passenger['fare'] = 0.0
-                passenger['start_location'] = current_location
-                passenger['last_location'] = current_location
-                passenger['start_time'] = datetime.now()
-                passenger['total_distance'] = 0.0
-                passenger['waiting_time'] = 0.0
-                passenger['ride_id'] = f"SHARED1-{uuid.uuid4()}"
-
-                print(f"🟢 Passenger {passenger_id+1} boarded at GPS: {current_location}")
-                self.fare_updated.emit(passenger_id, 0.0)
+            if onboard and not seats.onboard[passenger_id]:
+                # Passenger boarding: opens at the base fare of the tariff in force
+                tariff = self.tariff
+                ride_id = f"SHARED1-{uuid.uuid4()}"
+                start_time = datetime.now()
+                fare = seats.board(passenger_id, self.odometer_km, tariff, start_time,
+                                   current_location, ride_id)
+                self._journal({'e': 'board', 'seat': passenger_id, 'ride': ride_id,
+                               'version': tariff.version, 'tariff': tariff.spec, 't': start_time,
+                               'loc': current_location, 'odo': self.odometer_km}, urgent=True)
+                self._update_ride_active(current_location)
+                self._start_trace(ride_id, current_location)
+
+                print(f"🟢 Passenger {passenger_id+1} boarded at GPS: {current_location} "
+                      f"(tariff {tariff.version})")
+                self.fare_updated.emit(passenger_id, fare)
                 
-            elif not onboard and passenger['onboard']:
+            elif not onboard and seats.onboard[passenger_id]:
                 # Passenger alighting
-                passenger['onboard'] = False
+                ride = seats.alight(passenger_id)
+                tariff = ride['tariff']
+                self._journal({'e': 'alight', 'seat': passenger_id, 'ride': ride['ride_id']})
+                self._update_ride_active()
+                self._dirty.discard(passenger_id)
                 end_time = datetime.now()
-                duration = (end_time - passenger['start_time']).total_seconds() / 60
+                duration = (end_time - ride['start_time']).total_seconds() / 60
                 
                 # Calculate final distance from GPS
                 final_distance = 0.0
-                if passenger['start_location'] and current_location:
+                if ride['start_location'] and current_location:
                     final_distance = self._calculate_distance(
-                        passenger['start_location'], current_location
+                        ride['start_location'], current_location
                     )
                 
                 # Prepare comprehensive ride data
                 ride_data = {
-                    'ride_id': passenger['ride_id'],
+                    'ride_id': ride['ride_id'],
                     'passenger_id': passenger_id + 1,
-                    'start_time': passenger['start_time'],
+                    'start_time': ride['start_time'],
                     'end_time': end_time,
                     'duration_minutes': round(duration, 1),
-                    'total_distance_km': round(passenger['total_distance'], 3),
+                    'total_distance_km': round(ride['distance'], 3),
                     'straight_line_distance_km': round(final_distance, 3),
-                    'fare_amount': round(passenger['fare'], 2),
-                    'fare_rate_per_km': self.fare_rate_per_km,
-                    'waiting_time_minutes': round(passenger['waiting_time'], 1),
-                    'start_location': passenger['start_location'],
+                    'fare_amount': round(tariff.final_fare(ride['fare']), 2),
+                    'fare_rate_per_km': tariff.rate_per_km,
+                    'tariff_version': tariff.version,
+                    'waiting_time_minutes': round(ride['waiting_minutes'], 1),
+                    'start_location': ride['start_location'],
                     'end_location': current_location,
-                    'average_speed': round((passenger['total_distance'] / (duration/60)) if duration > 0 else 0, 1)
+                    'average_speed': round((ride['distance'] / (duration/60)) if duration > 0 else 0, 1)
                 }
+                ride_data.update(self._finish_trace(ride['ride_id']))
                 
                 print(f"🔴 Passenger {passenger_id+1} completed ride:")
                 print(f"   💰 Fare: ₹{ride_data['fare_amount']}")
-                print(f"   💰 Fare: ₹{ride_data['ride_id']}")
+                print(f"   🆔 Ride ID: {ride_data['ride_id']}")
                 print(f"   🛣️ Distance: {ride_data['total_distance_km']} km")
                 print(f"   ⏱️ Duration: {ride_data['duration_minutes']} min")
                 print(f"   🚗 Avg Speed: {ride_data['average_speed']} km/h")
                 print(f"   ⏳ Waiting: {ride_data['waiting_time_minutes']} min")
                 
+                self._journal({'e': 'completed', 'pid': passenger_id, 'data': ride_data}, urgent=True)
                 self.ride_completed.emit(passenger_id, ride_data)
-                
-                # Reset passenger data
-                passenger.update({
-                    'fare': 0.0,
-                    'start_location': None,
-                    'last_location': None,
-                    'start_time': None,
-                    'total_distance': 0.0,
-                    'waiting_time': 0.0,
-                    'ride_id': None
-                })
 
     def start_private_mode(self):
         """Start private mode fare calculation with GPS reset"""
         with self.lock: 
+            if self.private_mode_active:
+                # Reopened from the ride journal (or a repeated switch event): carry on
+                print(f"🚖 Private ride {self.private_ride_id} continues")
+                self.total_fare_updated.emit(self.private_fare)
+                self.distance_updated.emit(self.private_distance)
+                return
             self.private_mode_active = True
-            self.private_fare = 0.0
             self.private_start_location = self.gps_manager.get_location()
-            self.private_last_location = self.private_start_location
+            self._update_ride_active(self.private_start_location)
+            self.private_odometer_start = self.odometer_km
             self.private_start_time = datetime.now()
+            tariff = self.private_tariff = self.tariff
+            self.private_distance_fare, self.private_slab = tariff.distance_fare(0.0)
+            self.private_fare = self.private_distance_fare * tariff.multiplier(self.private_start_time)
             self.private_distance = 0.0
             self.private_waiting_time = 0.0
             self.private_ride_id = f"PRIVATE1-{uuid.uuid4()}"
+            self._start_trace(self.private_ride_id, self.private_start_location)
+            self._journal({'e': 'private_start', 'ride': self.private_ride_id,
+                           'version': tariff.version, 'tariff': tariff.spec,
+                           't': self.private_start_time, 'loc': self.private_start_location,
+                           'odo': self.odometer_km}, urgent=True)
 
             
             # Reset GPS trip tracking
             self.gps_manager.reset_trip()
             
-            print("🚖 Private mode started with GPS tracking")
-            self.total_fare_updated.emit(0.0)
+            print(f"🚖 Private mode started with GPS tracking (tariff {tariff.version})")
+            self.total_fare_updated.emit(self.private_fare)
             self.distance_updated.emit(0.0)
             self.duration_updated.emit(0)
 
@@ -357,6 +584,9 @@ class FareCalculator(QObject):
         with self.lock:
             if self.private_mode_active:
                 self.private_mode_active = False
+                self._update_ride_active()
+                self._dirty.discard(PRIVATE)
+                self._journal({'e': 'private_stop', 'ride': self.private_ride_id}, urgent=True)
                 end_time = datetime.now()
                 duration = (end_time - self.private_start_time).total_seconds() / 60
                 
@@ -377,62 +607,92 @@ class FareCalculator(QObject):
                     'start_time': self.private_start_time,
                     'end_time': end_time,
                     'duration_minutes': round(duration, 1),
+                    'total_distance_km': round(self.private_distance, 3),     # Billed (synced) distance
                     'calculated_distance_km': round(self.private_distance, 3),
                     'gps_total_distance_km': round(gps_total_distance, 3),
                     'straight_line_distance_km': round(straight_line_distance, 3),
-                    'fare_amount': round(self.private_fare, 2),
-                    'fare_rate_per_km': self.fare_rate_per_km,
+                    'fare_amount': round(self.private_tariff.final_fare(self.private_fare), 2),
+                    'fare_rate_per_km': self.private_tariff.rate_per_km,
+                    'tariff_version': self.private_tariff.version,
                     'waiting_time_minutes': round(self.private_waiting_time, 1),
                     'start_location': self.private_start_location,
                     'end_location': current_location,
                     'average_speed': round((gps_total_distance / (duration/60)) if duration > 0 else 0, 1),
                     'max_speed': round(max(0, self.gps_manager.get_speed()), 1)
                 }
+                ride_data.update(self._finish_trace(self.private_ride_id))
                 
                 print(f"🔴 Private ride completed:")
                 print(f"   💰 Total Fare: ₹{ride_data['fare_amount']}")
-                print(f"   💰 Total Fare: ₹{ride_data['ride_id']}")
+                print(f"   🆔 Ride ID: {ride_data['ride_id']}")
                 print(f"   🛣️ GPS Distance: {ride_data['gps_total_distance_km']} km")
                 print(f"   📏 Straight Distance: {ride_data['straight_line_distance_km']} km")
                 print(f"   ⏱️ Duration: {ride_data['duration_minutes']} min")
                 print(f"   🚗 Avg Speed: {ride_data['average_speed']} km/h")
                 print(f"   ⏳ Waiting: {ride_data['waiting_time_minutes']} min")
-                
+
+                # Private ride is reported (and synced) with passenger_id=-1
+                self._journal({'e': 'completed', 'pid': -1, 'data': ride_data}, urgent=True)
+                self.ride_completed.emit(-1, ride_data)
                 return ride_data
         return None
 
     def get_passenger_fare(self, passenger_id):
         """Get current fare for a passenger"""
-        if passenger_id < len(self.passengers):
-            return self.passengers[passenger_id]['fare']
+        if passenger_id < self.seat_count:
+            return self.seats.fare_of(passenger_id)
         return 0.0
 
     def get_total_fare(self):
         """Get total fare (for private mode)"""
         return self.private_fare
 
+    def get_seat_snapshot(self):
+        """Per-seat onboard/fare/distance/waiting tuples, copied under the lock"""
+        with self.lock:
+            return self.seats.snapshot()
+
     def get_real_time_stats(self):
         """Get real-time GPS-based statistics"""
-        gps_status = self.gps_manager.get_gps_status()
+        fix = self.gps_manager.get_fix()
         
         return {
-            'current_speed': round(self.gps_manager.get_speed(), 1),
-            'total_distance': round(self.gps_manager.get_total_distance(), 3),
+            'current_speed': round(fix.speed, 1),
+            'total_distance': round(fix.distance, 3),
             'trip_duration': round(self.gps_manager.get_trip_duration(), 1),
-            'gps_fix': gps_status['fix'],
-            'satellites': gps_status['satellites'],
-            'current_location': self.gps_manager.get_location()
+            'gps_fix': fix.fix,
+            'satellites': fix.satellites,
+            'current_location': fix.location,
+            'fix_seq': fix.seq
         }
 
+    def set_tariff(self, tariff):
+        """
+        Switch to a new tariff version (spec dict or CompiledTariff). Compiled
+        here, then swapped in with one assignment - no lock; rides in progress
+        finish on the version they started with.
+        """
+        if not isinstance(tariff, CompiledTariff):
+            tariff = compile_tariff(tariff)
+        self.tariff = tariff
+        self.fare_rate_per_km = tariff.rate_per_km
+        print(f"💰 Tariff {tariff.version} in force for new rides")
+        return tariff
+
     def set_fare_rate(self, rate):
-        """Update fare rate"""
-        with self.lock:
-            self.fare_rate_per_km = rate
-            print(f"💰 Fare rate updated to ₹{rate}/km")
+        """Update fare rate (a flat per-km version of the current tariff)"""
+        self.set_tariff(self.tariff.with_flat_rate(rate))
+        print(f"💰 Fare rate updated to ₹{rate}/km")
 
     def stop(self):
         """Stop fare calculator"""
         self.running = False
+        self._ride_active.set()  # Wake the engine so it can exit
         if self.thread and self.thread.is_alive():
             self.thread.join(timeout=2)
+        if self.journal:
+            with self.lock:
+                self._last_checkpoint = 0.0
+                self._checkpoint(time.time())  # Latest fares, not the last batched ones
+            self.journal.stop()
         print("💰 Fare Calculator stopped")
\ No newline at end of file
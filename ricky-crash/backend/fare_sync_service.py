@@ -2,6 +2,8 @@ import requests
 import threading
 import time
 
+from backend.tariff import compile_tariff
+
 class FareSyncService:
     def __init__(self, base_url, driver_id, poll_interval_sec=15):
         self.base_url = base_url.rstrip("/")
@@ -12,6 +14,7 @@ class FareSyncService:
         self.fare_calculator = None
         self.running = False
         self.last_known_rate = None
+        self.last_known_tariff = None
 
     def attach(self, fare_calculator):
         """
@@ -39,12 +42,21 @@ class FareSyncService:
 
                 if response.status_code == 200:
                     data = response.json()
-                    new_rate = float(data.get("fare_rate"))
 
-                    if self.last_known_rate != new_rate:
-                        self.last_known_rate = new_rate
-                        self.fare_calculator.set_fare_rate(new_rate)
-                        print(f"🔄 Fare rate synced from backend: ₹{new_rate}/km")
+                    # Full rate table (versioned); compiled here, off the fare thread
+                    if data.get("tariff"):
+                        tariff = compile_tariff(data["tariff"])
+                        if self.last_known_tariff != tariff.version:
+                            self.last_known_tariff = tariff.version
+                            self.fare_calculator.set_tariff(tariff)
+                            print(f"🔄 Tariff synced from backend: {tariff.version}")
+                    else:
+                        new_rate = float(data.get("fare_rate"))
+
+                        if self.last_known_rate != new_rate:
+                            self.last_known_rate = new_rate
+                            self.fare_calculator.set_fare_rate(new_rate)
+                            print(f"🔄 Fare rate synced from backend: ₹{new_rate}/km")
 
                 else:
                     print(f"⚠️ Fare rate fetch failed: {response.status_code}")
@@ -81,35 +93,53 @@ class FareSyncService:
 
         if not start_loc or not end_loc:
             print("⚠️ Backend sync skipped: missing GPS data")
+            self.fare_calculator.ride_delivered(ride_data["ride_id"])  # Would be skipped again
             return
 
-        payload = {
-            "rideId": ride_data["ride_id"],
-            "driver_id": self.driver_id,
-            "rideType": ride_type,
-            "passengerId": passenger_id_value,
-
-            "startTime": ride_data["start_time"].isoformat(),
-            "endTime": ride_data["end_time"].isoformat(),
-
-            "startLatitude": start_loc[0],
-            "startLongitude": start_loc[1],
-            "endLatitude": end_loc[0],
-            "endLongitude": end_loc[1],
-
-            "distanceKm": ride_data["total_distance_km"],
-            "fareAmount": ride_data["fare_amount"],
-            "fareRate": ride_data["fare_rate_per_km"]
-        }
+        try:
+            payload = {
+                "rideId": ride_data["ride_id"],
+                "driver_id": self.driver_id,
+                "rideType": ride_type,
+                "passengerId": passenger_id_value,
+
+                "startTime": ride_data["start_time"].isoformat(),
+                "endTime": ride_data["end_time"].isoformat(),
+
+                "startLatitude": start_loc[0],
+                "startLongitude": start_loc[1],
+                "endLatitude": end_loc[0],
+                "endLongitude": end_loc[1],
+
+                "distanceKm": ride_data["total_distance_km"],
+                "fareAmount": ride_data["fare_amount"],
+                "fareRate": ride_data["fare_rate_per_km"],
+                "tariffVersion": ride_data.get("tariff_version")
+            }
+        except (KeyError, TypeError, AttributeError) as e:
+            # Would fail the same way on every retry
+            print(f"❌ Backend sync dropped: bad ride data ({e!r})")
+            self.fare_calculator.ride_delivered(ride_data["ride_id"])
+            return
 
         url = f"{self.base_url}/api/fares/autometer"
 
-        response = self.session.post(url, json=payload, timeout=5)
+        try:
+            response = self.session.post(url, json=payload, timeout=5)
+        except requests.RequestException as e:
+            # Network down: kept undelivered in the ride journal, resent at the next start
+            print(f"⚠️ Fare sync failed, will retry: {e}")
+            return
 
-        if response.status_code != 200:
-            print(f"⚠️ Fare sync failed: {response.status_code} {response.text}")
-        else:
+        if response.status_code == 200:
             print("✅ Fare synced to backend")
+            self.fare_calculator.ride_delivered(ride_data["ride_id"])
+        elif 400 <= response.status_code < 500:
+            # Rejected: resending the same payload can't succeed
+            print(f"❌ Fare sync rejected, dropped: {response.status_code} {response.text}")
+            self.fare_calculator.ride_delivered(ride_data["ride_id"])
+        else:
+            print(f"⚠️ Fare sync failed, will retry: {response.status_code} {response.text}")
 
       except Exception as e:
         print(f"❌ Backend sync error: {e}")
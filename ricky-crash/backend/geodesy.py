@@ -0,0 +1,172 @@
+"""
+Geodesy - Distance, bearing and speed on the WGS84 sphere
+Scalar haversine for single fixes plus vectorized NumPy versions that process
+whole traces (pairwise, segment, cumulative) in one call, and great-circle
+interpolation between fixes.
+Without NumPy the array functions fall back to pure-Python loops.
+"""
+
+import math
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+EARTH_RADIUS_KM = 6371.0
+_RAD = math.pi / 180.0
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in km"""
+    phi1 = lat1 * _RAD
+    phi2 = lat2 * _RAD
+    s_dlat = math.sin((phi2 - phi1) * 0.5)
+    s_dlon = math.sin((lon2 - lon1) * _RAD * 0.5)
+    a = s_dlat * s_dlat + math.cos(phi1) * math.cos(phi2) * s_dlon * s_dlon
+    return 2.0 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+
+
+def bearing_deg(lat1, lon1, lat2, lon2):
+    """Initial bearing from point 1 to point 2 (0 = north, clockwise)"""
+    phi1 = lat1 * _RAD
+    phi2 = lat2 * _RAD
+    dlon = (lon2 - lon1) * _RAD
+    y = math.sin(dlon) * math.cos(phi2)
+    x = math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * math.cos(phi2) * math.cos(dlon)
+    return math.degrees(math.atan2(y, x)) % 360.0
+
+
+def intermediate_point(lat1, lon1, lat2, lon2, fraction):
+    """Point at fraction (0..1) of the way along the great circle from point 1 to 2"""
+    phi1, lam1 = lat1 * _RAD, lon1 * _RAD
+    phi2, lam2 = lat2 * _RAD, lon2 * _RAD
+    s_dlat = math.sin((phi2 - phi1) * 0.5)
+    s_dlon = math.sin((lam2 - lam1) * 0.5)
+    a = s_dlat * s_dlat + math.cos(phi1) * math.cos(phi2) * s_dlon * s_dlon
+    delta = 2.0 * math.asin(math.sqrt(min(1.0, a)))
+    if delta < 1e-12:
+        return lat1 + (lat2 - lat1) * fraction, lon1 + (lon2 - lon1) * fraction
+    sin_delta = math.sin(delta)
+    wa = math.sin((1.0 - fraction) * delta) / sin_delta
+    wb = math.sin(fraction * delta) / sin_delta
+    cos1, cos2 = math.cos(phi1), math.cos(phi2)
+    x = wa * cos1 * math.cos(lam1) + wb * cos2 * math.cos(lam2)
+    y = wa * cos1 * math.sin(lam1) + wb * cos2 * math.sin(lam2)
+    z = wa * math.sin(phi1) + wb * math.sin(phi2)
+    return math.degrees(math.atan2(z, math.hypot(x, y))), math.degrees(math.atan2(y, x))
+
+
+# --- Vectorized (arrays of degrees) ---
+
+def _asarray(values):
+    return np.asarray(values, dtype=np.float64)
+
+
+def pairwise_distance_km(lats1, lons1, lats2, lons2):
+    """Element-wise distance between two equally long (or broadcastable) point sets"""
+    if not NUMPY_AVAILABLE:
+        return [haversine_km(a, b, c, d) for a, b, c, d in zip(lats1, lons1, lats2, lons2)]
+    phi1 = _asarray(lats1) * _RAD
+    phi2 = _asarray(lats2) * _RAD
+    s_dlat = np.sin((phi2 - phi1) * 0.5)
+    s_dlon = np.sin((_asarray(lons2) - _asarray(lons1)) * (_RAD * 0.5))
+    a = s_dlat * s_dlat + np.cos(phi1) * np.cos(phi2) * s_dlon * s_dlon
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def distances_from(lat, lon, lats, lons):
+    """Distance from one point to many (km)"""
+    if not NUMPY_AVAILABLE:
+        return [haversine_km(lat, lon, a, b) for a, b in zip(lats, lons)]
+    return pairwise_distance_km(lat, lon, lats, lons)
+
+
+def segment_distances_km(lats, lons):
+    """Length of each segment of a trace (n points -> n-1 distances)"""
+    if not NUMPY_AVAILABLE:
+        return [haversine_km(lats[i], lons[i], lats[i + 1], lons[i + 1])
+                for i in range(len(lats) - 1)]
+    lats = _asarray(lats)
+    lons = _asarray(lons)
+    # cos(lat) computed once per point instead of twice per segment
+    phi = lats * _RAD
+    cos_phi = np.cos(phi)
+    s_dlat = np.sin(np.diff(phi) * 0.5)
+    s_dlon = np.sin(np.diff(lons) * (_RAD * 0.5))
+    a = s_dlat * s_dlat + cos_phi[:-1] * cos_phi[1:] * s_dlon * s_dlon
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def cumulative_distance_km(lats, lons):
+    """Odometer along a trace: 0 at the first point, total at the last"""
+    segments = segment_distances_km(lats, lons)
+    if not NUMPY_AVAILABLE:
+        out = [0.0]
+        for d in segments:
+            out.append(out[-1] + d)
+        return out
+    out = np.empty(len(segments) + 1)
+    out[0] = 0.0
+    np.cumsum(segments, out=out[1:])
+    return out
+
+
+def segment_bearings_deg(lats, lons):
+    """Initial bearing of each segment of a trace"""
+    if not NUMPY_AVAILABLE:
+        return [bearing_deg(lats[i], lons[i], lats[i + 1], lons[i + 1])
+                for i in range(len(lats) - 1)]
+    phi = _asarray(lats) * _RAD
+    dlon = np.diff(_asarray(lons)) * _RAD
+    cos_phi = np.cos(phi)
+    sin_phi = np.sin(phi)
+    y = np.sin(dlon) * cos_phi[1:]
+    x = cos_phi[:-1] * sin_phi[1:] - sin_phi[:-1] * cos_phi[1:] * np.cos(dlon)
+    return np.degrees(np.arctan2(y, x)) % 360.0
+
+
+def segment_speeds_kmh(lats, lons, times_s):
+    """Average speed over each segment; segments with no elapsed time give 0"""
+    distances = segment_distances_km(lats, lons)
+    if not NUMPY_AVAILABLE:
+        return [d * 3600.0 / (times_s[i + 1] - times_s[i]) if times_s[i + 1] > times_s[i] else 0.0
+                for i, d in enumerate(distances)]
+    dt = np.diff(_asarray(times_s))
+    speeds = np.zeros_like(distances)
+    np.divide(distances * 3600.0, dt, out=speeds, where=dt > 0)
+    return speeds
+
+
+def path_length_km(lats, lons):
+    """Total length of a trace"""
+    if len(lats) < 2:
+        return 0.0
+    segments = segment_distances_km(lats, lons)
+    return float(segments.sum()) if NUMPY_AVAILABLE else sum(segments)
+
+
+def intermediate_points(lats1, lons1, lats2, lons2, fractions):
+    """Element-wise great-circle interpolation (see intermediate_point). Returns (lats, lons)."""
+    if not NUMPY_AVAILABLE:
+        points = [intermediate_point(*args) for args in zip(lats1, lons1, lats2, lons2, fractions)]
+        return [p[0] for p in points], [p[1] for p in points]
+    phi1 = _asarray(lats1) * _RAD
+    phi2 = _asarray(lats2) * _RAD
+    lam1 = _asarray(lons1) * _RAD
+    lam2 = _asarray(lons2) * _RAD
+    f = _asarray(fractions)
+    s_dlat = np.sin((phi2 - phi1) * 0.5)
+    s_dlon = np.sin((lam2 - lam1) * 0.5)
+    cos1, cos2 = np.cos(phi1), np.cos(phi2)
+    delta = 2.0 * np.arcsin(np.sqrt(np.minimum(s_dlat * s_dlat + cos1 * cos2 * s_dlon * s_dlon, 1.0)))
+    # Coincident points: sin(f*d)/sin(d) -> f
+    tiny = delta < 1e-12
+    sin_delta = np.where(tiny, 1.0, np.sin(delta))
+    wa = np.where(tiny, 1.0 - f, np.sin((1.0 - f) * delta) / sin_delta)
+    wb = np.where(tiny, f, np.sin(f * delta) / sin_delta)
+    x = wa * cos1 * np.cos(lam1) + wb * cos2 * np.cos(lam2)
+    y = wa * cos1 * np.sin(lam1) + wb * cos2 * np.sin(lam2)
+    z = wa * np.sin(phi1) + wb * np.sin(phi2)
+    return np.degrees(np.arctan2(z, np.hypot(x, y))), np.degrees(np.arctan2(y, x))
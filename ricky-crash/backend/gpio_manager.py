@@ -1,6 +1,8 @@
 """
 GPIO Manager - Handles all hardware GPIO operations
 Updated with correct rotary switch GPIO pins
+Updated: Wheel encoder pin (pulses are counted by backend/wheel_encoder.py)
+Updated: Configurable seat count (up to 8 passenger switches)
 """
 
 import time
@@ -22,6 +24,9 @@ except ImportError:
         IN = "IN"
         PUD_UP = "PUD_UP"
         PUD_DOWN = "PUD_DOWN"
+        RISING = "RISING"
+        FALLING = "FALLING"
+        BOTH = "BOTH"
         HIGH = 1
         LOW = 0
         
@@ -34,7 +39,11 @@ except ImportError:
         @staticmethod
         def input(pin): return MockGPIO.HIGH
         @staticmethod
-        def cleanup(): pass
+        def wait_for_edge(pin, edge, timeout=None):
+            time.sleep((timeout or 1000) / 1000.0)
+            return None
+        @staticmethod
+        def cleanup(*args): pass
     
     GPIO = MockGPIO()
 
@@ -56,6 +65,11 @@ class GPIOManager(QObject):
         'passenger_1': 6,
         'passenger_2': 13,
         'passenger_3': 19,
+        'passenger_4': 16,      # Seats 4-8: larger e-rickshaws only
+        'passenger_5': 20,
+        'passenger_6': 22,
+        'passenger_7': 24,
+        'passenger_8': 25,
         
         # Rotary Mode Switch - CORRECTED PINS
         'mode_private': 7,      # Position 1 (Private Mode) → GPIO 7
@@ -66,7 +80,10 @@ class GPIOManager(QObject):
         # MPU6050 (I2C)
         'mpu_scl': 3,
         'mpu_sda': 2,
-        'mpu_int': 4
+        'mpu_int': 4,
+
+        # Wheel speed sensor (hall / tone ring, open collector → pulled up, FALLING edges)
+        'wheel_encoder': 17
     }
     
     # Mode mapping - CORRECTED
@@ -77,13 +94,18 @@ class GPIOManager(QObject):
         'mode_for_hire': 'For Hire'    # GPIO 23
     }
 
-    def __init__(self):
+    MAX_SEATS = 8
+
+    def __init__(self, seats=3):
         super().__init__()
+        if not 1 <= seats <= self.MAX_SEATS:
+            raise ValueError(f"Seat count must be 1-{self.MAX_SEATS}, got {seats}")
+        self.seats = seats
         self.running = False
         self.threads = []
         
         # State tracking
-        self.passenger_states = {0: False, 1: False, 2: False}  # False = offboard
+        self.passenger_states = [False] * seats  # False = offboard
         self.current_mode = "For Hire"  # Default mode
         self.sos_active = False
         
@@ -101,7 +123,7 @@ class GPIOManager(QObject):
         GPIO.setup(self.PINS['sos_led'], GPIO.OUT)
         
         # Passenger switches (pulled up, goes LOW when pressed)
-        for i in range(1, 4):
+        for i in range(1, self.seats + 1):
             GPIO.setup(self.PINS[f'passenger_{i}'], GPIO.IN, pull_up_down=GPIO.PUD_UP)
         
         # Rotary Mode Switch - CORRECTED WITH PULL-UP RESISTORS
@@ -138,7 +160,7 @@ class GPIOManager(QObject):
         """Monitor passenger switches"""
         while self.running:
             try:
-                for i in range(3):  # 3 passengers
+                for i in range(self.seats):
                     pin = self.PINS[f'passenger_{i+1}']
                     current_state = GPIO.input(pin) == GPIO.LOW  # LOW = onboard
                     
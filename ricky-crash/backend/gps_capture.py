@@ -0,0 +1,279 @@
+"""
+GPS Capture - Raw serial capture of the GPS receiver and accelerated replay
+Every chunk read from the UART is stored with its monotonic timestamp in
+rotating .rgps files (written by a background thread). CaptureReplayPort plays
+them back through a pyserial-like interface at 1x, Nx or as fast as possible,
+so GPSManager parses a real drive exactly as it did on the road.
+"""
+
+import os
+import sys
+import glob
+import time
+import queue
+import struct
+import threading
+from datetime import datetime
+
+# File header: magic, version, baud rate, protocol, wall clock ns, monotonic ns
+HEADER = struct.Struct("<4sHI4sqq")
+MAGIC = b"RGPS"
+VERSION = 1
+
+# Chunk: monotonic timestamp ns + length, followed by the raw bytes
+CHUNK = struct.Struct("<qI")
+
+
+class SerialCaptureWriter:
+    """Appends raw serial chunks to rotating capture files without blocking the reader"""
+
+    def __init__(self, directory, basename="gps", baudrate=9600, protocol="nmea",
+                 flush_interval=1.0, fsync_interval=10.0,
+                 max_file_bytes=8 * 1024 * 1024, max_files=20):
+        self.directory = directory
+        self.basename = basename
+        self.baudrate = baudrate
+        self.protocol = protocol
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self.running = False
+
+        self._file = None
+        self._file_bytes = 0
+        self.current_path = None
+
+        # Stats
+        self.chunks_written = 0
+        self.bytes_written = 0
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._open_new_file()
+        self.running = True
+        self._thread = threading.Thread(target=self._writer_loop, name="gps_capture_writer", daemon=True)
+        self._thread.start()
+        print(f"📁 Capturing GPS serial data to: {self.current_path}")
+
+    def write(self, data, timestamp_ns=None):
+        """Queue one chunk as read from the port (called from the GPS thread)"""
+        if self.running and data:
+            self._queue.put((timestamp_ns or time.monotonic_ns(), bytes(data)))
+
+    def set_baudrate(self, baudrate):
+        """Start a new file when the receiver link changes (e.g. UBX switch-over)"""
+        self._queue.put(('baudrate', baudrate))
+
+    def _writer_loop(self):
+        last_flush = last_fsync = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = None
+
+            try:
+                if item is None:
+                    if not self.running:
+                        break
+                elif item[0] == 'baudrate':
+                    self.baudrate = item[1]
+                    self._open_new_file()
+                else:
+                    self._write_chunk(*item)
+
+                now = time.monotonic()
+                if self._file and now - last_flush >= self.flush_interval:
+                    self._file.flush()
+                    last_flush = now
+                    if now - last_fsync >= self.fsync_interval:
+                        os.fsync(self._file.fileno())
+                        last_fsync = now
+            except Exception as e:
+                print(f"❌ GPS capture write error: {e}")
+        self._close_file()
+
+    def _write_chunk(self, timestamp_ns, data):
+        if self._file_bytes + CHUNK.size + len(data) > self.max_file_bytes:
+            self._open_new_file()
+        self._file.write(CHUNK.pack(timestamp_ns, len(data)))
+        self._file.write(data)
+        self._file_bytes += CHUNK.size + len(data)
+        self.chunks_written += 1
+        self.bytes_written += len(data)
+
+    def _open_new_file(self):
+        self._close_file()
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        self.current_path = os.path.join(self.directory, f"{self.basename}_{stamp}.rgps")
+        self._file = open(self.current_path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, self.baudrate, self.protocol.encode('ascii'),
+                                     time.time_ns(), time.monotonic_ns()))
+        self._file_bytes = HEADER.size
+        self._prune_old_files()
+
+    def _close_file(self):
+        if self._file:
+            try:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+            except Exception as e:
+                print(f"⚠️ GPS capture close error: {e}")
+            self._file = None
+
+    def _prune_old_files(self):
+        files = sorted(glob.glob(os.path.join(self.directory, f"{self.basename}_*.rgps")))
+        for old in files[:-self.max_files]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+    def stop(self):
+        self.running = False
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=5)
+
+
+def read_header(path):
+    """{'baudrate', 'protocol', 'wall_ns', 'monotonic_ns'} of a capture file"""
+    with open(path, "rb") as f:
+        magic, version, baudrate, protocol, wall_ns, mono_ns = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"Not a GPS capture file: {path}")
+    return {'baudrate': baudrate, 'protocol': protocol.rstrip(b"\0").decode('ascii'),
+            'wall_ns': wall_ns, 'monotonic_ns': mono_ns}
+
+
+def read_chunks(path):
+    """Yield (monotonic ns, bytes) for every chunk; a torn tail is ignored"""
+    read_header(path)
+    with open(path, "rb") as f:
+        f.seek(HEADER.size)
+        while True:
+            head = f.read(CHUNK.size)
+            if len(head) < CHUNK.size:
+                break
+            timestamp_ns, length = CHUNK.unpack(head)
+            data = f.read(length)
+            if len(data) < length:
+                break
+            yield timestamp_ns, data
+
+
+def capture_paths(path):
+    """A capture file, or every .rgps file of a directory in recording order"""
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "*.rgps")))
+    return [path]
+
+
+class CaptureReplayPort:
+    """
+    pyserial-like port that replays capture files. speed=1 is real time,
+    speed=N is N times faster, speed=0 replays as fast as the reader consumes it.
+    Writes (e.g. UBX configuration) are accepted and ignored.
+    """
+
+    replay = True
+
+    def __init__(self, paths, speed=1.0, timeout=1.0):
+        self.paths = capture_paths(paths) if isinstance(paths, str) else list(paths)
+        if not self.paths:
+            raise ValueError("No GPS capture files to replay")
+        header = read_header(self.paths[0])
+        self.baudrate = header['baudrate']
+        self.protocol = header['protocol']
+        self.speed = speed
+        self.timeout = timeout
+        self.is_open = True
+
+        self._chunks = self._iter_chunks()
+        self._pending = b""
+        self._next = None          # (due monotonic s, bytes) not yet released
+        self._start_capture = None
+        self._start_replay = None
+        self.finished = False
+        self.bytes_replayed = 0
+
+    def _iter_chunks(self):
+        for path in self.paths:
+            yield from read_chunks(path)
+
+    def _due(self, timestamp_ns):
+        if self._start_capture is None:
+            self._start_capture = timestamp_ns
+            self._start_replay = time.monotonic()
+        if not self.speed:
+            return 0.0
+        return self._start_replay + (timestamp_ns - self._start_capture) / 1e9 / self.speed
+
+    def _release(self, block_until=None):
+        """Move chunks that are due into the pending buffer"""
+        while True:
+            if self._next is None:
+                chunk = next(self._chunks, None)
+                if chunk is None:
+                    self.finished = not self._pending
+                    return
+                self._next = (self._due(chunk[0]), chunk[1])
+            due, data = self._next
+            now = time.monotonic()
+            if due > now:
+                if self._pending or block_until is None or due > block_until:
+                    return
+                time.sleep(due - now)
+            self._pending += data
+            self._next = None
+            if self.speed:
+                continue
+            return  # As fast as possible: one chunk per read keeps the chunking
+
+    @property
+    def in_waiting(self):
+        self._release()
+        return len(self._pending)
+
+    def read(self, size=1):
+        self._release(time.monotonic() + (self.timeout or 0))
+        if not self._pending:
+            if not self.finished and self._next is not None:
+                time.sleep(max(0.0, min(self.timeout or 0, self._next[0] - time.monotonic())))
+            return b""
+        data = self._pending[:size]
+        self._pending = self._pending[size:]
+        self.bytes_replayed += len(data)
+        return data
+
+    def write(self, data):
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def reset_input_buffer(self):
+        pass
+
+    def close(self):
+        self.is_open = False
+
+
+if __name__ == "__main__":
+    # Usage: python -m backend.gps_capture <capture.rgps|dir> [out.nmea]
+    if len(sys.argv) < 2:
+        print("Usage: python -m backend.gps_capture <capture.rgps|dir> [out.nmea]")
+        sys.exit(1)
+    sources = capture_paths(sys.argv[1])
+    target = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(sources[0])[0] + ".nmea"
+    total = 0
+    with open(target, "wb") as out:
+        for source in sources:
+            for _, data in read_chunks(source):
+                out.write(data)
+                total += len(data)
+    print(f"✅ Exported {total} raw bytes to {target}")
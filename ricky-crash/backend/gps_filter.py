@@ -0,0 +1,184 @@
+"""
+GPS Filter - Constant-velocity Kalman filter for GPS fixes
+Runs in a local east/north plane (metres) as two independent [position, velocity]
+axes, so each fix costs a fixed handful of scalar operations and no allocations.
+Measurement noise follows fix quality (hAcc, or HDOP and satellite count).
+"""
+
+import math
+
+EARTH_RADIUS_M = 6371000.0
+DEG = math.pi / 180.0
+
+
+class PositionKalmanFilter:
+    def __init__(self, accel_noise=1.5, uere_m=4.0, min_sigma_m=1.5, stationary_kmh=1.5,
+                 gate_sigma=5.0, max_rejects=5, recenter_m=50000.0):
+        self.accel_noise = accel_noise        # Process noise: unmodelled acceleration (m/s^2)
+        self.uere_m = uere_m                  # Range error per unit HDOP (m)
+        self.min_sigma_m = min_sigma_m
+        self.stationary_kmh = stationary_kmh  # Measured speed below this = standing still
+        self.gate = gate_sigma * gate_sigma   # Innovation gate (squared sigmas)
+        self.max_rejects = max_rejects        # Consecutive outliers before re-seeding
+        self.recenter_m = recenter_m
+        self.reset()
+
+    def reset(self):
+        self.initialized = False
+        self.t = None
+        self.lat0 = self.lon0 = 0.0
+        self.m_per_lon = 0.0
+        # East axis state and covariance [[ee, ev], [ev, vv]]; same for north
+        self.x = self.vx = 0.0
+        self.y = self.vy = 0.0
+        self.pxx = self.pxv = self.pvv = 0.0
+        self.pyy = self.pyv = self.pww = 0.0
+        self.rejected = 0
+        self.updates = 0
+        self.outliers = 0
+
+    def sigma(self, hdop=None, satellites=None, accuracy_m=None):
+        """1-sigma horizontal error (m) for a fix of the given quality"""
+        if accuracy_m:
+            return max(self.min_sigma_m, accuracy_m)
+        sigma = (hdop or 2.0) * self.uere_m
+        if satellites is not None and satellites < 6:
+            sigma *= 1.0 + (6 - satellites) * 0.5
+        return max(self.min_sigma_m, sigma)
+
+    def _seed(self, lat, lon, t, sigma):
+        self.lat0, self.lon0 = lat, lon
+        self.m_per_lon = EARTH_RADIUS_M * DEG * math.cos(lat * DEG)
+        self.x = self.y = self.vx = self.vy = 0.0
+        r = sigma * sigma
+        self.pxx = self.pyy = r
+        self.pxv = self.pyv = 0.0
+        self.pvv = self.pww = 100.0  # Unknown velocity (10 m/s sigma)
+        self.t = t
+        self.rejected = 0
+        self.initialized = True
+
+    def predict(self, t):
+        """Advance the state to time t (seconds)"""
+        dt = t - self.t
+        if dt <= 0:
+            return
+        if dt > 30.0:
+            # Too long to extrapolate: keep position, forget the velocity
+            self.vx = self.vy = 0.0
+            self.pvv = self.pww = 100.0
+            self.pxx += 400.0
+            self.pyy += 400.0
+            self.pxv = self.pyv = 0.0
+            self.t = t
+            return
+        q = self.accel_noise * self.accel_noise
+        dt2 = dt * dt
+        q11 = q * dt2 * dt2 / 4.0
+        q12 = q * dt2 * dt / 2.0
+        q22 = q * dt2
+
+        self.x += self.vx * dt
+        self.pxx += dt * (2.0 * self.pxv + dt * self.pvv) + q11
+        self.pxv += dt * self.pvv + q12
+        self.pvv += q22
+
+        self.y += self.vy * dt
+        self.pyy += dt * (2.0 * self.pyv + dt * self.pww) + q11
+        self.pyv += dt * self.pww + q12
+        self.pww += q22
+        self.t = t
+
+    def update(self, lat, lon, t, sigma):
+        """
+        Fuse one position fix. Returns False if it was rejected as an outlier.
+        """
+        if not self.initialized:
+            self._seed(lat, lon, t, sigma)
+            self.updates += 1
+            return True
+
+        zx = (lon - self.lon0) * self.m_per_lon
+        zy = (lat - self.lat0) * EARTH_RADIUS_M * DEG
+        if abs(zx) > self.recenter_m or abs(zy) > self.recenter_m:
+            self._seed(lat, lon, t, sigma)
+            return True
+
+        self.predict(t)
+        r = sigma * sigma
+        ix = zx - self.x
+        iy = zy - self.y
+        sx = self.pxx + r
+        sy = self.pyy + r
+        if ix * ix / sx + iy * iy / sy > self.gate:
+            self.outliers += 1
+            self.rejected += 1
+            if self.rejected >= self.max_rejects:
+                self._seed(lat, lon, t, sigma)  # The filter, not the fixes, is wrong
+            return False
+        self.rejected = 0
+
+        kx, kv = self.pxx / sx, self.pxv / sx
+        self.x += kx * ix
+        self.vx += kv * ix
+        self.pvv -= kv * self.pxv
+        self.pxv -= kv * self.pxx
+        self.pxx -= kx * self.pxx
+
+        ky, kw = self.pyy / sy, self.pyv / sy
+        self.y += ky * iy
+        self.vy += kw * iy
+        self.pww -= kw * self.pyv
+        self.pyv -= kw * self.pyy
+        self.pyy -= ky * self.pyy
+
+        self.updates += 1
+        return True
+
+    def update_velocity(self, speed_kmh, heading_deg=None, sigma_ms=0.5):
+        """Fuse a Doppler speed (VTG / UBX). Standing still pins the velocity to zero."""
+        if not self.initialized:
+            return
+        if speed_kmh < self.stationary_kmh:
+            vx = vy = 0.0
+            sigma_ms = 0.05
+        elif heading_deg is None:
+            return
+        else:
+            speed = speed_kmh / 3.6
+            vx = speed * math.sin(heading_deg * DEG)
+            vy = speed * math.cos(heading_deg * DEG)
+        r = sigma_ms * sigma_ms
+
+        s = self.pvv + r
+        kx, kv = self.pxv / s, self.pvv / s
+        iv = vx - self.vx
+        self.x += kx * iv
+        self.vx += kv * iv
+        self.pxx -= kx * self.pxv
+        self.pxv -= kx * self.pvv
+        self.pvv -= kv * self.pvv
+
+        s = self.pww + r
+        ky, kw = self.pyv / s, self.pww / s
+        iw = vy - self.vy
+        self.y += ky * iw
+        self.vy += kw * iw
+        self.pyy -= ky * self.pyv
+        self.pyv -= ky * self.pww
+        self.pww -= kw * self.pww
+
+    def position(self):
+        """Filtered (lat, lon)"""
+        return (self.lat0 + self.y / (EARTH_RADIUS_M * DEG),
+                self.lon0 + self.x / self.m_per_lon)
+
+    def speed_kmh(self):
+        return math.hypot(self.vx, self.vy) * 3.6
+
+    def heading(self):
+        return math.degrees(math.atan2(self.vx, self.vy)) % 360
+
+    def accuracy_m(self):
+        """1-sigma horizontal position uncertainty"""
+        return math.sqrt(max(0.0, self.pxx + self.pyy) / 2.0)
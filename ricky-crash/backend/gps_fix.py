@@ -0,0 +1,52 @@
+"""
+GPS Fix - Immutable snapshot of one navigation solution
+GPSManager builds a new GPSFix for every solution and publishes it with a single
+reference assignment, so a reader on any thread gets position, speed, heading
+and quality that all belong to the same fix. Instances cannot be modified.
+"""
+
+import time
+
+
+class GPSFix:
+    __slots__ = ('seq', 'timestamp', 'lat', 'lon', 'speed', 'heading', 'altitude',
+                 'fix', 'satellites', 'hdop', 'accuracy_m', 'distance')
+
+    def __init__(self, seq=0, timestamp=None, lat=None, lon=None, speed=0.0, heading=0.0,
+                 altitude=0.0, fix=False, satellites=0, hdop=None, accuracy_m=None,
+                 distance=0.0):
+        init = object.__setattr__
+        init(self, 'seq', seq)                # Increases by one per published snapshot
+        init(self, 'timestamp', time.monotonic() if timestamp is None else timestamp)
+        init(self, 'lat', lat)
+        init(self, 'lon', lon)
+        init(self, 'speed', speed)            # km/h
+        init(self, 'heading', heading)        # Degrees from north
+        init(self, 'altitude', altitude)
+        init(self, 'fix', fix)
+        init(self, 'satellites', satellites)
+        init(self, 'hdop', hdop)
+        init(self, 'accuracy_m', accuracy_m)  # 1-sigma horizontal (filter or receiver)
+        init(self, 'distance', distance)      # Trip distance (km) when published
+
+    def __setattr__(self, name, value):
+        raise AttributeError("GPSFix is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("GPSFix is immutable")
+
+    @property
+    def location(self):
+        """(lat, lon), or None before the first position"""
+        return None if self.lat is None else (self.lat, self.lon)
+
+    def age(self):
+        """Seconds since the snapshot was published"""
+        return time.monotonic() - self.timestamp
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return (f"GPSFix(seq={self.seq}, lat={self.lat}, lon={self.lon}, "
+                f"speed={self.speed:.1f}, fix={self.fix})")
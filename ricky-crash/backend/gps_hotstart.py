@@ -0,0 +1,101 @@
+"""
+GPS Hot Start - Persisted receiver state for a fast first fix after boot
+The last good fix, the wall clock and the receiver setup are saved as JSON
+(periodically and at shutdown), the receiver's ephemerides / health data
+(AID-EPH, AID-HUI) as raw UBX frames next to it. At startup they are sent back
+with an AID-INI position/time so the receiver can hot start instead of
+searching the sky from scratch.
+"""
+
+import os
+import json
+import time
+import threading
+
+from backend import ubx_protocol as ubx
+
+EPHEMERIS_MAX_AGE_S = 4 * 3600   # Broadcast ephemerides are valid for ~4 h
+MIN_POSITION_ACCURACY_M = 300.0  # The vehicle may have been moved while off
+TTFF_HISTORY = 20                # Boots kept for startup latency tracking
+
+# systemd-timesyncd creates this once the clock has been synchronised (the Pi has no RTC)
+CLOCK_SYNC_FLAG = "/run/systemd/timesync/synchronized"
+
+
+def clock_synchronized():
+    return os.path.exists(CLOCK_SYNC_FLAG)
+
+
+def _atomic_write(path, data):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class GPSStateStore:
+    def __init__(self, path):
+        self.path = path
+        self.aiding_path = os.path.splitext(path)[0] + ".aid"
+        self.lock = threading.Lock()  # Periodic saves run on their own thread
+
+    def load(self):
+        """Saved state dict, or None if there is none (or it is unreadable)"""
+        try:
+            with open(self.path, "rb") as f:
+                return json.loads(f.read().decode('utf-8'))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"⚠️ GPS state file unreadable, cold start: {e}")
+            return None
+
+    def save(self, state):
+        try:
+            with self.lock:
+                _atomic_write(self.path, json.dumps(state, separators=(',', ':')).encode('utf-8'))
+        except Exception as e:
+            print(f"⚠️ GPS state save failed: {e}")
+
+    def load_aiding(self):
+        try:
+            with open(self.aiding_path, "rb") as f:
+                return f.read()
+        except OSError:
+            return b""
+
+    def save_aiding(self, frames):
+        try:
+            with self.lock:
+                _atomic_write(self.aiding_path, frames)
+        except Exception as e:
+            print(f"⚠️ GPS aiding data save failed: {e}")
+
+
+def hot_start_frames(state, aiding=b"", now=None, synchronized=None):
+    """
+    UBX frames to send at startup and the resulting start mode:
+    "cold" (nothing saved), "position" (AID-INI position only - clock not
+    trusted), "warm" (position + time) or "hot" (+ saved ephemerides).
+    """
+    if not state or state.get('lat') is None:
+        return b"", "cold"
+    now = time.time() if now is None else now
+    if synchronized is None:
+        synchronized = clock_synchronized()
+
+    pos_acc = max(MIN_POSITION_ACCURACY_M, state.get('accuracy_m') or 0.0)
+    frames = ubx.aid_ini(state['lat'], state['lon'], state.get('altitude') or 0.0, pos_acc,
+                         now if synchronized else None)
+    if not synchronized:
+        return frames, "position"
+
+    age = now - state.get('wall_time', 0)
+    if aiding and 0 <= age < EPHEMERIS_MAX_AGE_S:
+        return frames + aiding, "hot"
+    return frames, "warm"
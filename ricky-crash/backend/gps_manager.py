@@ -1,15 +1,34 @@
 """
 GPS Manager - Handles GPS data acquisition and processing
 Enhanced with real-time distance and speed tracking
+Updated: Chunked, checksum-validated NMEA parsing for any talker ($GP/$GN/...)
+Updated: Optional UBX binary mode (NAV-PVT or NEO-6M NAV-POSLLH/VELNED/SOL) at 5-10 Hz
+Updated: Kalman-filtered position/speed; raw fixes still available for comparison
+Updated: Haversine moved to backend/geodesy.py (scalar + vectorized trace API)
+Updated: Raw serial capture to rotating files and accelerated capture replay
+Updated: Immutable GPSFix snapshot per solution (get_fix / wait_for_fix) for other threads
+Updated: wait_for_fixes hands consumers every fix published since their last one
+Updated: Time-indexed position history (location_at / locations_at) for geotagging
+Updated: Hot start from the persisted last fix / ephemerides (AID-INI), TTFF measured per boot
+Updated: Simulation drives a GPX/CSV route (backend/route_simulator.py) at any time multiplier
 """
 
 import threading
 import time
-import math
-import random
-from datetime import datetime, timedelta
+from collections import deque
+from datetime import datetime
 from PyQt5.QtCore import QObject, pyqtSignal
 
+from backend.nmea_parser import NMEAStreamParser
+from backend import ubx_protocol as ubx
+from backend.gps_filter import PositionKalmanFilter
+from backend import geodesy
+from backend.gps_capture import SerialCaptureWriter, CaptureReplayPort
+from backend.gps_fix import GPSFix
+from backend.position_history import PositionHistory
+from backend.gps_hotstart import GPSStateStore, hot_start_frames, TTFF_HISTORY
+from backend.route_simulator import RouteSimulator
+
 try:
     import serial
     SERIAL_AVAILABLE = True
@@ -18,16 +37,34 @@ except ImportError:
     print("⚠️ Serial module not available - GPS simulation mode")
     SERIAL_AVAILABLE = False
 
+# Fixes kept for wait_for_fixes: 6 s at 10 Hz
+RECENT_FIXES = 64
+
 class GPSManager(QObject):
     # Signals
     location_updated = pyqtSignal(float, float)  # latitude, longitude
     speed_updated = pyqtSignal(float)  # speed in km/h
     distance_updated = pyqtSignal(float)  # total distance traveled
+    raw_location_updated = pyqtSignal(float, float)  # unfiltered fix
     
-    def __init__(self, port="/dev/serial0", baudrate=9600, force_simulation=False):
+    def __init__(self, port="/dev/serial0", baudrate=9600, force_simulation=False,
+                 protocol="nmea", nav_rate_hz=5.0, ubx_baudrate=115200, serial_port=None,
+                 use_filter=True, capture_directory=None, replay=None, replay_speed=1.0,
+                 history_size=36000, state_path=None, state_save_interval=300.0,
+                 simulation_route=None, simulation_speed=1.0, simulator=None):
         super().__init__()
         self.port = port
         self.baudrate = baudrate
+        self.serial_port = serial_port  # Pre-opened port (e.g. ubx.EmulatedUBXReceiver)
+
+        # Capture / replay of raw receiver bytes (backend/gps_capture.py)
+        self.capture_directory = capture_directory
+        self.capture = None
+        if replay:
+            self.serial_port = CaptureReplayPort(replay, speed=replay_speed)
+            protocol = self.serial_port.protocol
+            print(f"📼 GPS replaying {len(self.serial_port.paths)} capture file(s) "
+                  f"at {'max' if not replay_speed else f'{replay_speed:g}x'} speed")
         self.running = False
         self.thread = None
         
@@ -37,30 +74,85 @@ class GPSManager(QObject):
         self.current_speed = 0.0
         self.total_distance_traveled = 0.0
         self.trip_start_time = None
-        self.simulation_mode = force_simulation or not SERIAL_AVAILABLE
+        force_simulation = force_simulation or simulation_route is not None or simulator is not None
+        self.simulation_mode = self.serial_port is None and (force_simulation or not SERIAL_AVAILABLE)
 
-        
-        # For realistic simulation
-        self.sim_angle = 0
-        self.sim_radius = 0.005  # ~500m radius for more realistic movement
-        self.sim_speed_base = 15.0  # Base speed 15 km/h
-        self.sim_last_update = time.time()
+        # Receiver protocol: "nmea" (factory default) or "ubx" (binary, higher rate)
+        self.protocol = protocol
+        self.nav_rate_hz = nav_rate_hz
+        self.ubx_baudrate = ubx_baudrate
+        self.ubx_legacy = False  # True on receivers without NAV-PVT (NEO-6M)
+
+        # Kalman filter between parsing and the location/speed signals
+        self.filter = PositionKalmanFilter() if use_filter else None
+        self.raw_location = None
+        self.raw_speed = 0.0
+        self.raw_distance_traveled = 0.0
+        self._last_receiver_time = None
+        self._receiver_clock = 0.0
+
+        # Simulation: fixes along a route (GPX/CSV file or RouteSimulator);
+        # simulation_speed is the time multiplier, 0 = as fast as possible
+        self.simulation_route = simulation_route
+        self.simulation_speed = simulation_speed
+        self.simulator = simulator
         
         # GPS tracking
         self.gps_fix = False
         self.satellites_count = 0
         self.altitude = 0.0
         self.heading = 0.0
+        self.hdop = None
+        self.h_acc = None  # Horizontal accuracy estimate in m (UBX only)
+        self.satellites_in_view = 0
+
+        # Latest published snapshot - replaced as a whole, never modified
+        self.fix = GPSFix()
+        self._fix_published = threading.Condition()
+        self._recent_fixes = deque(maxlen=RECENT_FIXES)  # For wait_for_fixes
+
+        # Published positions by monotonic time (geotagging past events)
+        self.history = PositionHistory(history_size)
+
+        # Hot start: last fix / receiver state saved periodically and at shutdown
+        self.state_store = GPSStateStore(state_path) if state_path else None
+        self.state_save_interval = state_save_interval
+        self._save_state = False
+        self._last_state_save = float('-inf')
+        self.start_mode = None      # cold / position / warm / hot
+        self.ttff_s = None          # Time to first fix of this boot
+        self.ttff_history = []      # Previous boots (from the state file)
+        self._start_monotonic = None
+
+        # Incremental NMEA parser (reusable buffer, checksum validated)
+        self.nmea = NMEAStreamParser()
+        self._vtg_seen = False  # Prefer VTG speed; fall back to RMC when absent
+        self.ubx = ubx.UBXStreamParser()
 
     def start(self):
         """Start GPS monitoring"""
         self.running = True
         self.trip_start_time = datetime.now()
+        self._start_monotonic = time.monotonic()
+        state = self.state_store.load() if self.state_store else None
+        if state:
+            self.ttff_history = state.get('ttff_history', [])[-TTFF_HISTORY:]
         
         if not self.simulation_mode:
             try:
-                self.serial = serial.Serial(self.port, self.baudrate, timeout=1)
+                self.serial = self.serial_port or serial.Serial(self.port, self.baudrate, timeout=1)
                 print(f"📡 GPS initialized on {self.port}")
+                replay = getattr(self.serial, 'replay', False)
+                if self.protocol == "ubx" and not replay:
+                    self._configure_ubx()
+                if self.state_store and not replay:
+                    self._hot_start(state)
+                    self._save_state = True
+                if self.capture_directory:
+                    self.capture = SerialCaptureWriter(self.capture_directory,
+                                                       baudrate=self.serial.baudrate,
+                                                       protocol=self.protocol)
+                    self.capture.start()
             except Exception as e:
                 print(f"⚠️ GPS serial failed, switching to simulation: {e}")
                 self.simulation_mode = True
@@ -72,193 +164,372 @@ class GPSManager(QObject):
     def _gps_loop(self):
         """Main GPS processing loop"""
         if self.simulation_mode:
-            self._enhanced_simulation_loop()
+            self._simulation_loop()
         else:
             self._serial_loop()
 
-    def _enhanced_simulation_loop(self):
-        """Enhanced GPS simulation with realistic movement patterns"""
-        # Mumbai area coordinates for realistic simulation
-        base_lat, base_lon = 19.0760, 72.8777  # Mumbai
-        
-        # Simulate different route patterns
-        route_points = [
-            (19.0760, 72.8777),  # Starting point
-            (19.0800, 72.8800),  # Point 1
-            (19.0850, 72.8750),  # Point 2
-            (19.0820, 72.8720),  # Point 3
-            (19.0790, 72.8760),  # Back towards start
-        ]
-        
-        current_target = 1
-        progress_to_target = 0.0
-        
-        while self.running:
+    def _simulation_loop(self):
+        """Synthetic fixes along a route, paced by simulation_speed (0 = no pacing)"""
+        if self.simulator is None:
             try:
-                current_time = time.time()
-                time_delta = current_time - self.sim_last_update
-                self.sim_last_update = current_time
-                
-                # Get current and target positions
-                current_pos = route_points[current_target - 1]
-                target_pos = route_points[current_target % len(route_points)]
-                
-                # Calculate movement towards target
-                movement_speed = 0.001  # Movement rate
-                progress_to_target += movement_speed
-                
-                if progress_to_target >= 1.0:
-                    progress_to_target = 0.0
-                    current_target = (current_target + 1) % len(route_points)
-                    target_pos = route_points[current_target]
-                
-                # Interpolate position
-                lat = current_pos[0] + (target_pos[0] - current_pos[0]) * progress_to_target
-                lon = current_pos[1] + (target_pos[1] - current_pos[1]) * progress_to_target
-                
-                # Add some random variation to simulate real GPS noise
-                lat += random.uniform(-0.0001, 0.0001)
-                lon += random.uniform(-0.0001, 0.0001)
-                
-                # Calculate realistic speed based on movement
-                if self.previous_location:
-                    distance_moved = self.calculate_distance(
-                        self.previous_location[0], self.previous_location[1], lat, lon
-                    )
-                    
-                    if time_delta > 0:
-                        # Speed = distance / time, convert to km/h
-                        current_speed_ms = (distance_moved * 1000) / time_delta  # m/s
-                        self.current_speed = current_speed_ms * 3.6  # Convert to km/h
-                        
-                        # Add realistic speed variation (10-40 km/h)
-                        self.current_speed = max(5, min(45, self.current_speed + random.uniform(-2, 2)))
-                    
-                    # Update total distance
-                    self.total_distance_traveled += distance_moved
-                
-                # Update location
-                self.previous_location = self.current_location
-                self.current_location = (lat, lon)
-                
-                # Emit signals
-                self.location_updated.emit(lat, lon)
-                self.speed_updated.emit(self.current_speed)
-                self.distance_updated.emit(self.total_distance_traveled)
-                
-                # Update GPS status
-                self.gps_fix = True
-                self.satellites_count = random.randint(6, 12)
-                self.altitude = random.uniform(10, 50)
-                self.heading = (self.heading + random.uniform(-5, 5)) % 360
-                
-                time.sleep(1)  # Update every second for real-time feel
-                
+                self.simulator = RouteSimulator(self.simulation_route)
+            except Exception as e:
+                print(f"⚠️ GPS route {self.simulation_route} unusable, using the default loop: {e}")
+                self.simulator = RouteSimulator()
+        speed = self.simulation_speed
+        print(f"🧭 GPS simulating {self.simulator.length_m / 1000:.2f} km route "
+              f"at {f'{speed:g}x' if speed else 'max'} speed")
+
+        started = time.monotonic()
+        for fix in self.simulator.fixes():
+            if not self.running:
+                return
+            try:
+                if speed:
+                    delay = started + fix['t'] / speed - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+
+                self.satellites_count = fix['satellites']
+                self.hdop = fix['hdop']
+                self.altitude = fix['altitude']
+                if fix['heading'] is not None:
+                    self.heading = fix['heading']
+                # Same path as real fixes, on the simulated clock
+                self._update_position(fix['lat'], fix['lon'], fix['t'],
+                                      hdop=fix['hdop'], satellites=fix['satellites'])
+                self._update_speed(fix['speed_kmh'], fix['heading'])
+                self._publish_fix()
             except Exception as e:
                 print(f"❌ GPS simulation error: {e}")
                 time.sleep(1)
+        print("🧭 GPS simulated route finished")
+
+    def _configure_ubx(self):
+        """
+        Switch the receiver to UBX output at nav_rate_hz: raise the baud rate,
+        enable NAV-PVT (or the NEO-6M POSLLH/VELNED/SOL set) and NAV-DOP,
+        silence NMEA.
+        """
+        port = self.serial
+        if self.ubx_baudrate and self.ubx_baudrate != port.baudrate:
+            port.write(ubx.cfg_prt_uart(self.ubx_baudrate))
+            port.flush()
+            time.sleep(0.1)  # Receiver switches after sending the ACK
+            port.baudrate = self.ubx_baudrate
+            port.reset_input_buffer()
+
+        for msg_id in ubx.NMEA_MESSAGES:
+            self._send_ubx(ubx.cfg_msg(ubx.CLS_NMEA, msg_id, 0))
+
+        if self._send_ubx(ubx.cfg_msg(ubx.CLS_NAV, ubx.NAV_PVT, 1)) is False:
+            # NEO-6M (protocol 7) has no NAV-PVT
+            self.ubx_legacy = True
+            for msg_id in (ubx.NAV_POSLLH, ubx.NAV_VELNED, ubx.NAV_SOL):
+                self._send_ubx(ubx.cfg_msg(ubx.CLS_NAV, msg_id, 1))
+        # Horizontal DOP for the quality gates (NAV-PVT / NAV-SOL only carry PDOP)
+        self._send_ubx(ubx.cfg_msg(ubx.CLS_NAV, ubx.NAV_DOP, 1))
+
+        for rate_hz in (self.nav_rate_hz, 5.0, 1.0):
+            if rate_hz > self.nav_rate_hz:
+                continue
+            if self._send_ubx(ubx.cfg_rate(round(1000.0 / rate_hz))):
+                self.nav_rate_hz = rate_hz
+                break
+
+        model = "NEO-6M NAV-POSLLH/VELNED/SOL" if self.ubx_legacy else "NAV-PVT"
+        print(f"📡 GPS UBX mode: {model} at {self.nav_rate_hz:g} Hz, {port.baudrate} baud")
+
+    def _hot_start(self, state):
+        """Send the saved position/time and ephemerides so the receiver skips the sky search"""
+        frames, self.start_mode = hot_start_frames(state, self.state_store.load_aiding())
+        if frames:
+            self.serial.write(frames)
+            self.serial.flush()
+        print(f"🛰️ GPS {self.start_mode} start ({len(frames)} bytes of aiding data)")
+
+    def _poll_aiding(self, timeout=3.0):
+        """Read the receiver's health/UTC data and ephemerides (AID-HUI, AID-EPH) as UBX frames"""
+        frames = bytearray()
+        for msg_id, expected in ((ubx.AID_HUI, 1), (ubx.AID_EPH, 32)):
+            self.serial.write(ubx.ubx_frame(ubx.CLS_AID, msg_id))
+            received = 0
+            deadline = time.monotonic() + timeout
+            while received < expected and time.monotonic() < deadline:
+                for message in self.ubx.read_from(self.serial):
+                    if message['type'] == "RAW" and (message['class'], message['id']) == (ubx.CLS_AID, msg_id):
+                        received += 1
+                        # An 8-byte AID-EPH means no ephemeris for that SV
+                        if msg_id != ubx.AID_EPH or len(message['payload']) > 8:
+                            frames += ubx.ubx_frame(ubx.CLS_AID, msg_id, message['payload'])
+        return bytes(frames)
+
+    def _receiver_state(self, fix):
+        """Everything the next boot needs for a hot start"""
+        return {
+            'lat': fix.lat,
+            'lon': fix.lon,
+            'altitude': fix.altitude,
+            'accuracy_m': fix.accuracy_m,
+            'speed': fix.speed,
+            'heading': fix.heading,
+            'wall_time': time.time() - fix.age(),
+            'protocol': self.protocol,
+            'nav_rate_hz': self.nav_rate_hz,
+            'baudrate': self.serial.baudrate,
+            'ubx_legacy': self.ubx_legacy,
+            'ttff_history': self.ttff_history,
+        }
+
+    def _save_shutdown_state(self):
+        fix = self.fix
+        if fix.lat is None:
+            return  # No fix this session - keep the previous state
+        self.state_store.save(self._receiver_state(fix))
+        try:
+            frames = self._poll_aiding()
+        except Exception as e:
+            print(f"⚠️ GPS aiding poll failed: {e}")
+            return
+        if frames:
+            self.state_store.save_aiding(frames)
+        print(f"💾 GPS state saved for hot start ({len(frames)} bytes of aiding data)")
+
+    def _record_ttff(self, ttff_s):
+        self.ttff_s = ttff_s
+        self.ttff_history.append({
+            'boot': datetime.now().isoformat(timespec='seconds'),
+            'ttff_s': round(ttff_s, 2),
+            'start_mode': self.start_mode,
+        })
+        del self.ttff_history[:-TTFF_HISTORY]
+        mode = f" ({self.start_mode} start)" if self.start_mode else ""
+        print(f"🛰️ GPS first fix after {ttff_s:.1f} s{mode}")
+
+    def _send_ubx(self, frame, timeout=1.0):
+        """Send a CFG frame; True on ACK, False on NAK, None if no answer"""
+        self.serial.write(frame)
+        cls, msg_id = frame[2], frame[3]
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            for message in self.ubx.read_from(self.serial):
+                if message['type'] == "ACK" and (message['class'], message['id']) == (cls, msg_id):
+                    return message['ack']
+        return None
 
     def _serial_loop(self):
         """Read from actual GPS module"""
         while self.running:
             try:
-                line = self.serial.readline().decode("ascii", errors="replace").strip()
-                
-                if line.startswith("$GPGGA"):
-                    location_data = self._parse_gpgga(line)
-                    if location_data:
-                        lat, lon, altitude, satellites = location_data
-                        
-                        # Update tracking
-                        if self.previous_location:
-                            distance = self.calculate_distance(
-                                self.previous_location[0], self.previous_location[1], lat, lon
-                            )
-                            self.total_distance_traveled += distance
-                            self.distance_updated.emit(self.total_distance_traveled)
-                        
-                        self.previous_location = self.current_location
-                        self.current_location = (lat, lon)
-                        self.altitude = altitude
-                        self.satellites_count = satellites
-                        self.gps_fix = True
-                        
-                        self.location_updated.emit(lat, lon)
-                
-                elif line.startswith("$GPVTG"):
-                    speed = self._parse_gpvtg(line)
-                    if speed is not None:
-                        self.current_speed = speed
-                        self.speed_updated.emit(speed)
-                
-                elif line.startswith("$GPGSA"):
-                    fix_data = self._parse_gpgsa(line)
-                    if fix_data:
-                        self.gps_fix = fix_data
-                        
+                # Whatever is waiting on the UART, not one readline() per sentence
+                data = self.serial.read(max(1, self.serial.in_waiting))
+                if not data:
+                    if getattr(self.serial, 'finished', False):
+                        print("📼 GPS replay finished")
+                        break
+                    continue
+                if self.capture:
+                    self.capture.write(data)
+
+                if self.protocol == "ubx":
+                    for message in self.ubx.feed(data):
+                        if message['type'] == "PVT":
+                            self._handle_ubx_fix(message)
+                else:
+                    for message in self.nmea.feed(data):
+                        self._handle_nmea(message)
             except Exception as e:
                 print(f"❌ GPS serial error: {e}")
                 time.sleep(1)
 
-    def _parse_gpgga(self, sentence):
-        """Parse GPGGA sentence for location and quality"""
-        try:
-            parts = sentence.split(",")
-            if len(parts) < 15:
-                return None
-                
-            lat_raw, lat_dir, lon_raw, lon_dir = parts[2:6]
-            quality = parts[6]
-            satellites = parts[7]
-            altitude = parts[9]
-            
-            if not lat_raw or not lon_raw or quality == '0':
-                return None
+    def _handle_nmea(self, message):
+        """Apply one decoded sentence (see backend/nmea_parser.py) to the GPS state"""
+        kind = message['type']
 
-            # Convert ddmm.mmmm to decimal degrees
-            lat = float(lat_raw[:2]) + float(lat_raw[2:]) / 60.0
-            if lat_dir == "S":
-                lat = -lat
-                
-            lon = float(lon_raw[:3]) + float(lon_raw[3:]) / 60.0
-            if lon_dir == "W":
-                lon = -lon
-            
-            alt = float(altitude) if altitude else 0.0
-            sats = int(satellites) if satellites else 0
-                
-            return (lat, lon, alt, sats)
-        except Exception:
-            return None
+        if kind == "GGA":
+            self.satellites_count = message['satellites']
+            self.hdop = message['hdop']
+            if 'lat' not in message:
+                return
+            self.altitude = message['altitude']
+            self._update_position(message['lat'], message['lon'],
+                                  self._fix_timestamp(message['time'], 86400.0),
+                                  hdop=message['hdop'], satellites=message['satellites'])
+            # u-blox sends RMC and VTG before GGA, so the speed is this epoch's
+            self._publish_fix()
 
-    def _parse_gpvtg(self, sentence):
-        """Parse GPVTG sentence for speed"""
-        try:
-            parts = sentence.split(",")
-            if len(parts) > 7 and parts[7]:  # Speed in km/h
-                return float(parts[7])
-            return None
-        except Exception:
+        elif kind == "VTG":
+            self._vtg_seen = True
+            if message['course'] is not None:
+                self.heading = message['course']
+            if message['speed_kmh'] is not None:
+                self._update_speed(message['speed_kmh'], message['course'])
+
+        elif kind == "RMC":
+            if not message['valid']:
+                return
+            if message['course'] is not None:
+                self.heading = message['course']
+            if not self._vtg_seen:
+                self._update_speed(message['speed_kmh'], message['course'])
+
+        elif kind == "GSA":
+            had_fix = self.gps_fix
+            self.gps_fix = message['fix_type'] in (2, 3)  # 2D or 3D fix
+            if message['hdop'] is not None:
+                self.hdop = message['hdop']
+            if had_fix and not self.gps_fix:
+                self._publish_fix()
+
+        elif kind == "GSV":
+            if message['number'] == message['messages']:
+                self.satellites_in_view = message['in_view']
+
+    def _handle_ubx_fix(self, fix):
+        """Apply one UBX navigation solution (position, velocity and quality together)"""
+        self.satellites_count = fix['satellites']
+        self.hdop = fix['hdop']  # From NAV-DOP; None if the receiver doesn't send it
+        self.h_acc = fix['h_acc_m']
+        if fix['fix_type'] not in (2, 3) or not fix['fix_ok']:
+            if self.gps_fix:
+                self.gps_fix = False
+                self._publish_fix()
+            return
+        self.altitude = fix['altitude']
+        self.heading = fix['heading']
+        self._update_position(fix['lat'], fix['lon'],
+                              self._fix_timestamp(fix['itow'] / 1000.0, 604800.0),
+                              hdop=fix['hdop'], satellites=fix['satellites'],
+                              accuracy_m=fix['h_acc_m'])
+        self._update_speed(fix['speed_kmh'], fix['heading'])
+        self._publish_fix()
+
+    def _fix_timestamp(self, receiver_time, wrap):
+        """Continuous seconds from receiver time of day / week (filter timebase)"""
+        if receiver_time is None:
             return None
+        if self._last_receiver_time is not None:
+            dt = receiver_time - self._last_receiver_time
+            if dt < -wrap / 2:
+                dt += wrap
+            self._receiver_clock += dt
+        self._last_receiver_time = receiver_time
+        return self._receiver_clock
 
-    def _parse_gpgsa(self, sentence):
-        """Parse GPGSA sentence for fix type"""
-        try:
-            parts = sentence.split(",")
-            if len(parts) > 2:
-                fix_type = parts[2]
-                return fix_type in ['2', '3']  # 2D or 3D fix
-            return False
-        except Exception:
-            return False
+    def _update_position(self, lat, lon, fix_time=None, hdop=None, satellites=None,
+                         accuracy_m=None):
+        """New fix: raw stream first, then (if enabled) the Kalman-filtered one"""
+        if self.raw_location:
+            self.raw_distance_traveled += self.calculate_distance(
+                self.raw_location[0], self.raw_location[1], lat, lon
+            )
+        self.raw_location = (lat, lon)
+        self.raw_location_updated.emit(lat, lon)
+        self.gps_fix = True
+
+        if self.filter:
+            if fix_time is None:
+                fix_time = time.monotonic()
+            sigma = self.filter.sigma(hdop, satellites, accuracy_m)
+            if not self.filter.update(lat, lon, fix_time, sigma):
+                return  # Outlier - keep the previous filtered position
+            lat, lon = self.filter.position()
+
+        # Update tracking
+        if self.current_location:
+            distance = self.calculate_distance(
+                self.current_location[0], self.current_location[1], lat, lon
+            )
+            self.total_distance_traveled += distance
+            self.distance_updated.emit(self.total_distance_traveled)
+
+        self.previous_location = self.current_location
+        self.current_location = (lat, lon)
+
+        self.location_updated.emit(lat, lon)
+
+    def _update_speed(self, speed, heading=None):
+        self.raw_speed = speed
+        if self.filter and self.filter.initialized:
+            self.filter.update_velocity(speed, heading)
+            speed = self.filter.speed_kmh()
+        self.current_speed = speed
+        self.speed_updated.emit(speed)
+
+    def _publish_fix(self):
+        """Publish the current state as a new GPSFix (one reference swap) and wake waiters"""
+        location = self.current_location or (None, None)
+        if self.filter and self.filter.initialized:
+            accuracy = self.filter.accuracy_m()
+        else:
+            accuracy = self.h_acc
+        with self._fix_published:
+            fix = GPSFix(self.fix.seq + 1, time.monotonic(), location[0], location[1],
+                         self.current_speed, self.heading, self.altitude, self.gps_fix,
+                         self.satellites_count, self.hdop, accuracy,
+                         self.total_distance_traveled)
+            if fix.fix and fix.lat is not None:
+                self.history.append(fix.timestamp, fix.lat, fix.lon, fix.speed)
+            self.fix = fix
+            self._recent_fixes.append(fix)
+            self._fix_published.notify_all()
+
+        if fix.fix and fix.lat is not None:
+            if self.ttff_s is None and self._start_monotonic is not None:
+                self._record_ttff(fix.timestamp - self._start_monotonic)
+            if self._save_state and fix.timestamp - self._last_state_save >= self.state_save_interval:
+                self._last_state_save = fix.timestamp
+                threading.Thread(target=self.state_store.save, args=(self._receiver_state(fix),),
+                                 daemon=True).start()
+
+    def get_fix(self):
+        """Latest GPSFix snapshot (safe to read from any thread)"""
+        return self.fix
+
+    def wait_for_fix(self, after_seq=None, timeout=None):
+        """
+        Block until a fix newer than after_seq (default: the current one) is
+        published. Returns the new GPSFix, or None on timeout.
+        """
+        with self._fix_published:
+            if after_seq is None:
+                after_seq = self.fix.seq
+            if not self._fix_published.wait_for(lambda: self.fix.seq > after_seq, timeout):
+                return None
+            return self.fix
+
+    def wait_for_fixes(self, after_seq=None, timeout=None):
+        """
+        Like wait_for_fix, but returns every fix published after after_seq,
+        oldest first (empty list on timeout), so a consumer that was busy
+        still sees each one. Only the last RECENT_FIXES are kept; a gap in
+        seq means older ones were dropped.
+        """
+        with self._fix_published:
+            if after_seq is None:
+                after_seq = self.fix.seq
+            if not self._fix_published.wait_for(lambda: self.fix.seq > after_seq, timeout):
+                return []
+            return [fix for fix in self._recent_fixes if fix.seq > after_seq]
+
+    def location_at(self, timestamp, method="linear"):
+        """
+        Position at a past time.monotonic() timestamp, interpolated between fixes
+        ("linear" or "great_circle"). None if the history doesn't cover it.
+        """
+        return self.history.at(timestamp, method)
+
+    def locations_at(self, timestamps, method="linear"):
+        """Vectorized location_at for many timestamps; returns (lats, lons)"""
+        return self.history.at_many(timestamps, method)
 
     def get_location(self):
         """Get current location"""
-        return self.current_location
+        return self.fix.location
 
     def get_speed(self):
         """Get current speed in km/h"""
-        return self.current_speed
+        return self.fix.speed
 
     def get_total_distance(self):
         """Get total distance traveled in km"""
@@ -273,48 +544,60 @@ class GPSManager(QObject):
 
     def get_gps_status(self):
         """Get GPS status information"""
+        fix = self.fix
         return {
-            'fix': self.gps_fix,
-            'satellites': self.satellites_count,
-            'altitude': self.altitude,
-            'speed': self.current_speed,
-            'heading': self.heading
+            'fix': fix.fix,
+            'satellites': fix.satellites,
+            'altitude': fix.altitude,
+            'speed': fix.speed,
+            'heading': fix.heading,
+            'hdop': fix.hdop,
+            'seq': fix.seq,
+            'fix_age': fix.age(),
+            'h_acc': self.h_acc,
+            'protocol': self.protocol,
+            'nav_rate_hz': self.nav_rate_hz if self.protocol == "ubx" else 1.0,
+            'filtered': self.filter is not None,
+            'filter_accuracy': self.filter.accuracy_m() if self.filter and self.filter.initialized else None,
+            'raw_speed': self.raw_speed,
+            'ttff_s': self.ttff_s,
+            'start_mode': self.start_mode,
+            'satellites_in_view': self.satellites_in_view
         }
 
     def reset_trip(self):
         """Reset trip counters"""
         self.total_distance_traveled = 0.0
+        self.raw_distance_traveled = 0.0
         self.trip_start_time = datetime.now()
         self.previous_location = None
+        self._publish_fix()
         print("📡 GPS trip counters reset")
 
     def calculate_distance(self, lat1, lon1, lat2, lon2):
-        """Calculate distance between two points in km"""
+        """Calculate distance between two points in km (batch versions in backend/geodesy.py)"""
         if not all([lat1, lon1, lat2, lon2]):
             return 0.0
-            
-        try:
-            # Haversine formula
-            R = 6371.0  # Earth radius in km
-            lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-            dlat = lat2 - lat1
-            dlon = lon2 - lon1
-            a = math.sin(dlat/2)**2 + math.cos(lat1)*math.cos(lat2)*math.sin(dlon/2)**2
-            return 2 * R * math.asin(math.sqrt(a))
-        except Exception:
-            return 0.0
+        return geodesy.haversine_km(lat1, lon1, lat2, lon2)
 
     def stop(self):
         """Stop GPS monitoring"""
         self.running = False
+
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=2)
+
+        # The reader has stopped, so the port is free for the aiding poll
+        if self._save_state and not (self.thread and self.thread.is_alive()):
+            self._save_shutdown_state()
         
         if hasattr(self, 'serial'):
             try:
                 self.serial.close()
             except:
                 pass
-                
-        if self.thread and self.thread.is_alive():
-            self.thread.join(timeout=2)
+
+        if self.capture:
+            self.capture.stop()
             
         print("📡 GPS manager stopped")
\ No newline at end of file
@@ -0,0 +1,226 @@
+"""
+IMU Log - Batched binary log sink for MPU6050 samples
+Fixed-width records in a preallocated buffer, written in large chunks by a
+background thread with periodic fsync and size-based file rotation.
+"""
+
+import os
+import csv
+import sys
+import math
+import glob
+import time
+import struct
+import threading
+from datetime import datetime
+
+# File header: magic, version, record size, LSB per G, wall clock ns, monotonic ns
+HEADER = struct.Struct("<4sHHfqq")
+MAGIC = b"RIMU"
+VERSION = 1
+
+# Record: monotonic timestamp ns + raw int16 X/Y/Z
+RECORD = struct.Struct("<qhhh")
+
+CSV_HEADER = ["Timestamp", "Accel_X_G", "Accel_Y_G", "Accel_Z_G", "Total_G"]
+
+
+class IMULogWriter:
+    """Double-buffered binary writer; the sampling thread never touches the disk"""
+
+    def __init__(self, directory, basename="mpu6050", buffer_records=4096,
+                 flush_interval=1.0, fsync_interval=10.0,
+                 max_file_bytes=16 * 1024 * 1024, max_files=20, scale_divider=2048.0):
+        self.directory = directory
+        self.basename = basename
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self.scale_divider = scale_divider
+
+        # Two preallocated buffers: one filled by the sampler, one drained by the writer
+        self.buffer_bytes = buffer_records * RECORD.size
+        self._buffers = [bytearray(self.buffer_bytes), bytearray(self.buffer_bytes)]
+        self._active = 0
+        self._offset = 0
+        self._pending = None  # (buffer index, length) waiting for the writer thread
+        self._last_swap = time.monotonic()
+
+        self._cond = threading.Condition()
+        self._thread = None
+        self.running = False
+
+        self._file = None
+        self._file_bytes = 0
+        self._last_fsync = time.monotonic()
+        self.current_path = None
+
+        # Stats
+        self.records_written = 0
+        self.dropped_records = 0
+        self.chunks_written = 0
+
+    def start(self):
+        """Open the first file and start the writer thread"""
+        os.makedirs(self.directory, exist_ok=True)
+        self._open_new_file()
+        self.running = True
+        self._thread = threading.Thread(target=self._writer_loop, name="imu_log_writer", daemon=True)
+        self._thread.start()
+        print(f"📁 Logging MPU data to: {self.current_path}")
+
+    def write_batch(self, timestamp_ns, period_ns, samples):
+        """
+        Append a batch of raw (x, y, z) samples; the newest sample is at timestamp_ns.
+        Never blocks on I/O - if both buffers are full the records are dropped and counted.
+        """
+        count = len(samples)
+        if count == 0:
+            return
+        t = timestamp_ns - (count - 1) * period_ns
+        pack_into = RECORD.pack_into
+        size = RECORD.size
+
+        with self._cond:
+            for x, y, z in samples:
+                if self._offset + size > self.buffer_bytes and not self._swap_locked():
+                    self.dropped_records += 1
+                    t += period_ns
+                    continue
+                pack_into(self._buffers[self._active], self._offset, t, x, y, z)
+                self._offset += size
+                t += period_ns
+
+            if time.monotonic() - self._last_swap >= self.flush_interval:
+                self._swap_locked()
+
+    def _swap_locked(self):
+        """Hand the active buffer to the writer thread. Caller holds the lock."""
+        if self._pending is not None:
+            return False  # Writer still busy with the other buffer
+        if self._offset:
+            self._pending = (self._active, self._offset)
+            self._active ^= 1
+            self._offset = 0
+            self._cond.notify()
+        self._last_swap = time.monotonic()
+        return True
+
+    def _writer_loop(self):
+        while True:
+            with self._cond:
+                while self._pending is None and self.running:
+                    self._cond.wait(self.flush_interval)
+                    if self._pending is None and self._offset:
+                        self._swap_locked()  # Quiet period - push out the partial buffer
+                if self._pending is None:
+                    # Stopping: hand over whatever is left in the active buffer
+                    self._swap_locked()
+                    if self._pending is None:
+                        break
+                index, length = self._pending
+
+            try:
+                self._write_chunk(memoryview(self._buffers[index])[:length])
+            except Exception as e:
+                print(f"❌ IMU log write error: {e}")
+
+            with self._cond:
+                self._pending = None
+        self._close_file()
+
+    def _write_chunk(self, chunk):
+        if self._file_bytes + len(chunk) > self.max_file_bytes:
+            self._open_new_file()
+
+        self._file.write(chunk)
+        self._file.flush()
+        self._file_bytes += len(chunk)
+        self.records_written += len(chunk) // RECORD.size
+        self.chunks_written += 1
+
+        now = time.monotonic()
+        if now - self._last_fsync >= self.fsync_interval:
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+
+    def _open_new_file(self):
+        self._close_file()
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        self.current_path = os.path.join(self.directory, f"{self.basename}_{stamp}.rimu")
+        self._file = open(self.current_path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, self.scale_divider,
+                                     time.time_ns(), time.monotonic_ns()))
+        self._file_bytes = HEADER.size
+        self._prune_old_files()
+
+    def _close_file(self):
+        if self._file:
+            try:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+            except Exception as e:
+                print(f"⚠️ IMU log close error: {e}")
+            self._file = None
+
+    def _prune_old_files(self):
+        files = sorted(glob.glob(os.path.join(self.directory, f"{self.basename}_*.rimu")))
+        for old in files[:-self.max_files]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+    def stop(self):
+        """Flush whatever is buffered and close the file"""
+        with self._cond:
+            self.running = False
+            self._cond.notify()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=5)
+
+
+def read_records(path):
+    """Yield (wall_clock_seconds, x, y, z, scale_divider) for every record in a log file"""
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+        magic, version, record_size, scale, wall_ns, mono_ns = HEADER.unpack(header)
+        if magic != MAGIC or record_size != RECORD.size:
+            raise ValueError(f"Not an IMU log file: {path}")
+
+        offset_ns = wall_ns - mono_ns  # Maps monotonic timestamps to wall clock
+        while True:
+            chunk = f.read(RECORD.size * 4096)
+            if not chunk:
+                break
+            usable = len(chunk) - (len(chunk) % RECORD.size)  # Ignore a torn tail
+            for t, x, y, z in RECORD.iter_unpack(chunk[:usable]):
+                yield (t + offset_ns) / 1e9, x, y, z, scale
+
+
+def convert_to_csv(bin_path, csv_path):
+    """Render a binary log in the mpu6050_log.csv layout. Returns the row count."""
+    rows = 0
+    with open(csv_path, "w", newline="") as out:
+        writer = csv.writer(out)
+        writer.writerow(CSV_HEADER)
+        for wall, x, y, z, scale in read_records(bin_path):
+            ax, ay, az = x / scale, y / scale, z / scale
+            total_g = math.sqrt(ax * ax + ay * ay + az * az)
+            timestamp = datetime.fromtimestamp(wall).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+            writer.writerow([timestamp, f"{ax:.4f}", f"{ay:.4f}", f"{az:.4f}", f"{total_g:.4f}"])
+            rows += 1
+    return rows
+
+
+if __name__ == "__main__":
+    # Usage: python -m backend.imu_log <log.rimu> [out.csv]
+    if len(sys.argv) < 2:
+        print("Usage: python -m backend.imu_log <log.rimu> [out.csv]")
+        sys.exit(1)
+    source = sys.argv[1]
+    target = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(source)[0] + ".csv"
+    count = convert_to_csv(source, target)
+    print(f"✅ Converted {count} records to {target}")
@@ -0,0 +1,257 @@
+"""
+IMU Replay - Offline replay and benchmarking of crash detection
+Feeds recorded (CSV / binary log) or synthetic IMU streams through
+CrashDetector faster than real time, without SMBus or the Qt event loop.
+"""
+
+import os
+import csv
+import math
+import time
+import random
+import tempfile
+from datetime import datetime
+
+from backend.imu_log import read_records, HEADER, RECORD
+from backend.mpu_acquisition import FakeSMBus
+
+SCALE_DIVIDER = 2048.0  # LSB/G for the +/-16G range
+
+
+class IMUStream:
+    """A replayable sample stream with optional ground-truth crash times"""
+
+    def __init__(self, name, sample_rate_hz, duration_s, sample_factory, crash_times_s=None):
+        self.name = name
+        self.sample_rate_hz = sample_rate_hz
+        self.duration_s = duration_s
+        self.crash_times_s = list(crash_times_s or [])
+        self._sample_factory = sample_factory  # Returns an iterator of (x, y, z) raw
+
+    def batches(self, batch_size):
+        """Yield (seq of first sample, [(x, y, z), ...]) batches"""
+        batch = []
+        seq = 0
+        for sample in self._sample_factory():
+            batch.append(sample)
+            if len(batch) == batch_size:
+                yield seq, batch
+                seq += batch_size
+                batch = []
+        if batch:
+            yield seq, batch
+
+
+def csv_stream(path):
+    """Stream the Timestamp/Accel_X_G/... CSV layout written by the old logger"""
+    timestamps = []
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            try:
+                timestamps.append(datetime.strptime(row[0], "%Y-%m-%d %H:%M:%S.%f").timestamp())
+            except (ValueError, IndexError):
+                continue
+
+    # Use the median gap so pauses (app restarts) do not skew the rate
+    gaps = sorted(b - a for a, b in zip(timestamps, timestamps[1:]) if b > a)
+    period = gaps[len(gaps) // 2] if gaps else 0.05
+    rate = 1.0 / period
+    duration = len(timestamps) * period
+
+    def samples():
+        with open(path, newline='') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                try:
+                    yield (int(float(row[1]) * SCALE_DIVIDER),
+                           int(float(row[2]) * SCALE_DIVIDER),
+                           int(float(row[3]) * SCALE_DIVIDER))
+                except (ValueError, IndexError):
+                    continue
+
+    return IMUStream(os.path.basename(path), rate, duration, samples)
+
+
+def rimu_stream(path, sample_rate_hz=500):
+    """Stream a binary log written by IMULogWriter"""
+    count = max(0, (os.path.getsize(path) - HEADER.size) // RECORD.size)
+
+    def samples():
+        for _, x, y, z, _ in read_records(path):
+            yield (x, y, z)
+
+    return IMUStream(os.path.basename(path), sample_rate_hz, count / sample_rate_hz, samples)
+
+
+def synthetic_stream(duration_s=3600, sample_rate_hz=500, crashes_per_hour=4,
+                     potholes_per_hour=120, door_slams_per_hour=20, seed=1):
+    """
+    Road vibration with labelled crashes plus pothole and door-slam distractors.
+    Only crashes count as ground truth.
+    """
+    rng = random.Random(seed)
+    hours = duration_s / 3600.0
+
+    def schedule(per_hour, kind):
+        return [(rng.uniform(5, duration_s - 15), kind) for _ in range(int(round(per_hour * hours)))]
+
+    events = sorted(schedule(crashes_per_hour, 'crash') +
+                    schedule(potholes_per_hour, 'pothole') +
+                    schedule(door_slams_per_hour, 'door_slam'))
+    crash_times = [t for t, kind in events if kind == 'crash']
+
+    def profile(kind, dt, r):
+        """Extra |a| in G, dt seconds after the event start"""
+        if kind == 'crash':
+            # ~60ms half-sine up to 6-10G, then the vehicle comes to rest
+            if dt < 0.06:
+                return r * math.sin(math.pi * dt / 0.06)
+            return None
+        if kind == 'pothole':
+            return r * 0.5 if dt < 0.004 else None
+        if kind == 'door_slam':
+            return r * 0.45 if dt < 0.006 else None
+        return None
+
+    def samples():
+        local = random.Random(seed + 1)
+        period = 1.0 / sample_rate_hz
+        queue = list(events)
+        active = []
+        resting_until = -1.0
+        for i in range(int(duration_s * sample_rate_hz)):
+            t = i * period
+            while queue and queue[0][0] <= t:
+                start, kind = queue.pop(0)
+                active.append((start, kind, local.uniform(6.0, 10.0)))
+
+            # Driving vibration, or near-silence after a crash
+            noise = 0.01 if t < resting_until else 0.15
+            extra = 0.0
+            still_active = []
+            for start, kind, r in active:
+                value = profile(kind, t - start, r)
+                if value is None:
+                    if kind == 'crash':
+                        resting_until = t + 10.0
+                    continue
+                extra += value
+                still_active.append((start, kind, r))
+            active = still_active
+
+            g = 1.0 + extra
+            yield (int(local.gauss(0, noise) * SCALE_DIVIDER),
+                   int(local.gauss(0, noise) * SCALE_DIVIDER),
+                   int((g + local.gauss(0, noise)) * SCALE_DIVIDER))
+
+    name = f"synthetic-{duration_s / 60:.0f}min"
+    return IMUStream(name, sample_rate_hz, duration_s, samples, crash_times)
+
+
+class ReplayDriver:
+    """Runs a stream through a CrashDetector and collects benchmark metrics"""
+
+    def __init__(self, detector_factory, batch_size=None, match_window_s=3.0, bundle_directory=None):
+        self.detector_factory = detector_factory  # f(sample_rate_hz) -> CrashDetector
+        self.batch_size = batch_size
+        self.match_window_s = match_window_s
+        self.bundle_directory = bundle_directory  # Keep crash bundles here (default: discarded)
+
+    def run(self, stream):
+        if self.bundle_directory:
+            return self._run(stream, self.bundle_directory)
+        with tempfile.TemporaryDirectory(prefix="ricky_replay_") as directory:
+            return self._run(stream, directory)
+
+    def _run(self, stream, bundle_directory):
+        detector = self.detector_factory(stream.sample_rate_hz)
+        detector.black_box.directory = bundle_directory
+
+        rate = stream.sample_rate_hz
+        period_ns = int(1e9 / rate)
+        # Default batch = one 20ms FIFO drain
+        batch_size = self.batch_size or max(1, int(rate * 0.02))
+
+        emitted = []
+        detector.crash_detected.connect(lambda: emitted.append(True))
+
+        detections = []
+        samples_seen = 0
+
+        # Only detector time is measured; reading/generating the stream is excluded
+        wall = 0.0
+        cpu = 0.0
+        for seq, batch in stream.batches(batch_size):
+            samples_seen += len(batch)
+            timestamp_ns = (seq + len(batch) - 1) * period_ns
+            batch_end_s = samples_seen / rate
+
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+            crash_g = detector._process_batch(timestamp_ns, period_ns, batch)
+            wall += time.perf_counter() - wall_start
+            cpu += time.process_time() - cpu_start
+            # Stream time drives the detector's cooldown state machine
+            if crash_g is not None:
+                detections.append((batch_end_s, crash_g))
+
+        detector.black_box.wait_for_writes()  # Before the directory goes away
+        return self._report(stream, detector, detections, samples_seen, wall, cpu, len(emitted))
+
+    def _report(self, stream, detector, detections, samples, wall, cpu, emitted):
+        latencies = []
+        false_positives = 0
+        unmatched = list(stream.crash_times_s)
+        for detected_at, _ in detections:
+            match = next((t for t in unmatched
+                          if 0 <= detected_at - t <= self.match_window_s), None)
+            if match is None:
+                false_positives += 1
+            else:
+                unmatched.remove(match)
+                latencies.append((detected_at - match) * 1000.0)
+
+        hours = samples / stream.sample_rate_hz / 3600.0
+        latencies.sort()
+        report = {
+            'stream': stream.name,
+            'detector': "classifier" if detector.classifier else "threshold",
+            'sample_rate_hz': round(stream.sample_rate_hz, 1),
+            'samples': samples,
+            'stream_seconds': round(samples / stream.sample_rate_hz, 1),
+            'wall_seconds': round(wall, 3),
+            'speedup_x': round(samples / stream.sample_rate_hz / wall, 1) if wall else None,
+            'samples_per_sec': round(samples / wall) if wall else None,
+            'cpu_us_per_sample': round(cpu * 1e6 / samples, 3) if samples else None,
+            'detections': len(detections),
+            'signals_emitted': emitted,
+            'crashes_labelled': len(stream.crash_times_s),
+            'crashes_missed': len(unmatched),
+            'false_positives': false_positives,
+            'false_positives_per_hour': round(false_positives / hours, 2) if hours else None,
+            'secondary_impacts': len(detector.state_machine.get_secondary_events()),
+            'latency_ms_median': round(latencies[len(latencies) // 2], 1) if latencies else None,
+            'latency_ms_max': round(latencies[-1], 1) if latencies else None,
+        }
+        return report
+
+
+def make_detector_factory(threshold_g=3.0, use_classifier=True, classifier_config=None):
+    """Detector on a silent FakeSMBus (no hardware, no auto-generated samples)"""
+    from backend.crash_detector import CrashDetector
+
+    def factory(sample_rate_hz):
+        detector = CrashDetector(
+            sensitivity_g=threshold_g,
+            sample_rate_hz=sample_rate_hz,
+            bus=FakeSMBus(auto_generate=False, i2c_hz=None),
+            use_classifier=use_classifier,
+            classifier_config=classifier_config,
+            use_interrupt=False
+        )
+        return detector
+
+    return factory
@@ -0,0 +1,49 @@
+"""
+Live Decimator - Folds high-rate G-force batches into display-rate frames
+Each frame carries the min/max envelope and the last value, so short spikes
+survive decimation while the GUI thread only sees ~30 updates per second.
+"""
+
+
+class LiveDecimator:
+    def __init__(self, display_rate_hz=30.0):
+        self.set_display_rate(display_rate_hz)
+        self._frame_start_ns = None
+        self._min = None
+        self._max = None
+        self._last = None
+        self.frames_emitted = 0
+        self.batches_folded = 0
+
+    def set_display_rate(self, display_rate_hz):
+        self.display_rate_hz = display_rate_hz
+        self.frame_ns = int(1e9 / display_rate_hz)
+
+    def add(self, min_g, max_g, last_g, timestamp_ns):
+        """
+        Fold one batch into the current frame (timestamp of its newest sample).
+        Returns (min, max, last) when a frame is complete, otherwise None.
+        """
+        self.batches_folded += 1
+        if self._min is None:
+            self._min, self._max = min_g, max_g
+            if self._frame_start_ns is None:
+                self._frame_start_ns = timestamp_ns
+        else:
+            if min_g < self._min:
+                self._min = min_g
+            if max_g > self._max:
+                self._max = max_g
+        self._last = last_g
+
+        if timestamp_ns - self._frame_start_ns < self.frame_ns:
+            return None
+
+        frame = (self._min, self._max, self._last)
+        self._min = self._max = None
+        # Keep frames on a fixed grid; resync after a gap (e.g. sensor stall)
+        self._frame_start_ns += self.frame_ns
+        if timestamp_ns - self._frame_start_ns >= self.frame_ns:
+            self._frame_start_ns = timestamp_ns
+        self.frames_emitted += 1
+        return frame
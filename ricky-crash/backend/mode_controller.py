@@ -14,7 +14,7 @@ class ModeController(QObject):
     MODES = {
         'For Hire': 'Available for passengers - GPIO 23',
         'Private': 'Single passenger/group - GPIO 7',
-        'Sharing': '3 individual passengers - GPIO 8', 
+        'Sharing': 'Individual passengers per seat - GPIO 8', 
         'Waiting': 'Driver break/waiting - GPIO 18'
     }
     
@@ -71,7 +71,7 @@ class ModeController(QObject):
             
         elif new_mode == 'Sharing':
             print("👥 Sharing mode activated - GPIO 8 LOW")
-            print("   - 3 individual passenger tracking enabled")
+            print("   - Individual passenger tracking per seat enabled")
             print("   - Separate fare calculation for each passenger")
             
         elif new_mode == 'For Hire':
@@ -0,0 +1,303 @@
+"""
+MPU Acquisition - High-rate MPU6050 sampling through the on-chip FIFO
+Configures sample-rate divider, DLPF and FIFO, then drains it with block reads
+Optional data-ready interrupt on the INT pin wakes the reader only when data exists
+"""
+
+import time
+import struct
+import random
+import threading
+
+# MPU6050 Registers used by the FIFO path
+SMPLRT_DIV = 0x19
+CONFIG = 0x1A
+ACCEL_CONFIG = 0x1C
+FIFO_EN = 0x23
+INT_PIN_CFG = 0x37
+INT_ENABLE = 0x38
+INT_STATUS = 0x3A
+ACCEL_XOUT_H = 0x3B
+USER_CTRL = 0x6A
+PWR_MGMT_1 = 0x6B
+FIFO_COUNTH = 0x72
+FIFO_R_W = 0x74
+
+# Register bits
+ACCEL_FIFO_EN = 0x08
+USER_CTRL_FIFO_EN = 0x40
+USER_CTRL_FIFO_RESET = 0x04
+FIFO_OFLOW_INT = 0x10
+DATA_RDY_INT = 0x01
+LATCH_INT_EN = 0x20       # INT_PIN_CFG: hold INT high until INT_STATUS is read
+
+FIFO_SIZE = 1024          # Bytes of on-chip FIFO
+SAMPLE_BYTES = 6          # Accel X/Y/Z, big-endian int16 each
+BLOCK_READ_MAX = 30       # SMBus block reads cap at 32 bytes; keep whole samples
+GYRO_OUTPUT_RATE_HZ = 1000  # Internal rate when the DLPF is enabled
+
+_SAMPLE = struct.Struct(">hhh")
+
+
+class MPUFifoReader:
+    """Drains accelerometer samples from the MPU6050 FIFO in batches"""
+
+    def __init__(self, bus, address=0x68, sample_rate_hz=500, dlpf_cfg=1):
+        self.bus = bus
+        self.address = address
+        self.dlpf_cfg = dlpf_cfg & 0x07
+
+        # Sample Rate = Gyro Output Rate / (1 + SMPLRT_DIV)
+        divider = int(round(GYRO_OUTPUT_RATE_HZ / float(sample_rate_hz))) - 1
+        self.divider = max(0, min(255, divider))
+        self.sample_rate_hz = GYRO_OUTPUT_RATE_HZ / (1 + self.divider)
+        self.sample_period_ns = int(1e9 / self.sample_rate_hz)
+
+        self.overflow_count = 0
+        self.samples_read = 0
+
+    def configure(self):
+        """Program divider, DLPF and FIFO (accelerometer only)"""
+        self.bus.write_byte_data(self.address, SMPLRT_DIV, self.divider)
+        self.bus.write_byte_data(self.address, CONFIG, self.dlpf_cfg)
+        self.bus.write_byte_data(self.address, FIFO_EN, ACCEL_FIFO_EN)
+        self.reset_fifo()
+
+    def enable_interrupt(self):
+        """
+        Active-high data-ready interrupt as a 50 us pulse per sample (the
+        MPU6050 has no FIFO watermark interrupt). Not latched: a latched line
+        that goes high again while read_batch() drains the FIFO never gives
+        the next wait a rising edge. A pulse missed between waits only delays
+        the reader to the next sample.
+        """
+        self.bus.write_byte_data(self.address, INT_PIN_CFG, 0x00)
+        self.bus.write_byte_data(self.address, INT_ENABLE, DATA_RDY_INT | FIFO_OFLOW_INT)
+
+    def reset_fifo(self):
+        """Flush the FIFO and re-enable it"""
+        self.bus.write_byte_data(self.address, USER_CTRL, USER_CTRL_FIFO_RESET)
+        self.bus.write_byte_data(self.address, USER_CTRL, USER_CTRL_FIFO_EN)
+
+    def fifo_count(self):
+        """Number of bytes currently waiting in the FIFO"""
+        high, low = self.bus.read_i2c_block_data(self.address, FIFO_COUNTH, 2)
+        return (high << 8) | low
+
+    def read_batch(self):
+        """
+        Drain all complete samples from the FIFO.
+        Returns (timestamp_ns of the newest sample, [(x, y, z), ...]) in raw counts.
+        """
+        status = self.bus.read_byte_data(self.address, INT_STATUS)
+        if status & FIFO_OFLOW_INT:
+            # Data is no longer contiguous - drop it and start clean
+            self.overflow_count += 1
+            self.reset_fifo()
+            return time.monotonic_ns(), []
+
+        count = self.fifo_count()
+        timestamp_ns = time.monotonic_ns()
+        to_read = count - (count % SAMPLE_BYTES)
+        if to_read <= 0:
+            return timestamp_ns, []
+
+        data = bytearray()
+        while to_read > 0:
+            chunk = min(BLOCK_READ_MAX, to_read)
+            data += bytes(self.bus.read_i2c_block_data(self.address, FIFO_R_W, chunk))
+            to_read -= chunk
+
+        samples = list(_SAMPLE.iter_unpack(data))
+        self.samples_read += len(samples)
+        return timestamp_ns, samples
+
+
+class GPIOEdgeSource:
+    """Blocks on rising edges of the MPU INT pin (kernel edge detection, no polling)"""
+
+    def __init__(self, pin, gpio):
+        self.pin = pin
+        self.gpio = gpio
+        self.gpio.setmode(self.gpio.BCM)
+        self.gpio.setup(self.pin, self.gpio.IN, pull_up_down=self.gpio.PUD_DOWN)
+
+    def wait(self, timeout):
+        """Returns the edge time in monotonic ns, or None on timeout"""
+        channel = self.gpio.wait_for_edge(self.pin, self.gpio.RISING, timeout=int(timeout * 1000))
+        if channel is None:
+            return None
+        return time.monotonic_ns()
+
+    def close(self):
+        try:
+            self.gpio.cleanup(self.pin)
+        except Exception:
+            pass
+
+
+class SimulatedEdgeSource:
+    """
+    Stand-in for the INT pin. Driven by a FakeSMBus it only reports rising
+    edges a real edge detector would see: in pulse mode the next sample's
+    pulse; with LATCH_INT_EN a line that is already high gives no edge until
+    INT_STATUS is read, so the wait times out. Without a bus it only wakes
+    when fire() is called.
+    """
+
+    def __init__(self, bus=None):
+        self.bus = bus
+        self._event = threading.Event()
+        self.edges = 0
+
+    def fire(self):
+        """Raise the INT line manually"""
+        self._event.set()
+
+    def wait(self, timeout):
+        if self.bus is None or not self.bus.auto_generate:
+            if not self._event.wait(timeout):
+                return None
+            self._event.clear()
+            self.edges += 1
+            return time.monotonic_ns()
+
+        with self.bus.lock:
+            self.bus._generate()
+            latched = (self.bus.registers[INT_PIN_CFG] & LATCH_INT_EN and
+                       self.bus.registers[INT_STATUS] & DATA_RDY_INT)
+            delay = (1.0 - self.bus._pending) / self.bus.sample_rate_hz()
+
+        if latched or delay > timeout:
+            time.sleep(timeout)
+            return None
+        time.sleep(delay)
+        self.edges += 1
+        return time.monotonic_ns()
+
+    def close(self):
+        self._event.set()
+
+
+class FakeSMBus:
+    """
+    Software MPU6050 for running the acquisition path without hardware.
+    Samples are produced at the configured rate from `signal(t)` or pushed directly.
+    Each transaction takes as long as it would on an i2c_hz bus (None: instant),
+    so samples keep arriving while the FIFO is drained, as on the real sensor.
+    """
+
+    def __init__(self, signal=None, clock=time.monotonic, auto_generate=True, i2c_hz=400000):
+        self.registers = bytearray(128)
+        self.fifo = bytearray()
+        self.signal = signal or self._gravity_with_noise
+        self.clock = clock
+        self.auto_generate = auto_generate
+        self.i2c_hz = i2c_hz
+        self.lock = threading.Lock()
+
+        self._last_generated = clock()
+        self._pending = 0.0
+        self._sample_index = 0
+        self.latest = (0, 0, 2048)
+        self.block_reads = 0
+
+    @staticmethod
+    def _gravity_with_noise(t):
+        return (
+            int(random.gauss(0, 20)),
+            int(random.gauss(0, 20)),
+            int(2048 + random.gauss(0, 20)),
+        )
+
+    def _fifo_enabled(self):
+        return (self.registers[USER_CTRL] & USER_CTRL_FIFO_EN and
+                self.registers[FIFO_EN] & ACCEL_FIFO_EN)
+
+    def sample_rate_hz(self):
+        dlpf = self.registers[CONFIG] & 0x07
+        base = GYRO_OUTPUT_RATE_HZ if dlpf not in (0, 7) else 8000
+        # Accelerometer output is limited to 1 kHz regardless of the gyro rate
+        return min(1000.0, base / (1 + self.registers[SMPLRT_DIV]))
+
+    def push_samples(self, samples):
+        """Queue raw (x, y, z) samples as if the sensor had produced them"""
+        with self.lock:
+            for sample in samples:
+                self._store(sample)
+
+    def _store(self, sample):
+        self.latest = sample
+        self.registers[INT_STATUS] |= DATA_RDY_INT
+        if not self._fifo_enabled():
+            return
+        if len(self.fifo) + SAMPLE_BYTES > FIFO_SIZE:
+            self.registers[INT_STATUS] |= FIFO_OFLOW_INT
+            return
+        self.fifo += _SAMPLE.pack(*sample)
+
+    def _generate(self):
+        now = self.clock()
+        elapsed = now - self._last_generated
+        self._last_generated = now
+        if not self.auto_generate or elapsed <= 0:
+            return
+        rate = self.sample_rate_hz()
+        self._pending += elapsed * rate
+        count = int(self._pending)
+        self._pending -= count
+        for _ in range(count):
+            t = self._sample_index / rate
+            self._sample_index += 1
+            self._store(self.signal(t))
+
+    def _transfer(self, data_bytes):
+        """Bus time of one transaction: address, register, (address), data - 9 bits a byte"""
+        if self.i2c_hz:
+            time.sleep((3 + data_bytes) * 9 / self.i2c_hz)
+
+    # --- SMBus interface ---
+
+    def write_byte_data(self, addr, register, value):
+        self._transfer(1)
+        with self.lock:
+            self._generate()
+            if register == USER_CTRL and value & USER_CTRL_FIFO_RESET:
+                self.fifo = bytearray()
+                self.registers[INT_STATUS] &= ~FIFO_OFLOW_INT & 0xFF
+                value &= ~USER_CTRL_FIFO_RESET & 0xFF
+            self.registers[register] = value & 0xFF
+
+    def read_byte_data(self, addr, register):
+        self._transfer(1)
+        with self.lock:
+            self._generate()
+            value = self._read_register(register)
+            if register == INT_STATUS:
+                # INT_STATUS clears on read
+                self.registers[INT_STATUS] = 0
+            return value
+
+    def read_i2c_block_data(self, addr, register, length):
+        self._transfer(length)
+        with self.lock:
+            self._generate()
+            self.block_reads += 1
+            if register == FIFO_R_W:
+                data = self.fifo[:length]
+                del self.fifo[:length]
+                return list(data) + [0] * (length - len(data))
+            if register == ACCEL_XOUT_H:
+                raw = list(_SAMPLE.pack(*self.latest))
+                return (raw + [0] * length)[:length]
+            return [self._read_register(register + i) for i in range(length)]
+
+    def _read_register(self, register):
+        if register == FIFO_COUNTH:
+            return (len(self.fifo) >> 8) & 0xFF
+        if register == FIFO_COUNTH + 1:
+            return len(self.fifo) & 0xFF
+        return self.registers[register]
+
+    def close(self):
+        pass
@@ -0,0 +1,263 @@
+"""
+NMEA Parser - Incremental, checksum-validated NMEA 0183 stream parser
+Serial chunks are appended to one reusable bytearray; sentence boundaries and
+checksums are handled on memoryview slices, and GGA/RMC/VTG/GSA/GSV are decoded
+for any talker ID ($GP, $GN, $GL, $GA, $BD...).
+"""
+
+MAX_SENTENCE = 120  # NMEA allows 82 bytes; leave room for vendor extensions
+KNOTS_TO_KMH = 1.852
+
+_HEX = b"0123456789ABCDEF"
+
+
+def nmea_checksum(body):
+    """XOR of all bytes between '$' and '*' (bytes, bytearray or memoryview)"""
+    # Fold the sentence as one integer: XOR the high half onto the low half
+    # until a single byte remains. Much faster than a per-byte Python loop.
+    value = int.from_bytes(body, 'little')
+    size = len(body)
+    while size > 1:
+        half = (size + 1) // 2
+        value = (value & ((1 << (half * 8)) - 1)) ^ (value >> (half * 8))
+        size = half
+    return value
+
+
+def build_sentence(body):
+    """'GPGGA,...' -> b'$GPGGA,...*hh\\r\\n' (used by simulators and tests)"""
+    if isinstance(body, str):
+        body = body.encode('ascii')
+    checksum = nmea_checksum(body)
+    return b"$" + body + b"*" + bytes((_HEX[checksum >> 4], _HEX[checksum & 0x0F])) + b"\r\n"
+
+
+def _degrees(raw, hemisphere):
+    """ddmm.mmmm / dddmm.mmmm -> signed decimal degrees"""
+    dot = raw.find(b".")
+    if dot < 0:
+        dot = len(raw)
+    value = float(raw[:dot - 2]) + float(raw[dot - 2:]) / 60.0
+    return -value if hemisphere in (b"S", b"W") else value
+
+
+def _float(field, default=None):
+    return float(field) if field else default
+
+
+def _int(field, default=None):
+    return int(field) if field else default
+
+
+def _time(field):
+    """hhmmss.ss -> seconds since midnight UTC"""
+    if len(field) < 6:
+        return None
+    return int(field[0:2]) * 3600 + int(field[2:4]) * 60 + float(field[4:])
+
+
+def _parse_gga(f):
+    if len(f) < 14:
+        return None
+    quality = _int(f[6], 0)
+    fix = {
+        'time': _time(f[1]),
+        'quality': quality,
+        'satellites': _int(f[7], 0),
+        'hdop': _float(f[8]),
+        'altitude': _float(f[9], 0.0),
+    }
+    if quality and f[2] and f[4]:
+        fix['lat'] = _degrees(f[2], f[3])
+        fix['lon'] = _degrees(f[4], f[5])
+    return fix
+
+
+def _parse_rmc(f):
+    if len(f) < 10:
+        return None
+    fix = {
+        'time': _time(f[1]),
+        'valid': f[2] == b"A",
+        'speed_kmh': _float(f[7], 0.0) * KNOTS_TO_KMH,
+        'course': _float(f[8]),
+        'date': f[9].decode('ascii'),
+    }
+    if fix['valid'] and f[3] and f[5]:
+        fix['lat'] = _degrees(f[3], f[4])
+        fix['lon'] = _degrees(f[5], f[6])
+    return fix
+
+
+def _parse_vtg(f):
+    if len(f) < 8:
+        return None
+    speed = _float(f[7])
+    if speed is None and f[5]:
+        speed = float(f[5]) * KNOTS_TO_KMH
+    return {'course': _float(f[1]), 'speed_kmh': speed}
+
+
+def _parse_gsa(f):
+    if len(f) < 18:
+        return None
+    return {
+        'fix_type': _int(f[2], 1),  # 1 = none, 2 = 2D, 3 = 3D
+        'used': [int(prn) for prn in f[3:15] if prn],
+        'pdop': _float(f[15]),
+        'hdop': _float(f[16]),
+        'vdop': _float(f[17]),
+    }
+
+
+def _parse_gsv(f):
+    if len(f) < 4:
+        return None
+    satellites = []
+    for i in range(4, len(f) - 3, 4):
+        if f[i]:
+            satellites.append((int(f[i]), _int(f[i + 1]), _int(f[i + 2]), _int(f[i + 3])))
+    return {
+        'messages': _int(f[1], 1),
+        'number': _int(f[2], 1),
+        'in_view': _int(f[3], 0),
+        'satellites': satellites,  # (prn, elevation, azimuth, snr)
+    }
+
+
+PARSERS = {
+    b"GGA": _parse_gga,
+    b"RMC": _parse_rmc,
+    b"VTG": _parse_vtg,
+    b"GSA": _parse_gsa,
+    b"GSV": _parse_gsv,
+}
+
+
+class NMEAStreamParser:
+    """
+    Feed raw serial bytes in any chunking; get back decoded sentences as dicts
+    with 'type' (GGA/RMC/...) and 'talker' (GP/GN/...) plus the message fields.
+    """
+
+    def __init__(self, buffer_size=4096, types=None):
+        self._buf = bytearray(buffer_size)
+        self._view = memoryview(self._buf)
+        self._len = 0
+        self.parsers = {t: PARSERS[t] for t in (types or PARSERS)}
+
+        # Stats
+        self.bytes_in = 0
+        self.sentences = 0
+        self.checksum_errors = 0
+        self.malformed = 0
+        self.ignored = 0
+        self.dropped_bytes = 0
+
+    def read_from(self, port):
+        """Read whatever the serial port has (at least one byte, honouring its timeout)"""
+        data = port.read(max(1, getattr(port, 'in_waiting', 0)))
+        return self.feed(data) if data else []
+
+    def feed(self, data):
+        """Append a chunk and return the list of complete, valid sentences in it"""
+        n = len(data)
+        self.bytes_in += n
+        if self._len + n > len(self._buf):
+            # Oversized chunk: grow once (the pending tail is at most one sentence)
+            self._view.release()
+            self._buf.extend(bytes(self._len + n - len(self._buf)))
+            self._view = memoryview(self._buf)
+        self._view[self._len:self._len + n] = data
+        self._len += n
+        return self._scan()
+
+    def _scan(self):
+        buf = self._buf
+        view = self._view
+        end = self._len
+        pos = 0
+        out = []
+
+        while True:
+            start = buf.find(b"$", pos, end)
+            if start < 0:
+                self.dropped_bytes += end - pos
+                pos = end
+                break
+            self.dropped_bytes += start - pos
+            eol = buf.find(b"\n", start, end)
+            if eol < 0:
+                if end - start > MAX_SENTENCE:
+                    # No terminator in sight: resync on the next '$'
+                    self.malformed += 1
+                    pos = start + 1
+                    continue
+                pos = start
+                break
+            pos = eol + 1
+
+            # A '$' inside the line means the previous sentence was cut off
+            restart = buf.rfind(b"$", start + 1, eol)
+            if restart >= 0:
+                self.malformed += 1
+                start = restart
+
+            message = self._decode(view[start + 1:eol])
+            if message is not None:
+                out.append(message)
+
+        # Keep only the unterminated tail, moved to the front
+        remaining = end - pos
+        if remaining and pos:
+            view[:remaining] = view[pos:end]
+        self._len = remaining
+        return out
+
+    def _decode(self, line):
+        """line = memoryview of 'GPGGA,...*hh[\\r]'"""
+        length = len(line)
+        if length and line[length - 1] == 0x0D:
+            length -= 1
+        star = length - 3
+        if star < 5 or line[star] != 0x2A:  # '*'
+            self.malformed += 1
+            return None
+        try:
+            expected = int(bytes(line[star + 1:length]), 16)
+        except ValueError:
+            self.malformed += 1
+            return None
+        body = line[:star]
+
+        # Unwanted types are skipped before paying for the checksum
+        parser = None if body[0] == 0x50 else self.parsers.get(bytes(body[2:5]))  # 'P' = proprietary
+        if parser is None:
+            self.ignored += 1
+            return None
+        if nmea_checksum(body) != expected:
+            self.checksum_errors += 1
+            return None
+
+        fields = bytes(body).split(b",")
+        try:
+            message = parser(fields)
+        except (ValueError, IndexError):
+            message = None
+        if message is None:
+            self.malformed += 1
+            return None
+        message['type'] = fields[0][2:].decode('ascii')
+        message['talker'] = fields[0][:2].decode('ascii')
+        self.sentences += 1
+        return message
+
+    def get_stats(self):
+        return {
+            'bytes_in': self.bytes_in,
+            'sentences': self.sentences,
+            'checksum_errors': self.checksum_errors,
+            'malformed': self.malformed,
+            'ignored': self.ignored,
+            'dropped_bytes': self.dropped_bytes,
+        }
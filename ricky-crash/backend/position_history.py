@@ -0,0 +1,156 @@
+"""
+Position History - Where was the vehicle at time t?
+A bounded ring of timestamped fixes in parallel array('d') columns (monotonic
+seconds, lat, lon, speed). Lookups binary-search the ring (O(log n)) and
+interpolate linearly or along the great circle between the two neighbouring
+fixes; at_many() geotags thousands of timestamps in one vectorized call.
+"""
+
+import threading
+from array import array
+
+from backend import geodesy
+from backend.geodesy import NUMPY_AVAILABLE
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+LINEAR = "linear"
+GREAT_CIRCLE = "great_circle"
+
+
+class PositionHistory:
+    def __init__(self, capacity=36000, max_gap_s=10.0, max_extrapolate_s=1.0):
+        self.capacity = capacity                    # 36000 = 2 h at 5 Hz
+        self.max_gap_s = max_gap_s                  # Don't interpolate across GPS outages
+        self.max_extrapolate_s = max_extrapolate_s  # Tolerance outside the covered span
+
+        # Preallocated ring columns (8 bytes per value)
+        zeros = bytes(8 * capacity)
+        self.t = array('d', zeros)
+        self.lat = array('d', zeros)
+        self.lon = array('d', zeros)
+        self.speed = array('d', zeros)
+        self.start = 0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def append(self, timestamp, lat, lon, speed=0.0):
+        """Add a fix; timestamps must increase (older or repeated ones are ignored)"""
+        with self.lock:
+            if self.count and timestamp <= self.t[(self.start + self.count - 1) % self.capacity]:
+                return False
+            i = (self.start + self.count) % self.capacity
+            if self.count == self.capacity:
+                self.start = (self.start + 1) % self.capacity  # Overwrite the oldest
+            else:
+                self.count += 1
+            self.t[i] = timestamp
+            self.lat[i] = lat
+            self.lon[i] = lon
+            self.speed[i] = speed
+            return True
+
+    def clear(self):
+        with self.lock:
+            self.start = self.count = 0
+
+    def span(self):
+        """(oldest, newest) timestamp, or None when empty"""
+        with self.lock:
+            if not self.count:
+                return None
+            return self.t[self.start], self.t[(self.start + self.count - 1) % self.capacity]
+
+    def _search(self, timestamp):
+        """Logical index of the first fix at or after timestamp (bisect over the ring)"""
+        t, start, capacity = self.t, self.start, self.capacity
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            if t[(start + mid) % capacity] < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def at(self, timestamp, method=LINEAR):
+        """(lat, lon) at a monotonic timestamp, or None if the history doesn't cover it"""
+        with self.lock:
+            n = self.count
+            if not n:
+                return None
+            k = self._search(timestamp)
+            capacity = self.capacity
+            if k == n:
+                i = (self.start + n - 1) % capacity
+                if timestamp - self.t[i] > self.max_extrapolate_s:
+                    return None
+                return self.lat[i], self.lon[i]
+            b = (self.start + k) % capacity
+            tb = self.t[b]
+            if tb == timestamp:
+                return self.lat[b], self.lon[b]
+            if k == 0:
+                if tb - timestamp > self.max_extrapolate_s:
+                    return None
+                return self.lat[b], self.lon[b]
+            a = (self.start + k - 1) % capacity
+            ta = self.t[a]
+            if tb - ta > self.max_gap_s:
+                return None
+            fraction = (timestamp - ta) / (tb - ta)
+            lat1, lon1, lat2, lon2 = self.lat[a], self.lon[a], self.lat[b], self.lon[b]
+
+        if method == GREAT_CIRCLE:
+            return geodesy.intermediate_point(lat1, lon1, lat2, lon2, fraction)
+        return lat1 + (lat2 - lat1) * fraction, lon1 + (lon2 - lon1) * fraction
+
+    def _ordered(self, column):
+        """Copy of a ring column, oldest first"""
+        view = np.frombuffer(column, dtype=np.float64)
+        end = self.start + self.count
+        if end <= self.capacity:
+            return view[self.start:end].copy()
+        return np.concatenate((view[self.start:], view[:end - self.capacity]))
+
+    def at_many(self, timestamps, method=LINEAR):
+        """
+        Geotag many timestamps at once. Returns (lats, lons): NumPy arrays with
+        NaN where the history has no position, or lists with None without NumPy.
+        """
+        if not NUMPY_AVAILABLE:
+            points = [self.at(ts, method) for ts in timestamps]
+            return ([p[0] if p else None for p in points],
+                    [p[1] if p else None for p in points])
+
+        q = np.asarray(timestamps, dtype=np.float64)
+        with self.lock:
+            n = self.count
+            if not n:
+                return np.full(q.shape, np.nan), np.full(q.shape, np.nan)
+            t = self._ordered(self.t)
+            lat = self._ordered(self.lat)
+            lon = self._ordered(self.lon)
+
+        if n == 1:
+            valid = np.abs(q - t[0]) <= self.max_extrapolate_s
+            return np.where(valid, lat[0], np.nan), np.where(valid, lon[0], np.nan)
+
+        b = np.clip(np.searchsorted(t, q, side='left'), 1, n - 1)
+        a = b - 1
+        ta, tb = t[a], t[b]
+        fraction = np.clip((q - ta) / (tb - ta), 0.0, 1.0)
+        if method == GREAT_CIRCLE:
+            out_lat, out_lon = geodesy.intermediate_points(lat[a], lon[a], lat[b], lon[b], fraction)
+        else:
+            out_lat = lat[a] + (lat[b] - lat[a]) * fraction
+            out_lon = lon[a] + (lon[b] - lon[a]) * fraction
+
+        valid = ((q >= t[0] - self.max_extrapolate_s) & (q <= t[-1] + self.max_extrapolate_s)
+                 & ((tb - ta <= self.max_gap_s) | (q == ta) | (q == tb)
+                    | (q < t[0]) | (q > t[-1])))
+        return np.where(valid, out_lat, np.nan), np.where(valid, out_lon, np.nan)
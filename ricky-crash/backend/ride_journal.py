@@ -0,0 +1,290 @@
+"""
+Ride Journal - Crash-safe, append-only log of ride lifecycle events
+Each record is a compact JSON event framed by its length and CRC32, so a write
+torn by a power cut is detected and dropped on replay. The fare thread only
+adds records to an in-memory batch; a writer thread writes and fsyncs the
+batch every sync_interval (at once for boarding, alighting and completed
+fares), so the SD card sees a few small writes a minute while riding and none
+while idle. replay() folds the file into the open rides and the fares not yet
+delivered to the backend in one pass; the file is then compacted to just that
+state, so it stays small.
+
+Events ('e'):
+    board          seat, ride, tariff spec, start time, location, odometer
+    private_start  ride, tariff spec, start time, location, odometer
+    checkpoint     odometer, per-seat [seat, fare, distance, distance fare, waiting s],
+                   private [fare, distance, distance fare, waiting s]
+    alight         seat, ride
+    private_stop   ride
+    completed      passenger id, ride_data (the ride_completed payload)
+    delivered      ride (the backend accepted it)
+"""
+
+import os
+import json
+import time
+import zlib
+import struct
+import threading
+from datetime import datetime
+
+# File header: magic, version
+HEADER = struct.Struct("<4sH")
+MAGIC = b"RJNL"
+VERSION = 1
+
+# Record: payload length, CRC32 of the payload; then the JSON payload
+RECORD = struct.Struct("<II")
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Not serializable: {type(value).__name__}")
+
+
+def _frame(record):
+    payload = json.dumps(record, separators=(',', ':'), default=_json_default).encode('utf-8')
+    return RECORD.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def new_state():
+    return {
+        'odometer_km': 0.0,
+        'seats': {},          # seat -> board record with its latest progress
+        'private': None,      # private_start record with its latest progress
+        'undelivered': {},    # ride_id -> completed record
+    }
+
+
+def apply(state, record):
+    """Fold one event into the replay state"""
+    event = record.get('e')
+    if event == 'board':
+        state['seats'][record['seat']] = record
+        state['odometer_km'] = record['odo']
+    elif event == 'alight':
+        ride = state['seats'].get(record['seat'])
+        if ride and ride['ride'] == record['ride']:
+            del state['seats'][record['seat']]
+    elif event == 'private_start':
+        state['private'] = record
+        state['odometer_km'] = record['odo']
+    elif event == 'private_stop':
+        if state['private'] and state['private']['ride'] == record['ride']:
+            state['private'] = None
+    elif event == 'checkpoint':
+        state['odometer_km'] = record['odo']
+        for seat, fare, distance, distance_fare, waiting_s in record.get('seats', ()):
+            ride = state['seats'].get(seat)
+            if ride:
+                ride.update(fare=fare, distance=distance, distance_fare=distance_fare,
+                            waiting_s=waiting_s)
+        private = record.get('private')
+        if private and state['private']:
+            state['private'].update(zip(('fare', 'distance', 'distance_fare', 'waiting_s'), private))
+    elif event == 'completed':
+        state['undelivered'][record['data']['ride_id']] = record
+    elif event == 'delivered':
+        state['undelivered'].pop(record['ride'], None)
+
+
+def snapshot(state):
+    """The fewest records that replay to `state`"""
+    records = [state['seats'][seat] for seat in sorted(state['seats'])]
+    if state['private']:
+        records.append(state['private'])
+    records.extend(state['undelivered'].values())
+    # Last: boarding records carry the odometer of their own time
+    records.append({'e': 'checkpoint', 'odo': state['odometer_km']})
+    return records
+
+
+class RideJournal:
+    def __init__(self, path, sync_interval=10.0, max_bytes=256 * 1024):
+        self.path = path
+        self.sync_interval = sync_interval  # Seconds between batched write + fsync
+        self.max_bytes = max_bytes          # Compact the file beyond this size
+
+        self._state = new_state()
+        self._pending = bytearray()
+        self._urgent = False
+        self._cond = threading.Condition()
+        self._thread = None
+        self.running = False
+
+        self._file = None
+        self._file_bytes = 0
+
+        # Stats
+        self.records_written = 0
+        self.syncs = 0
+        self.compactions = 0
+        self.last_replay = None
+
+    # --- Startup ---
+
+    def replay(self):
+        """
+        Read the journal and return the replay state (see new_state()). A torn
+        or corrupt tail is dropped; the file is rewritten as a compact snapshot.
+        """
+        started = time.perf_counter()
+        state = new_state()
+        records = 0
+        torn = 0
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = None
+
+        if data is not None:
+            if len(data) < HEADER.size or HEADER.unpack_from(data)[0] != MAGIC:
+                print(f"⚠️ Ride journal unreadable, keeping it as {self.path}.bad")
+                os.replace(self.path, self.path + ".bad")
+            else:
+                offset = HEADER.size
+                while offset + RECORD.size <= len(data):
+                    length, crc = RECORD.unpack_from(data, offset)
+                    start = offset + RECORD.size
+                    payload = data[start:start + length]
+                    if len(payload) < length or zlib.crc32(payload) != crc:
+                        break  # Torn by a power cut (or corrupt): nothing after it is trusted
+                    try:
+                        apply(state, json.loads(payload))
+                    except (ValueError, KeyError, TypeError):
+                        break
+                    records += 1
+                    offset = start + length
+                torn = len(data) - offset
+
+        with self._cond:
+            self._state = state
+            self._rewrite(snapshot(state))
+        self.last_replay = {
+            'records': records,
+            'torn_bytes': torn,
+            'open_rides': len(state['seats']) + (1 if state['private'] else 0),
+            'undelivered': len(state['undelivered']),
+            'ms': round((time.perf_counter() - started) * 1000.0, 2),
+        }
+        if torn:
+            print(f"⚠️ Ride journal: dropped {torn} bytes of a torn write")
+        print(f"📒 Ride journal replayed: {records} records, "
+              f"{self.last_replay['open_rides']} open rides, "
+              f"{self.last_replay['undelivered']} undelivered fares "
+              f"({self.last_replay['ms']} ms)")
+        return state
+
+    def start(self):
+        """Start the writer thread (call after replay())"""
+        if self.last_replay is None:
+            self.replay()  # Never start appending over a journal that was not read
+        self.running = True
+        self._thread = threading.Thread(target=self._writer_loop, name="ride_journal", daemon=True)
+        self._thread.start()
+
+    # --- Any thread ---
+
+    def append(self, record, urgent=False):
+        """
+        Add an event to the next batch. Never touches the disk; urgent events
+        (ride boundaries) wake the writer for an immediate write + fsync.
+        """
+        frame = _frame(record)
+        with self._cond:
+            apply(self._state, record)
+            self._pending += frame
+            self.records_written += 1
+            if urgent:
+                self._urgent = True
+                self._cond.notify()
+
+    # --- Writer thread ---
+
+    def _writer_loop(self):
+        while True:
+            with self._cond:
+                if self.running and not self._urgent:
+                    self._cond.wait(self.sync_interval)
+                self._urgent = False
+                chunk, self._pending = self._pending, bytearray()
+                stopping = not self.running
+            if chunk:
+                try:
+                    self._write(chunk)
+                except Exception as e:
+                    print(f"❌ Ride journal write error: {e}")
+            if stopping:
+                break
+        self._close_file()
+
+    def _write(self, chunk):
+        self._file.write(chunk)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file_bytes += len(chunk)
+        self.syncs += 1
+        if self._file_bytes > self.max_bytes:
+            with self._cond:
+                # The state already includes the pending batch; it is in the snapshot
+                self._pending = bytearray()
+                self._rewrite(snapshot(self._state))
+            self.compactions += 1
+
+    def _rewrite(self, records):
+        """Atomically replace the journal with `records` and reopen it for appending"""
+        self._close_file()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        data = bytearray(HEADER.pack(MAGIC, VERSION))
+        for record in records:
+            data += _frame(record)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        if directory:
+            fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(fd)  # Make the rename itself survive a power cut
+            finally:
+                os.close(fd)
+        self._file = open(self.path, "ab")
+        self._file_bytes = len(data)
+
+    def _close_file(self):
+        if self._file:
+            try:
+                self._file.close()
+            except Exception as e:
+                print(f"⚠️ Ride journal close error: {e}")
+            self._file = None
+
+    def stop(self):
+        """Write and fsync whatever is batched, then close"""
+        with self._cond:
+            self.running = False
+            self._cond.notify()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=5)
+        elif self._file:
+            # Writer never started: write the batch from here
+            chunk, self._pending = self._pending, bytearray()
+            if chunk:
+                self._write(chunk)
+            self._close_file()
+
+    def get_status(self):
+        return {
+            'path': self.path,
+            'bytes': self._file_bytes,
+            'records_written': self.records_written,
+            'syncs': self.syncs,
+            'compactions': self.compactions,
+            'last_replay': self.last_replay,
+        }
@@ -0,0 +1,274 @@
+"""
+Route Simulator - Synthetic GPS fixes along a recorded or drawn route
+Loads a GPX track/route or a CSV polyline and drives it with a speed profile
+(cruise speed, acceleration/braking limits, slowing for corners, timed stops),
+then adds a receiver-like error model (correlated position drift, occasional
+multipath jumps, speed noise). Fixes are generated in simulated time, so a
+consumer can replay them in real time or at any multiplier.
+"""
+
+import os
+import sys
+import csv
+import math
+import bisect
+import random
+import xml.etree.ElementTree as ET
+
+from backend import geodesy
+
+# The loop the old simulator drove around (Mumbai)
+DEFAULT_ROUTE = [
+    (19.0760, 72.8777),
+    (19.0800, 72.8800),
+    (19.0850, 72.8750),
+    (19.0820, 72.8720),
+    (19.0790, 72.8760),
+]
+
+_M_PER_DEG = 111320.0
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def load_gpx(path):
+    """Points of the first track (or route, or waypoints) of a GPX file"""
+    root = ET.parse(path).getroot()
+    for wanted in ("trkpt", "rtept", "wpt"):
+        points = [(float(el.get('lat')), float(el.get('lon')))
+                  for el in root.iter() if _local_name(el.tag) == wanted]
+        if points:
+            return points, None
+    raise ValueError(f"No track points in {path}")
+
+
+def load_csv(path):
+    """
+    lat,lon[,speed_kmh] rows; a header naming the columns (lat/latitude,
+    lon/lng/longitude, speed/speed_kmh) is optional
+    """
+    with open(path, newline="") as f:
+        rows = [row for row in csv.reader(f) if row and not row[0].startswith('#')]
+    if not rows:
+        raise ValueError(f"Empty route file: {path}")
+
+    lat_col, lon_col, speed_col = 0, 1, 2
+    try:
+        float(rows[0][0])
+    except ValueError:
+        header = [name.strip().lower() for name in rows.pop(0)]
+        find = lambda *names: next((header.index(n) for n in names if n in header), None)
+        lat_col = find("lat", "latitude")
+        lon_col = find("lon", "lng", "long", "longitude")
+        speed_col = find("speed", "speed_kmh")
+        if lat_col is None or lon_col is None:
+            raise ValueError(f"No lat/lon columns in {path}")
+
+    points, speeds = [], []
+    for row in rows:
+        points.append((float(row[lat_col]), float(row[lon_col])))
+        has_speed = speed_col is not None and speed_col < len(row) and row[speed_col].strip()
+        speeds.append(float(row[speed_col]) if has_speed else None)
+    return points, speeds if any(s is not None for s in speeds) else None
+
+
+def load_route(path):
+    """(points, per-point speed limits or None) from a .gpx or .csv file"""
+    if os.path.splitext(path)[1].lower() == ".gpx":
+        return load_gpx(path)
+    return load_csv(path)
+
+
+class RouteSimulator:
+    def __init__(self, route=None, speeds=None, speed_kmh=25.0, accel_ms2=1.0, decel_ms2=2.0,
+                 corner_speed_kmh=12.0, corner_deg=45.0, stops=(), stop_every_km=None,
+                 stop_s=30.0, noise_m=3.0, noise_tau_s=20.0, speed_noise_kmh=0.5,
+                 outlier_rate=0.0, fix_rate_hz=1.0, duration_s=None, loop=True, seed=None):
+        if isinstance(route, str):
+            route, file_speeds = load_route(route)
+            speeds = speeds or file_speeds
+        self.route = list(route or DEFAULT_ROUTE)
+        if len(self.route) < 2:
+            raise ValueError("A route needs at least two points")
+        self.loop = loop
+        if loop and self.route[0] != self.route[-1]:
+            self.route.append(self.route[0])  # Drive back to the start
+            if speeds:
+                speeds = list(speeds) + [speeds[0]]
+
+        # Speed profile
+        self.speed_ms = speed_kmh / 3.6
+        self.accel = accel_ms2
+        self.decel = decel_ms2
+        self.corner_speed_ms = corner_speed_kmh / 3.6
+        self.corner_deg = corner_deg
+        self.segment_speeds = [None if s is None else s / 3.6 for s in speeds] if speeds else None
+
+        # Error model
+        self.noise_m = noise_m
+        self.noise_tau_s = noise_tau_s
+        self.speed_noise_kmh = speed_noise_kmh
+        self.outlier_rate = outlier_rate
+
+        self.fix_rate_hz = fix_rate_hz
+        self.duration_s = duration_s
+        self.rng = random.Random(seed)
+
+        lats = [p[0] for p in self.route]
+        lons = [p[1] for p in self.route]
+        self.cumulative_m = [float(d) * 1000.0 for d in geodesy.cumulative_distance_km(lats, lons)]
+        self.length_m = self.cumulative_m[-1]
+        self.bearings = [float(b) for b in geodesy.segment_bearings_deg(lats, lons)]
+        self.constraints = self._constraints(stops, stop_every_km, stop_s)
+
+    def _constraints(self, stops, stop_every_km, stop_s):
+        """(distance m, speed limit m/s, dwell s) points along one lap, sorted"""
+        constraints = []
+        for i in range(1, len(self.route) - 1):
+            turn = abs((self.bearings[i] - self.bearings[i - 1] + 180.0) % 360.0 - 180.0)
+            if turn >= self.corner_deg:
+                constraints.append((self.cumulative_m[i], self.corner_speed_ms, 0.0))
+        for stop in stops:
+            distance_km, dwell = stop if isinstance(stop, (tuple, list)) else (stop, stop_s)
+            constraints.append((distance_km * 1000.0, 0.0, dwell))
+        if stop_every_km:
+            distance = stop_every_km * 1000.0
+            while distance < self.length_m:
+                constraints.append((distance, 0.0, stop_s))
+                distance += stop_every_km * 1000.0
+        if not self.loop:
+            constraints.append((self.length_m, 0.0, 0.0))  # Arrive at the end
+        return sorted(constraints)
+
+    def _cruise_speed(self, s):
+        if self.segment_speeds:
+            i = min(bisect.bisect_right(self.cumulative_m, s) - 1, len(self.segment_speeds) - 1)
+            if self.segment_speeds[i] is not None:
+                return self.segment_speeds[i]
+        return self.speed_ms
+
+    def _speed_limit(self, s, index):
+        """Fastest speed from which every upcoming constraint can still be met"""
+        limit = self._cruise_speed(s)
+        braking_m = limit * limit / (2.0 * self.decel)
+        n = len(self.constraints)
+        for k in range(index, index + n):
+            position, speed, _ = self.constraints[k % n]
+            position += self.length_m * (k // n)  # Constraints of the next lap
+            ahead = position - s
+            if ahead > braking_m:
+                break
+            if ahead >= 0.0:
+                limit = min(limit, math.sqrt(speed * speed + 2.0 * self.decel * ahead))
+        return limit
+
+    def _point_at(self, s):
+        """(lat, lon, heading) at distance s along the lap"""
+        i = min(max(bisect.bisect_right(self.cumulative_m, s) - 1, 0), len(self.route) - 2)
+        start, end = self.cumulative_m[i], self.cumulative_m[i + 1]
+        f = (s - start) / (end - start) if end > start else 0.0
+        (lat1, lon1), (lat2, lon2) = self.route[i], self.route[i + 1]
+        return lat1 + (lat2 - lat1) * f, lon1 + (lon2 - lon1) * f, self.bearings[i]
+
+    def fixes(self):
+        """
+        Generate fixes in simulated time: dicts with t (s), lat, lon, speed_kmh,
+        heading, hdop, satellites, altitude, plus the true position/speed and
+        odometer for checking consumers against ground truth.
+        """
+        rng = self.rng
+        dt = 1.0 / self.fix_rate_hz
+        substeps = max(1, int(math.ceil(dt / 0.2)))
+        h = dt / substeps
+        decay = math.exp(-dt / self.noise_tau_s) if self.noise_tau_s else 0.0
+        drive = math.sqrt(1.0 - decay * decay)
+
+        s = 0.0            # Distance along the current lap (m)
+        odometer = 0.0
+        v = 0.0
+        dwell = 0.0
+        index = 0          # Next constraint
+        east = north = 0.0
+        satellites = 9
+        t = 0.0
+        n = len(self.constraints)
+        arrived = False
+
+        while not arrived and (self.duration_s is None or t <= self.duration_s):
+            for _ in range(substeps):
+                if dwell > 0.0:
+                    dwell -= h
+                    continue
+                target = self._speed_limit(s, index)
+                v = min(target, v + self.accel * h) if v < target else max(target, v - self.decel * h)
+                step = v * h
+                # Reached a stop: pull up exactly on it and wait
+                if n and index < n and self.constraints[index][0] <= s + step:
+                    position, speed, wait = self.constraints[index]
+                    if speed == 0.0:
+                        step = max(0.0, position - s)
+                        v = 0.0
+                        dwell = wait
+                    index += 1
+                s += step
+                odometer += step
+                if s >= self.length_m:
+                    if not self.loop:
+                        s = self.length_m
+                        arrived = True
+                        break
+                    s -= self.length_m
+                    index = 0
+
+            lat, lon, heading = self._point_at(s)
+            cos_lat = math.cos(math.radians(lat))
+
+            # First-order Gauss-Markov drift, like real receiver error
+            east = decay * east + drive * self.noise_m * rng.gauss(0.0, 1.0)
+            north = decay * north + drive * self.noise_m * rng.gauss(0.0, 1.0)
+            jump_e = jump_n = 0.0
+            if self.outlier_rate and rng.random() < self.outlier_rate:
+                angle = rng.uniform(0.0, 2.0 * math.pi)
+                distance = rng.uniform(30.0, 100.0)
+                jump_e, jump_n = distance * math.sin(angle), distance * math.cos(angle)
+
+            satellites = min(12, max(5, satellites + rng.choice((-1, 0, 0, 0, 1))))
+            speed_kmh = max(0.0, v * 3.6 + rng.gauss(0.0, self.speed_noise_kmh))
+            if v == 0.0:
+                speed_kmh = min(speed_kmh, 1.0)
+            yield {
+                't': t,
+                'lat': lat + (north + jump_n) / _M_PER_DEG,
+                'lon': lon + (east + jump_e) / (_M_PER_DEG * cos_lat),
+                'speed_kmh': speed_kmh,
+                'heading': heading if v > 0.0 else None,
+                'hdop': round(0.8 + self.noise_m / 4.0 + (12 - satellites) * 0.1, 1),
+                'satellites': satellites,
+                'altitude': 12.0,
+                'true_lat': lat,
+                'true_lon': lon,
+                'true_speed_kmh': v * 3.6,
+                'odometer_km': odometer / 1000.0,
+                'stopped': dwell > 0.0,
+            }
+            t += dt
+
+
+if __name__ == "__main__":
+    # Usage: python -m backend.route_simulator <route.gpx|route.csv> [out.csv]
+    if len(sys.argv) < 2:
+        print("Usage: python -m backend.route_simulator <route.gpx|route.csv> [out.csv]")
+        sys.exit(1)
+    simulator = RouteSimulator(sys.argv[1], loop=False, seed=1)
+    fixes = list(simulator.fixes())
+    print(f"🧭 {len(simulator.route)} points, {simulator.length_m / 1000:.2f} km, "
+          f"{len(simulator.constraints)} corners/stops -> {len(fixes)} fixes "
+          f"({fixes[-1]['t'] / 60:.1f} min)")
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], "w", newline="") as out:
+            writer = csv.DictWriter(out, fieldnames=list(fixes[0]))
+            writer.writeheader()
+            writer.writerows(fixes)
+        print(f"✅ Wrote {sys.argv[2]}")
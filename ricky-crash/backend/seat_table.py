@@ -0,0 +1,126 @@
+"""
+Seat Table - Per-seat ride state for Sharing mode as parallel columns
+One list per field (onboard mask, fare, distance, waiting time, boarding
+odometer, tariff distance fare), indexed by seat, instead of a dict per
+passenger. A fare tick bills every occupied seat in one pass over the
+columns. Ride identity (id, start time/location, tariff) only changes at
+boarding and alighting and stays in plain per-seat lists.
+"""
+
+
+class SeatTable:
+    def __init__(self, seats=3):
+        if seats < 1:
+            raise ValueError("Need at least one seat")
+        self.count = seats
+        self.onboard = [False] * seats
+        self.fare = [0.0] * seats
+        self.distance = [0.0] * seats              # km since boarding
+        self.waiting_s = [0.0] * seats
+        self.odometer_start = [0.0] * seats        # Shared odometer at boarding
+        self.distance_fare = [0.0] * seats         # Tariff distance fare already charged
+        self.tariff_slot = [-1] * seats
+        self.slab = [0] * seats                    # Slab hints for distance_fare
+        self.tariffs = []                          # Tariffs referenced by tariff_slot
+        self.ride_id = [None] * seats
+        self.start_time = [None] * seats
+        self.start_location = [None] * seats
+        self.occupied = 0
+
+    def _slot_for(self, tariff):
+        for slot, known in enumerate(self.tariffs):
+            if known is tariff:
+                return slot
+        for slot, known in enumerate(self.tariffs):
+            if known is None:
+                self.tariffs[slot] = tariff
+                return slot
+        self.tariffs.append(tariff)
+        return len(self.tariffs) - 1
+
+    def board(self, seat, odometer_km, tariff, start_time, location, ride_id):
+        """Start a ride on a seat; returns its opening fare (base fare)"""
+        base, _ = tariff.distance_fare(0.0)
+        fare = base * tariff.multiplier(start_time)
+        self.restore(seat, odometer_km, tariff, start_time, location, ride_id, fare, 0.0, base, 0.0)
+        return fare
+
+    def restore(self, seat, odometer_km, tariff, start_time, location, ride_id,
+                fare, distance, distance_fare, waiting_s):
+        """Occupy a seat with a ride in progress (boarding, or reopened from the ride journal)"""
+        if not self.onboard[seat]:
+            self.occupied += 1
+        self.onboard[seat] = True
+        self.fare[seat] = fare
+        self.distance[seat] = distance
+        self.waiting_s[seat] = waiting_s
+        self.odometer_start[seat] = odometer_km
+        self.distance_fare[seat] = distance_fare
+        self.slab[seat] = tariff.distance_fare(distance)[1]
+        self.tariff_slot[seat] = self._slot_for(tariff)
+        self.ride_id[seat] = ride_id
+        self.start_time[seat] = start_time
+        self.start_location[seat] = location
+
+    def alight(self, seat):
+        """End a seat's ride; returns its totals and identity, and clears the seat"""
+        slot = self.tariff_slot[seat]
+        ride = {
+            'fare': self.fare[seat],
+            'distance': self.distance[seat],
+            'waiting_minutes': self.waiting_s[seat] / 60.0,
+            'tariff': self.tariffs[slot],
+            'ride_id': self.ride_id[seat],
+            'start_time': self.start_time[seat],
+            'start_location': self.start_location[seat],
+        }
+        self.onboard[seat] = False
+        self.fare[seat] = self.distance[seat] = self.waiting_s[seat] = 0.0
+        self.tariff_slot[seat] = -1
+        self.ride_id[seat] = self.start_time[seat] = self.start_location[seat] = None
+        self.occupied -= 1
+        if slot not in self.tariff_slot:
+            self.tariffs[slot] = None  # Version no longer in use
+        return ride
+
+    def bill(self, odometer_km, speed_kmh, seconds, now):
+        """
+        Charge every occupied seat for the odometer distance and the waiting
+        since the last tick. Returns the seats that were billed.
+        """
+        if not self.occupied:
+            return []
+        billed = []
+        for seat in range(self.count):
+            if not self.onboard[seat]:
+                continue
+            tariff = self.tariffs[self.tariff_slot[seat]]
+            multiplier = tariff.multiplier(now)
+            distance = odometer_km - self.odometer_start[seat]
+            distance_fare, self.slab[seat] = tariff.distance_fare(distance, self.slab[seat])
+            self.fare[seat] += (distance_fare - self.distance_fare[seat]) * multiplier
+            self.distance_fare[seat] = distance_fare
+            self.distance[seat] = distance
+            if speed_kmh < tariff.waiting_below_kmh:
+                self.fare[seat] += tariff.waiting_fare(seconds, self.waiting_s[seat]) * multiplier
+                self.waiting_s[seat] += seconds
+            billed.append(seat)
+        return billed
+
+    def progress(self):
+        """[seat, fare, distance, distance fare, waiting s] of every occupied seat"""
+        return [[seat, self.fare[seat], self.distance[seat], self.distance_fare[seat], self.waiting_s[seat]]
+                for seat in range(self.count) if self.onboard[seat]]
+
+    def fare_of(self, seat):
+        return self.fare[seat]
+
+    def snapshot(self):
+        """Compact copy for readers (UI): tuples per column, seat-indexed"""
+        return {
+            'seats': self.count,
+            'onboard': tuple(self.onboard),
+            'fare': tuple(self.fare),
+            'distance': tuple(self.distance),
+            'waiting_minutes': tuple(w / 60.0 for w in self.waiting_s),
+        }
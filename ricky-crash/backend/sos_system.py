@@ -1,6 +1,7 @@
 """
 SOS System - Manages emergency alerts and responses
 Updated: Fixes "Release to Deactivate" bug. Now locks until clicked again.
+Updated: Location, speed and fix age come from one GPSFix snapshot
 """
 
 import threading
@@ -88,13 +89,18 @@ class SOSSystem(QObject):
             
         activation_time = datetime.now()
         current_loc = None
+        fix = None
         if self.gps_manager:
-            current_loc = self.gps_manager.get_location()
+            fix = self.gps_manager.get_fix()
+            current_loc = fix.location
 
         sos_data = {
             'activation_time': activation_time,
             'timestamp': activation_time.isoformat(),
             'location': current_loc,
+            'speed': fix.speed if fix else None,
+            'gps_fix': fix.fix if fix else False,
+            'fix_age': round(fix.age(), 1) if fix and current_loc else None,
             'status': 'ACTIVE',
             'type': source
         }
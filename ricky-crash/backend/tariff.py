@@ -0,0 +1,177 @@
+"""
+Tariff - Versioned fare rate tables compiled for O(1) evaluation
+A tariff spec (dict / JSON) holds the base fare, distance slabs, waiting
+rules, night and holiday multipliers and the minimum fare. compile_tariff()
+turns it into a CompiledTariff: slab boundaries with the cumulative fare at
+each one, a 1440-entry minute-of-day multiplier table and a set of holiday
+dates, so a fare tick is a few index lookups. Compiled tariffs are never
+modified - a new version is a new object, swapped in with one assignment.
+
+Example spec:
+    {
+        "version": "MMRTA-2026-10",
+        "base_fare": 26.0, "base_km": 1.5,
+        "slabs": [{"upto_km": 10, "rate_per_km": 17.14}, {"rate_per_km": 15.0}],
+        "waiting": {"per_minute": 2.0, "free_minutes": 3, "below_kmh": 2.0},
+        "night": {"start": "00:00", "end": "05:00", "multiplier": 1.25},
+        "holidays": ["2026-11-08"], "holiday_multiplier": 1.25,
+        "minimum_fare": 26.0
+    }
+"""
+
+import json
+import copy
+import bisect
+import hashlib
+from datetime import date
+
+MINUTES_PER_DAY = 24 * 60
+
+DEFAULT_SPEC = {
+    'version': "flat-12",
+    'base_fare': 0.0,
+    'base_km': 0.0,
+    'slabs': [{'rate_per_km': 12.0}],
+    'waiting': {'per_minute': 2.0, 'free_minutes': 0.0, 'below_kmh': 2.0},
+    'night': None,
+    'holidays': [],
+    'holiday_multiplier': 1.0,
+    'minimum_fare': 0.0,
+}
+
+
+def _minute_of_day(text):
+    hours, minutes = text.split(":")
+    value = int(hours) * 60 + int(minutes)
+    if not 0 <= value <= MINUTES_PER_DAY:
+        raise ValueError(f"Bad time of day: {text}")
+    return value % MINUTES_PER_DAY
+
+
+class CompiledTariff:
+    __slots__ = ('version', 'spec', 'base_fare', 'minimum_fare', 'rate_per_km',
+                 'waiting_below_kmh', '_bounds', '_rates', '_cumulative', '_waiting_per_s',
+                 '_free_waiting_s', '_minute_multiplier', '_holidays', '_holiday_multiplier')
+
+    def __init__(self, spec):
+        init = object.__setattr__
+        spec = copy.deepcopy(spec)
+        init(self, 'spec', spec)
+        init(self, 'version', spec.get('version') or self._content_version(spec))
+
+        # Distance: base fare covers base_km, then slabs [(start km, rate)]
+        base_fare = float(spec.get('base_fare', 0.0))
+        base_km = float(spec.get('base_km', 0.0))
+        slabs = spec.get('slabs') or []
+        if not slabs:
+            raise ValueError("Tariff needs at least one distance slab")
+        bounds, rates = ([0.0], [0.0]) if base_km > 0 else ([], [])
+        start = base_km
+        for i, slab in enumerate(slabs):
+            rate = float(slab['rate_per_km'])
+            upto = slab.get('upto_km')
+            if rate < 0 or (upto is None and i != len(slabs) - 1):
+                raise ValueError(f"Bad slab {slab}: only the last slab may be open-ended")
+            if upto is not None and float(upto) <= start:
+                continue  # Fully inside the base distance (or out of order)
+            # The last slab's rate also applies beyond its upto_km
+            bounds.append(start)
+            rates.append(rate)
+            if upto is not None:
+                start = float(upto)
+        if not bounds:
+            raise ValueError("Tariff has no distance slab beyond the base distance")
+        cumulative = [base_fare]
+        for i in range(1, len(bounds)):
+            cumulative.append(cumulative[-1] + (bounds[i] - bounds[i - 1]) * rates[i - 1])
+        init(self, '_bounds', tuple(bounds))
+        init(self, '_rates', tuple(rates))
+        init(self, '_cumulative', tuple(cumulative))
+        init(self, 'base_fare', base_fare)
+        init(self, 'rate_per_km', next((r for r in rates if r > 0), 0.0))  # Headline rate
+        init(self, 'minimum_fare', float(spec.get('minimum_fare', 0.0)))
+
+        # Waiting
+        waiting = spec.get('waiting') or {}
+        init(self, '_waiting_per_s', float(waiting.get('per_minute', 0.0)) / 60.0)
+        init(self, '_free_waiting_s', float(waiting.get('free_minutes', 0.0)) * 60.0)
+        init(self, 'waiting_below_kmh', float(waiting.get('below_kmh', 2.0)))
+
+        # Time of day and calendar
+        table = [1.0] * MINUTES_PER_DAY
+        night = spec.get('night')
+        if night:
+            first, end = _minute_of_day(night['start']), _minute_of_day(night['end'])
+            multiplier = float(night['multiplier'])
+            minute = first
+            while True:
+                table[minute] = multiplier
+                minute = (minute + 1) % MINUTES_PER_DAY
+                if minute == end:
+                    break
+        init(self, '_minute_multiplier', tuple(table))
+        init(self, '_holidays', frozenset(date.fromisoformat(d).toordinal()
+                                          for d in spec.get('holidays') or ()))
+        init(self, '_holiday_multiplier', float(spec.get('holiday_multiplier', 1.0)))
+
+    @staticmethod
+    def _content_version(spec):
+        digest = hashlib.sha1(json.dumps(spec, sort_keys=True).encode('utf-8')).hexdigest()
+        return f"auto-{digest[:8]}"
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledTariff is immutable")
+
+    def distance_fare(self, km, slab=0):
+        """
+        (fare for km of distance incl. base fare, slab index). Pass the slab
+        index returned by the previous call: an odometer moving forward stays
+        in (or next to) it, so the lookup is O(1) without searching.
+        """
+        bounds = self._bounds
+        last = len(bounds) - 1
+        if not (bounds[slab] <= km and (slab == last or km < bounds[slab + 1])):
+            if slab < last and bounds[slab + 1] <= km and (slab + 1 == last or km < bounds[slab + 2]):
+                slab += 1
+            else:
+                slab = max(0, bisect.bisect_right(bounds, km) - 1)
+        return self._cumulative[slab] + (max(km, 0.0) - bounds[slab]) * self._rates[slab], slab
+
+    def multiplier(self, when):
+        """Fare multiplier at a datetime: night hours and holidays (the higher one wins)"""
+        night = self._minute_multiplier[when.hour * 60 + when.minute]
+        if when.toordinal() in self._holidays:
+            return max(night, self._holiday_multiplier)
+        return night
+
+    def waiting_fare(self, seconds, waited_s):
+        """Charge for `seconds` more waiting after `waited_s` already waited in this ride"""
+        billable = max(0.0, waited_s + seconds - self._free_waiting_s) - max(0.0, waited_s - self._free_waiting_s)
+        return billable * self._waiting_per_s
+
+    def final_fare(self, fare):
+        return max(fare, self.minimum_fare)
+
+    def with_flat_rate(self, rate_per_km):
+        """Spec for the same tariff with every slab at one per-km rate"""
+        spec = copy.deepcopy(self.spec)
+        spec['slabs'] = [{'rate_per_km': float(rate_per_km)}]
+        spec['version'] = f"{self.version.split('@')[0]}@{float(rate_per_km):g}"
+        return spec
+
+    def __repr__(self):
+        return f"CompiledTariff({self.version!r}, {len(self._rates)} slabs)"
+
+
+def compile_tariff(spec=None, **overrides):
+    """CompiledTariff from a spec dict (missing keys come from DEFAULT_SPEC)"""
+    merged = copy.deepcopy(DEFAULT_SPEC)
+    merged.update(spec or {})
+    merged.update(overrides)
+    return CompiledTariff(merged)
+
+
+def load_tariff(path):
+    """Compile a tariff JSON file"""
+    with open(path, encoding='utf-8') as f:
+        return compile_tariff(json.load(f))
@@ -0,0 +1,173 @@
+"""
+Trip Trace - Compact per-ride path recorder with on-the-fly simplification
+Fixes are simplified as they arrive (opening-window, perpendicular tolerance in
+metres) and only the kept points are stored, in typed array('d') columns.
+If a very long ride still exceeds max_points the tolerance is doubled and the
+stored points are re-simplified (Douglas-Peucker), so memory stays bounded.
+"""
+
+import math
+from array import array
+
+from backend.geodesy import haversine_km
+
+_M_PER_DEG = 111320.0
+
+
+def _offset_m(lat0, lon0, lat, lon, cos_lat):
+    """Local east/north offset in metres (fine at trip scale)"""
+    return (lon - lon0) * _M_PER_DEG * cos_lat, (lat - lat0) * _M_PER_DEG
+
+
+def _deviation_sq(ax, ay, bx, by, px, py):
+    """Squared distance of P from segment A-B (local metres)"""
+    dx = bx - ax
+    dy = by - ay
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0.0:
+        return (px - ax) ** 2 + (py - ay) ** 2
+    u = ((px - ax) * dx + (py - ay) * dy) / length_sq
+    u = 0.0 if u < 0.0 else 1.0 if u > 1.0 else u
+    ex = ax + u * dx - px
+    ey = ay + u * dy - py
+    return ex * ex + ey * ey
+
+
+def encode_polyline(lats, lons, precision=5):
+    """Google encoded polyline string (compact for sync payloads)"""
+    factor = 10 ** precision
+    out = []
+    prev_lat = prev_lon = 0
+    for lat, lon in zip(lats, lons):
+        ilat = int(round(lat * factor))
+        ilon = int(round(lon * factor))
+        for delta in (ilat - prev_lat, ilon - prev_lon):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                out.append(chr((0x20 | (value & 0x1F)) + 63))
+                value >>= 5
+            out.append(chr(value + 63))
+        prev_lat, prev_lon = ilat, ilon
+    return "".join(out)
+
+
+class TripTrace:
+    def __init__(self, tolerance_m=5.0, max_points=2000, max_window=200):
+        self.tolerance_m = tolerance_m
+        self.max_points = max_points  # Hard cap on stored points
+        self.max_window = max_window  # Bound on per-fix work
+
+        # Kept points (typed columns, 8 bytes per value)
+        self.lat = array('d')
+        self.lon = array('d')
+        self.t = array('d')
+        self.speed = array('d')
+
+        # Points since the last kept one, as local offsets from it
+        self._window = []
+        self._last = None        # Latest fix (lat, lon, t, speed)
+        self._cos_lat = 1.0
+
+        self.points_seen = 0
+        self.length_km = 0.0     # Full-resolution path length
+        self.finished = False
+
+    def add(self, lat, lon, timestamp, speed=0.0):
+        """Record one fix; O(window) with window <= max_window"""
+        if self.finished:
+            return
+        last = self._last
+        self.points_seen += 1
+        if last is not None:
+            self.length_km += haversine_km(last[0], last[1], lat, lon)
+        self._last = (lat, lon, timestamp, speed)
+
+        if not self.lat:
+            self._cos_lat = math.cos(math.radians(lat))
+            self._keep(lat, lon, timestamp, speed)
+            return
+
+        anchor_lat, anchor_lon = self.lat[-1], self.lon[-1]
+        px, py = _offset_m(anchor_lat, anchor_lon, lat, lon, self._cos_lat)
+        tol_sq = self.tolerance_m * self.tolerance_m
+        for wx, wy, _ in self._window:
+            if _deviation_sq(0.0, 0.0, px, py, wx, wy) > tol_sq:
+                # P can no longer be reached in a straight line: keep its predecessor
+                self._keep(*last)
+                self._window = []
+                px, py = _offset_m(last[0], last[1], lat, lon, self._cos_lat)
+                break
+        else:
+            if len(self._window) >= self.max_window:
+                self._keep(*last)
+                self._window = []
+                px, py = _offset_m(last[0], last[1], lat, lon, self._cos_lat)
+        self._window.append((px, py, self._last))
+
+    def _keep(self, lat, lon, timestamp, speed):
+        self.lat.append(lat)
+        self.lon.append(lon)
+        self.t.append(timestamp)
+        self.speed.append(speed)
+        if len(self.lat) > self.max_points:
+            self.tolerance_m *= 2.0
+            self._resimplify()
+
+    def _resimplify(self):
+        """Douglas-Peucker over the kept points at the current tolerance"""
+        n = len(self.lat)
+        cos_lat = self._cos_lat
+        lat0, lon0 = self.lat[0], self.lon[0]
+        xy = [_offset_m(lat0, lon0, self.lat[i], self.lon[i], cos_lat) for i in range(n)]
+        keep = bytearray(n)
+        keep[0] = keep[n - 1] = 1
+        tol_sq = self.tolerance_m * self.tolerance_m
+        stack = [(0, n - 1)]
+        while stack:
+            first, last = stack.pop()
+            ax, ay = xy[first]
+            bx, by = xy[last]
+            worst, worst_sq = 0, tol_sq
+            for i in range(first + 1, last):
+                d = _deviation_sq(ax, ay, bx, by, xy[i][0], xy[i][1])
+                if d > worst_sq:
+                    worst, worst_sq = i, d
+            if worst:
+                keep[worst] = 1
+                stack.append((first, worst))
+                stack.append((worst, last))
+        for name in ('lat', 'lon', 't', 'speed'):
+            column = getattr(self, name)
+            setattr(self, name, array('d', (column[i] for i in range(n) if keep[i])))
+
+    def finish(self):
+        """Close the trace (keeps the final fix). The polyline is then ready as-is."""
+        if self.finished:
+            return self
+        last = self._last
+        if last is not None and (not self.lat or self.t[-1] != last[2]):
+            self._keep(*last)
+        self._window = []
+        self.finished = True
+        return self
+
+    def polyline(self):
+        """Kept points as (lat, lon, t, speed) arrays - no copy"""
+        return self.lat, self.lon, self.t, self.speed
+
+    def encoded(self):
+        return encode_polyline(self.lat, self.lon)
+
+    def memory_bytes(self):
+        return sum(col.buffer_info()[1] * col.itemsize
+                   for col in (self.lat, self.lon, self.t, self.speed))
+
+    def summary(self):
+        """Route fields for ride_data"""
+        return {
+            'route_polyline': self.encoded(),
+            'route_points': len(self.lat),
+            'route_points_seen': self.points_seen,
+            'route_length_km': round(self.length_km, 3),
+            'route_tolerance_m': self.tolerance_m,
+        }
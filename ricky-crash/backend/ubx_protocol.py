@@ -0,0 +1,555 @@
+"""
+UBX Protocol - u-blox binary protocol for the GPS receiver
+Frame building (CFG-RATE / CFG-MSG / CFG-PRT, AID-INI hot-start aiding), an
+incremental frame parser that decodes NAV-PVT (u-blox 7/8) and the NEO-6M
+equivalent NAV-POSLLH + NAV-VELNED + NAV-SOL epoch, each with the hDOP of its
+NAV-DOP, and an emulated receiver for running without hardware.
+"""
+
+import math
+import time
+import struct
+import threading
+from operator import mul
+
+from backend.nmea_parser import build_sentence
+
+SYNC = b"\xb5\x62"
+
+# Message classes / IDs
+CLS_NAV = 0x01
+CLS_ACK = 0x05
+CLS_CFG = 0x06
+CLS_AID = 0x0B
+CLS_NMEA = 0xF0
+
+NAV_POSLLH = 0x02
+NAV_DOP = 0x04
+NAV_SOL = 0x06
+NAV_PVT = 0x07
+NAV_VELNED = 0x12
+ACK_NAK = 0x00
+ACK_ACK = 0x01
+CFG_PRT = 0x00
+CFG_MSG = 0x01
+CFG_RATE = 0x08
+AID_INI = 0x01
+AID_HUI = 0x02
+AID_ALM = 0x30
+AID_EPH = 0x31
+
+# AID-INI flags
+AID_INI_POS = 0x01
+AID_INI_TIME = 0x02
+AID_INI_LLA = 0x20   # Position given as lat/lon/alt instead of ECEF
+
+GPS_EPOCH_UNIX = 315964800  # 1980-01-06 00:00:00 UTC
+GPS_LEAP_SECONDS = 18       # GPS - UTC since 2017
+
+# Standard NMEA messages (class 0xF0) the receiver sends by default
+NMEA_GGA, NMEA_GLL, NMEA_GSA, NMEA_GSV, NMEA_RMC, NMEA_VTG = range(6)
+NMEA_MESSAGES = (NMEA_GGA, NMEA_GLL, NMEA_GSA, NMEA_GSV, NMEA_RMC, NMEA_VTG)
+
+PROTO_UBX = 0x01
+PROTO_NMEA = 0x02
+UART_8N1 = 0x08D0
+
+MAX_PAYLOAD = 512
+
+_HEADER = struct.Struct("<BBH")
+_PVT = struct.Struct("<IHBBBBBBIiBBBBiiiiIIiiiiiIIH6xihH")       # 92 bytes
+_POSLLH = struct.Struct("<IiiiiII")                              # 28 bytes
+_VELNED = struct.Struct("<IiiiIIiII")                            # 36 bytes
+_SOL = struct.Struct("<IihBBiiiIiiiIHBBI")                       # 52 bytes
+_DOP = struct.Struct("<IHHHHHHH")                                # 18 bytes
+_CFG_PRT = struct.Struct("<BBHIIHHHH")                           # 20 bytes
+_CFG_RATE = struct.Struct("<HHH")
+_AID_INI = struct.Struct("<iiiIHHIiIIiII")                       # 48 bytes
+
+
+def ubx_checksum(data):
+    """8-bit Fletcher checksum over class, id, length and payload"""
+    n = len(data)
+    ck_a = sum(data) & 0xFF
+    # CK_B = sum of the running CK_A values = sum((n - i) * data[i])
+    ck_b = sum(map(mul, data, range(n, 0, -1))) & 0xFF
+    return ck_a, ck_b
+
+
+def ubx_frame(cls, msg_id, payload=b""):
+    body = _HEADER.pack(cls, msg_id, len(payload)) + bytes(payload)
+    return SYNC + body + bytes(ubx_checksum(body))
+
+
+def cfg_msg(cls, msg_id, rate):
+    """Output rate of a message on the current port (0 = off, n = every n-th epoch)"""
+    return ubx_frame(CLS_CFG, CFG_MSG, bytes((cls, msg_id, rate)))
+
+
+def cfg_rate(measurement_ms):
+    """Navigation measurement period (one solution per measurement, GPS time)"""
+    return ubx_frame(CLS_CFG, CFG_RATE, _CFG_RATE.pack(int(measurement_ms), 1, 1))
+
+
+def cfg_prt_uart(baudrate, in_proto=PROTO_UBX | PROTO_NMEA, out_proto=PROTO_UBX):
+    """UART1 baud rate and protocol masks (8N1)"""
+    payload = _CFG_PRT.pack(1, 0, 0, UART_8N1, int(baudrate), in_proto, out_proto, 0, 0)
+    return ubx_frame(CLS_CFG, CFG_PRT, payload)
+
+
+def gps_week_tow(unix_time):
+    """(GPS week, time of week in ms) for a Unix timestamp"""
+    gps_seconds = unix_time - GPS_EPOCH_UNIX + GPS_LEAP_SECONDS
+    week = int(gps_seconds // 604800)
+    return week, int(round((gps_seconds - week * 604800) * 1000))
+
+
+def aid_ini(lat=None, lon=None, altitude_m=0.0, pos_acc_m=300.0, unix_time=None, time_acc_s=2.0):
+    """
+    AID-INI: initial position and/or time so the receiver can skip the
+    satellite search (warm start). Either part may be omitted.
+    """
+    flags = 0
+    lat_e7 = lon_e7 = alt_cm = pos_acc_cm = 0
+    week = tow_ms = time_acc_ms = 0
+    if lat is not None and lon is not None:
+        lat_e7, lon_e7 = int(round(lat * 1e7)), int(round(lon * 1e7))
+        alt_cm = int(round((altitude_m or 0.0) * 100))
+        pos_acc_cm = int(pos_acc_m * 100)
+        flags |= AID_INI_POS | AID_INI_LLA
+    if unix_time is not None:
+        week, tow_ms = gps_week_tow(unix_time)
+        time_acc_ms = int(time_acc_s * 1000)
+        flags |= AID_INI_TIME
+    return ubx_frame(CLS_AID, AID_INI, _AID_INI.pack(
+        lat_e7, lon_e7, alt_cm, pos_acc_cm, 0, week, tow_ms, 0, time_acc_ms, 0, 0, 0, flags))
+
+
+def _decode_pvt(payload):
+    (itow, year, month, day, hour, minute, second, valid, _t_acc, _nano, fix_type,
+     flags, _flags2, num_sv, lon, lat, height, h_msl, h_acc, v_acc, _vel_n, _vel_e,
+     _vel_d, g_speed, head_mot, _s_acc, _head_acc, p_dop, _head_veh, _mag_dec,
+     _mag_acc) = _PVT.unpack_from(payload)
+    return {
+        'type': "PVT",
+        'itow': itow,
+        'fix_type': fix_type,                # 0 none, 2 = 2D, 3 = 3D
+        'fix_ok': bool(flags & 0x01),
+        'satellites': num_sv,
+        'lat': lat * 1e-7,
+        'lon': lon * 1e-7,
+        'altitude': h_msl / 1000.0,
+        'height': height / 1000.0,
+        'h_acc_m': h_acc / 1000.0,
+        'v_acc_m': v_acc / 1000.0,
+        'speed_kmh': g_speed * 0.0036,       # mm/s -> km/h
+        'heading': head_mot * 1e-5,
+        'pdop': p_dop * 0.01,
+        'utc': (year, month, day, hour, minute, second) if valid & 0x03 == 0x03 else None,
+    }
+
+
+def _decode_posllh(payload):
+    itow, lon, lat, height, h_msl, h_acc, v_acc = _POSLLH.unpack_from(payload)
+    return {'itow': itow, 'lat': lat * 1e-7, 'lon': lon * 1e-7,
+            'height': height / 1000.0, 'altitude': h_msl / 1000.0,
+            'h_acc_m': h_acc / 1000.0, 'v_acc_m': v_acc / 1000.0}
+
+
+def _decode_velned(payload):
+    itow, _n, _e, _d, _speed, g_speed, heading, _s_acc, _c_acc = _VELNED.unpack_from(payload)
+    return {'itow': itow, 'speed_kmh': g_speed * 0.036,  # cm/s -> km/h
+            'heading': heading * 1e-5}
+
+
+def _decode_sol(payload):
+    fields = _SOL.unpack_from(payload)
+    return {'itow': fields[0], 'fix_type': fields[3], 'fix_ok': bool(fields[4] & 0x01),
+            'pdop': fields[13] * 0.01, 'satellites': fields[15]}
+
+
+def _decode_dop(payload):
+    itow, g_dop, p_dop, t_dop, v_dop, h_dop, n_dop, e_dop = _DOP.unpack_from(payload)
+    return {'itow': itow, 'hdop': h_dop * 0.01, 'vdop': v_dop * 0.01, 'pdop': p_dop * 0.01}
+
+
+_NEO6_EPOCH = {
+    NAV_POSLLH: (_POSLLH.size, _decode_posllh),
+    NAV_VELNED: (_VELNED.size, _decode_velned),
+    NAV_SOL: (_SOL.size, _decode_sol),
+}
+
+
+class UBXStreamParser:
+    """
+    Incremental UBX frame parser. Non-UBX bytes (e.g. NMEA during switch-over)
+    are skipped. feed()/read_from() return decoded messages:
+      PVT  - one navigation solution (NAV-PVT, or a merged NEO-6M epoch);
+             'hdop' comes from the epoch's NAV-DOP (None without one)
+      ACK  - {'ack': bool, 'class', 'id'} for a CFG command
+      RAW  - any other frame {'class', 'id', 'payload'}
+    """
+
+    def __init__(self, buffer_size=4096):
+        self._buf = bytearray(buffer_size)
+        self._view = memoryview(self._buf)
+        self._len = 0
+        self._epoch = {}   # NEO-6M parts of the current iTOW
+        self._epoch_parts = set()
+        self._dop = {}     # Latest NAV-DOP (sent before the solution of its epoch)
+
+        # Stats
+        self.bytes_in = 0
+        self.frames = 0
+        self.checksum_errors = 0
+        self.dropped_bytes = 0
+
+    def read_from(self, port):
+        data = port.read(max(1, getattr(port, 'in_waiting', 0)))
+        return self.feed(data) if data else []
+
+    def feed(self, data):
+        n = len(data)
+        self.bytes_in += n
+        if self._len + n > len(self._buf):
+            self._view.release()
+            self._buf.extend(bytes(self._len + n - len(self._buf)))
+            self._view = memoryview(self._buf)
+        self._view[self._len:self._len + n] = data
+        self._len += n
+        return self._scan()
+
+    def _scan(self):
+        buf = self._buf
+        view = self._view
+        end = self._len
+        pos = 0
+        out = []
+
+        while True:
+            start = buf.find(SYNC, pos, end)
+            if start < 0:
+                # Keep a trailing 0xB5, it may be the first sync byte
+                keep = 1 if end > pos and buf[end - 1] == 0xB5 else 0
+                self.dropped_bytes += end - pos - keep
+                pos = end - keep
+                break
+            self.dropped_bytes += start - pos
+            if end - start < 8:
+                pos = start
+                break
+            cls, msg_id, length = _HEADER.unpack_from(buf, start + 2)
+            if length > MAX_PAYLOAD:
+                pos = start + 1  # False sync inside binary data
+                continue
+            frame_end = start + 8 + length
+            if frame_end > end:
+                pos = start
+                break
+            if bytes(ubx_checksum(view[start + 2:frame_end - 2])) != buf[frame_end - 2:frame_end]:
+                self.checksum_errors += 1
+                pos = start + 1
+                continue
+            pos = frame_end
+            self.frames += 1
+            message = self._decode(cls, msg_id, view[start + 6:frame_end - 2])
+            if message is not None:
+                out.append(message)
+
+        remaining = end - pos
+        if remaining and pos:
+            view[:remaining] = view[pos:end]
+        self._len = remaining
+        return out
+
+    def _decode(self, cls, msg_id, payload):
+        if cls == CLS_NAV:
+            if msg_id == NAV_PVT and len(payload) >= _PVT.size:
+                return self._with_dop(_decode_pvt(payload))
+            if msg_id == NAV_DOP and len(payload) >= _DOP.size:
+                self._dop = _decode_dop(payload)
+                return None
+            part = _NEO6_EPOCH.get(msg_id)
+            if part and len(payload) >= part[0]:
+                return self._merge_epoch(msg_id, part[1](payload))
+        elif cls == CLS_ACK and len(payload) >= 2:
+            return {'type': "ACK", 'ack': msg_id == ACK_ACK,
+                    'class': payload[0], 'id': payload[1]}
+        return {'type': "RAW", 'class': cls, 'id': msg_id, 'payload': bytes(payload)}
+
+    def _merge_epoch(self, msg_id, part):
+        """Combine POSLLH + VELNED + SOL of one iTOW into a PVT-shaped message"""
+        if self._epoch.get('itow') != part['itow']:
+            self._epoch = {'itow': part['itow']}
+            self._epoch_parts = set()
+        self._epoch.update(part)
+        self._epoch_parts.add(msg_id)
+        if len(self._epoch_parts) < len(_NEO6_EPOCH):
+            return None
+        message = self._epoch
+        self._epoch = {}
+        message['type'] = "PVT"
+        message['utc'] = None
+        return self._with_dop(message)
+
+    def _with_dop(self, message):
+        """Attach the hDOP of the same epoch (iTOW), if NAV-DOP is enabled"""
+        message['hdop'] = self._dop.get('hdop') if self._dop.get('itow') == message['itow'] else None
+        return message
+
+
+class EmulatedUBXReceiver:
+    """
+    Software u-blox receiver behind a pyserial-like interface (read / write /
+    in_waiting / baudrate). Starts in the factory state - NMEA GGA/GSA/RMC/VTG at
+    1 Hz, 9600 baud - and honours CFG-PRT, CFG-MSG and CFG-RATE.
+    model="neo6m" has no NAV-PVT and a 5 Hz rate limit, like the real NEO-6M.
+    cold_start_s delays the first fix; AID-INI (position + time) together with
+    restored AID-EPH ephemerides cuts it to hot_start_s. AID-EPH / AID-HUI polls
+    are answered.
+    """
+
+    # SVs the emulated receiver tracks (also listed in GSA)
+    SATELLITES = (4, 5, 9, 12, 17, 24, 25, 29, 31)
+
+    def __init__(self, model="neo6m", track=None, baudrate=9600, timeout=1.0,
+                 clock=time.monotonic, cold_start_s=0.0, hot_start_s=1.0):
+        self.model = model
+        self.track = track or self._circle_track   # t -> (lat, lon, speed km/h, heading)
+        self.timeout = timeout
+        self.clock = clock
+        self.lock = threading.Lock()
+
+        self.receiver_baudrate = 9600   # What the receiver transmits at
+        self._host_baudrate = baudrate  # What the host UART is set to
+        self.min_period_ms = 200 if model == "neo6m" else 100
+        self.period_ms = 1000
+        self.rates = {(CLS_NMEA, m): 1 for m in (NMEA_GGA, NMEA_GSA, NMEA_RMC, NMEA_VTG)}
+        self.out_proto = PROTO_UBX | PROTO_NMEA
+
+        self._commands = UBXStreamParser()
+        self._out = bytearray()
+        self._epoch = 0
+        self._next_epoch = clock()
+        self.tx_overflows = 0
+        self.is_open = True
+
+        # Time to first fix
+        self.hot_start_s = hot_start_s
+        self._acquire_at = clock() + cold_start_s
+        self.aided_ini = False
+        self.ephemeris = {}   # svid -> AID-EPH payload (restored or downloaded)
+
+    @staticmethod
+    def _circle_track(t):
+        """~500 m radius loop around Mumbai at 30 km/h"""
+        angle = t * (30 / 3.6) / 500.0
+        lat = 19.0760 + 0.0045 * math.sin(angle)
+        lon = 72.8777 + 0.0047 * (1 - math.cos(angle))
+        return lat, lon, 30.0, (90.0 - math.degrees(angle)) % 360
+
+    # --- pyserial interface ---
+
+    @property
+    def baudrate(self):
+        return self._host_baudrate
+
+    @baudrate.setter
+    def baudrate(self, value):
+        with self.lock:
+            self._host_baudrate = value
+            self._out.clear()
+
+    @property
+    def in_waiting(self):
+        with self.lock:
+            self._generate()
+            return len(self._out)
+
+    def read(self, size=1):
+        deadline = self.clock() + (self.timeout or 0)
+        while True:
+            with self.lock:
+                self._generate()
+                if self._out:
+                    data = bytes(self._out[:size])
+                    del self._out[:size]
+                    if self._host_baudrate != self.receiver_baudrate:
+                        return bytes(b ^ 0x5A for b in data)  # Framing garbage
+                    return data
+                wait = min(deadline, self._next_epoch) - self.clock()
+            if self.clock() >= deadline:
+                return b""
+            time.sleep(max(0.001, wait))
+
+    def write(self, data):
+        if self._host_baudrate != self.receiver_baudrate:
+            return len(data)  # Receiver cannot decode it
+        for message in self._commands.feed(data):
+            if message['type'] != "RAW":
+                continue
+            if message['class'] == CLS_CFG:
+                self._apply_cfg(message['id'], message['payload'])
+            elif message['class'] == CLS_AID:
+                self._apply_aid(message['id'], message['payload'])
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def reset_input_buffer(self):
+        with self.lock:
+            self._out.clear()
+
+    def close(self):
+        self.is_open = False
+
+    # --- receiver behaviour ---
+
+    def _ack(self, msg_id, ok):
+        self._out += ubx_frame(CLS_ACK, ACK_ACK if ok else ACK_NAK, bytes((CLS_CFG, msg_id)))
+
+    def _apply_cfg(self, msg_id, payload):
+        with self.lock:
+            self._generate()
+            if msg_id == CFG_PRT and len(payload) >= _CFG_PRT.size:
+                fields = _CFG_PRT.unpack_from(payload)
+                self._ack(msg_id, True)  # Sent at the old baud rate
+                self.receiver_baudrate = fields[4]
+                self.out_proto = fields[6]
+            elif msg_id == CFG_MSG and len(payload) >= 3:
+                key = (payload[0], payload[1])
+                supported = (key[0] == CLS_NMEA or key in ((CLS_NAV, NAV_POSLLH),
+                             (CLS_NAV, NAV_VELNED), (CLS_NAV, NAV_SOL), (CLS_NAV, NAV_DOP)) or
+                             (key == (CLS_NAV, NAV_PVT) and self.model != "neo6m"))
+                if supported:
+                    self.rates[key] = payload[2]
+                self._ack(msg_id, supported)
+            elif msg_id == CFG_RATE and len(payload) >= _CFG_RATE.size:
+                period = _CFG_RATE.unpack_from(payload)[0]
+                ok = period >= self.min_period_ms
+                if ok:
+                    self.period_ms = period
+                    self._next_epoch = self.clock()
+                self._ack(msg_id, ok)
+            else:
+                self._ack(msg_id, False)
+
+    @property
+    def fixed(self):
+        return self.clock() >= self._acquire_at
+
+    def _apply_aid(self, msg_id, payload):
+        with self.lock:
+            self._generate()
+            if msg_id == AID_INI and len(payload) >= _AID_INI.size:
+                flags = _AID_INI.unpack_from(payload)[-1]
+                self.aided_ini = flags & (AID_INI_POS | AID_INI_TIME) == AID_INI_POS | AID_INI_TIME
+            elif msg_id == AID_EPH and len(payload) == 104:
+                self.ephemeris[struct.unpack_from("<I", payload)[0]] = bytes(payload)
+            elif msg_id == AID_EPH and not payload:
+                # Poll: one frame per SV, 8 bytes when there is no ephemeris
+                have = self.ephemeris if self.fixed else {}
+                for svid in range(1, 33):
+                    self._out += ubx_frame(CLS_AID, AID_EPH, have.get(svid, struct.pack("<II", svid, 0)))
+                return
+            elif msg_id == AID_HUI and not payload:
+                self._out += ubx_frame(CLS_AID, AID_HUI, bytes(72))
+                return
+            if self.aided_ini and len(self.ephemeris) >= 4:
+                self._acquire_at = min(self._acquire_at, self.clock() + self.hot_start_s)
+
+    def _generate(self):
+        now = self.clock()
+        while now >= self._next_epoch:
+            t = self._epoch * self.period_ms / 1000.0
+            epoch = self._epoch_bytes(t)
+            # UART budget: 10 bits per byte; the rest of the epoch is lost
+            budget = int(self.receiver_baudrate / 10 * self.period_ms / 1000.0)
+            if len(epoch) > budget:
+                self.tx_overflows += 1
+                epoch = epoch[:budget]
+            self._out += epoch
+            self._epoch += 1
+            self._next_epoch += self.period_ms / 1000.0
+            if len(self._out) > 65536:
+                del self._out[:-65536]
+
+    def _epoch_bytes(self, t):
+        if not self.fixed:
+            return self._no_fix_bytes(t)
+        if not self.ephemeris:
+            # Downloaded from the satellites once tracking
+            for svid in self.SATELLITES:
+                self.ephemeris[svid] = struct.pack("<II", svid, 0x5A5A00 | svid) + bytes(96)
+        lat, lon, speed, heading = self.track(t)
+        itow = int(t * 1000) % 604800000
+        out = bytearray()
+        rate = self.rates.get
+
+        if self.out_proto & PROTO_UBX:
+            if rate((CLS_NAV, NAV_DOP)):
+                out += ubx_frame(CLS_NAV, NAV_DOP, _DOP.pack(itow, 280, 250, 130, 200, 150, 110, 100))
+            if rate((CLS_NAV, NAV_PVT)):
+                out += ubx_frame(CLS_NAV, NAV_PVT, _PVT.pack(
+                    itow, 2026, 1, 1, 0, 0, int(t) % 60, 0x07, 30, 0, 3, 0x01, 0, 9,
+                    int(lon * 1e7), int(lat * 1e7), 60000, 12000, 2500, 4000, 0, 0, 0,
+                    int(speed / 0.0036), int(heading * 1e5), 300, 50000, 150, 0, 0, 0))
+            if rate((CLS_NAV, NAV_POSLLH)):
+                out += ubx_frame(CLS_NAV, NAV_POSLLH, _POSLLH.pack(
+                    itow, int(lon * 1e7), int(lat * 1e7), 60000, 12000, 2500, 4000))
+            if rate((CLS_NAV, NAV_VELNED)):
+                out += ubx_frame(CLS_NAV, NAV_VELNED, _VELNED.pack(
+                    itow, 0, 0, 0, int(speed / 0.036), int(speed / 0.036),
+                    int(heading * 1e5), 30, 50000))
+            if rate((CLS_NAV, NAV_SOL)):
+                out += ubx_frame(CLS_NAV, NAV_SOL, _SOL.pack(
+                    itow, 0, 2400, 3, 0x0D, 0, 0, 0, 300, 0, 0, 0, 30, 150, 0, 9, 0))
+
+        if self.out_proto & PROTO_NMEA:
+            hhmmss = time.strftime("%H%M%S", time.gmtime(t)) + ".00"
+            la = f"{int(lat):02d}{(lat - int(lat)) * 60:07.4f},N"
+            lo = f"{int(lon):03d}{(lon - int(lon)) * 60:07.4f},E"
+            knots = speed / 1.852
+            # Same order as a u-blox receiver: RMC, VTG, GGA, GSA
+            if rate((CLS_NMEA, NMEA_RMC)):
+                out += build_sentence(f"GPRMC,{hhmmss},A,{la},{lo},{knots:.3f},{heading:.2f},010126,,,A")
+            if rate((CLS_NMEA, NMEA_VTG)):
+                out += build_sentence(f"GPVTG,{heading:.2f},T,,M,{knots:.3f},N,{speed:.3f},K,A")
+            if rate((CLS_NMEA, NMEA_GGA)):
+                out += build_sentence(f"GPGGA,{hhmmss},{la},{lo},1,09,1.5,12.0,M,-64.5,M,,")
+            if rate((CLS_NMEA, NMEA_GSA)):
+                out += build_sentence("GPGSA,A,3,04,05,09,12,17,24,25,29,31,,,,2.5,1.5,2.0")
+        return out
+
+    def _no_fix_bytes(self, t):
+        """Epoch output while still searching for satellites"""
+        itow = int(t * 1000) % 604800000
+        out = bytearray()
+        rate = self.rates.get
+        if self.out_proto & PROTO_UBX:
+            if rate((CLS_NAV, NAV_DOP)):
+                out += ubx_frame(CLS_NAV, NAV_DOP, _DOP.pack(itow, *([9999] * 7)))
+            if rate((CLS_NAV, NAV_PVT)):
+                out += ubx_frame(CLS_NAV, NAV_PVT, _PVT.pack(
+                    itow, 2026, 1, 1, 0, 0, int(t) % 60, 0x00, 0, 0, 0, 0x00, 0, 0,
+                    0, 0, 0, 0, 0xFFFFFFFF, 0xFFFFFFFF, 0, 0, 0, 0, 0, 0, 0, 9999, 0, 0, 0))
+            if rate((CLS_NAV, NAV_POSLLH)):
+                out += ubx_frame(CLS_NAV, NAV_POSLLH, _POSLLH.pack(
+                    itow, 0, 0, 0, 0, 0xFFFFFFFF, 0xFFFFFFFF))
+            if rate((CLS_NAV, NAV_VELNED)):
+                out += ubx_frame(CLS_NAV, NAV_VELNED, _VELNED.pack(itow, 0, 0, 0, 0, 0, 0, 0, 0))
+            if rate((CLS_NAV, NAV_SOL)):
+                out += ubx_frame(CLS_NAV, NAV_SOL, _SOL.pack(
+                    itow, 0, 0, 0, 0x00, 0, 0, 0, 0xFFFFFFFF, 0, 0, 0, 0, 9999, 0, 0, 0))
+        if self.out_proto & PROTO_NMEA:
+            hhmmss = time.strftime("%H%M%S", time.gmtime(t)) + ".00"
+            if rate((CLS_NMEA, NMEA_RMC)):
+                out += build_sentence(f"GPRMC,{hhmmss},V,,,,,,,,,,N")
+            if rate((CLS_NMEA, NMEA_VTG)):
+                out += build_sentence("GPVTG,,,,,,,,,N")
+            if rate((CLS_NMEA, NMEA_GGA)):
+                out += build_sentence(f"GPGGA,{hhmmss},,,,,0,00,99.99,,,,,,")
+            if rate((CLS_NMEA, NMEA_GSA)):
+                out += build_sentence("GPGSA,A,1,,,,,,,,,,,,,99.99,99.99,99.99")
+        return out
@@ -0,0 +1,367 @@
+"""
+Wheel Encoder - Distance from wheel pulses (hall sensor / tone ring)
+Edges are timestamped and queued by the kernel GPIO driver (libgpiod character
+device, or RPi.GPIO edge detection as a fallback); the counting thread drains
+them in batches, so no pulse depends on Python polling. The kernel's per-line
+sequence number is used for counting, so even events dropped from a full
+kernel buffer are still counted. Readers get the cumulative count without a
+lock (single writer, plain int).
+"""
+
+import os
+import json
+import time
+import threading
+from collections import deque
+from datetime import timedelta
+
+try:
+    import gpiod
+    from gpiod.line import Bias, Edge
+    GPIOD_AVAILABLE = True
+except ImportError:
+    GPIOD_AVAILABLE = False
+
+try:
+    import RPi.GPIO as GPIO
+    GPIO_AVAILABLE = True
+except ImportError:
+    GPIO_AVAILABLE = False
+
+EVENT_BUFFER = 1024             # Kernel-side edge queue (events)
+
+
+class GPIODPulseSource:
+    """Falling edges from the gpiod character device, read in batches with kernel timestamps"""
+
+    def __init__(self, pin, chip="/dev/gpiochip0", debounce_us=0, buffer_size=EVENT_BUFFER):
+        settings = gpiod.LineSettings(edge_detection=Edge.FALLING, bias=Bias.PULL_UP)
+        if debounce_us:
+            settings.debounce_period = timedelta(microseconds=debounce_us)
+        self.request = gpiod.request_lines(chip, consumer="ricky-wheel",
+                                           config={pin: settings},
+                                           event_buffer_size=buffer_size)
+
+    def wait(self, timeout):
+        """(last line sequence number, last edge time in monotonic ns, events read), or None"""
+        if not self.request.wait_edge_events(timedelta(seconds=timeout)):
+            return None
+        events = self.request.read_edge_events()
+        if not events:
+            return None
+        last = events[-1]
+        return last.line_seqno, last.timestamp_ns, len(events)
+
+    def close(self):
+        try:
+            self.request.release()
+        except Exception:
+            pass
+
+
+class GPIOPulseSource:
+    """
+    RPi.GPIO fallback: the library's edge thread calls back once per pulse
+    (it is the only writer of the count); wait() just reports progress.
+    """
+
+    def __init__(self, pin, gpio):
+        self.pin = pin
+        self.gpio = gpio
+        self._seqno = 0
+        self._last_ns = 0
+        self._seen = 0
+        self._event = threading.Event()
+        self.gpio.setmode(self.gpio.BCM)
+        self.gpio.setup(self.pin, self.gpio.IN, pull_up_down=self.gpio.PUD_UP)
+        self.gpio.add_event_detect(self.pin, self.gpio.FALLING, callback=self._on_edge)
+
+    def _on_edge(self, channel):
+        self._last_ns = time.monotonic_ns()
+        self._seqno += 1
+        self._event.set()
+
+    def wait(self, timeout):
+        if not self._event.wait(timeout):
+            return None
+        self._event.clear()
+        seqno = self._seqno
+        events = seqno - self._seen
+        self._seen = seqno
+        return seqno, self._last_ns, events
+
+    def close(self):
+        try:
+            self.gpio.remove_event_detect(self.pin)
+            self.gpio.cleanup(self.pin)
+        except Exception:
+            pass
+        self._event.set()
+
+
+class SimulatedPulseSource:
+    """
+    Stand-in for the kernel edge queue. A generator thread emits pulses at
+    rate_hz (or set_speed()) in real time into a bounded buffer that drops
+    events when full, exactly like the kernel FIFO - while still advancing
+    the sequence number.
+    """
+
+    def __init__(self, rate_hz=0.0, buffer_size=EVENT_BUFFER):
+        self.rate_hz = rate_hz
+        self.buffer = deque()
+        self.buffer_size = buffer_size
+        self.cond = threading.Condition()
+        self.seqno = 0              # Edges generated
+        self.dropped = 0            # Edges lost to a full buffer
+        self.running = True
+        self.thread = threading.Thread(target=self._generate, name="pulse_generator", daemon=True)
+        self.thread.start()
+
+    def set_rate(self, rate_hz):
+        self.rate_hz = rate_hz
+
+    def set_speed(self, speed_kmh, circumference_m, pulses_per_rev):
+        self.rate_hz = speed_kmh / 3.6 / circumference_m * pulses_per_rev
+
+    def _generate(self):
+        due = 0.0
+        last = time.monotonic()
+        while self.running:
+            time.sleep(0.0005)
+            now = time.monotonic()
+            due += self.rate_hz * (now - last)
+            last = now
+            count = int(due)
+            if not count:
+                continue
+            due -= count
+            now_ns = time.monotonic_ns()
+            with self.cond:
+                for _ in range(count):
+                    self.seqno += 1
+                    if len(self.buffer) < self.buffer_size:
+                        self.buffer.append((self.seqno, now_ns))
+                    else:
+                        self.dropped += 1
+                self.cond.notify()
+
+    def wait(self, timeout):
+        with self.cond:
+            if not self.buffer and not self.cond.wait_for(lambda: self.buffer or not self.running, timeout):
+                return None
+            if not self.buffer:
+                return None
+            events = list(self.buffer)
+            self.buffer.clear()
+        seqno, timestamp_ns = events[-1]
+        return seqno, timestamp_ns, len(events)
+
+    def close(self):
+        self.running = False
+        with self.cond:
+            self.cond.notify_all()
+
+
+class WheelEncoder:
+    def __init__(self, pin=17, pulses_per_rev=1, circumference_m=1.35, chip="/dev/gpiochip0",
+                 debounce_us=0, source=None, calibration_path=None):
+        self.pin = pin
+        self.pulses_per_rev = pulses_per_rev
+        self.circumference_m = circumference_m  # Rolling circumference (calibrated against GPS)
+        self.nominal_circumference_m = circumference_m
+        self.chip = chip
+        self.debounce_us = debounce_us
+        self.source = source
+        self.calibration_path = calibration_path
+        self.calibration = None
+
+        # Written by the counting thread only
+        self.pulses = 0
+        self.last_pulse_ns = None
+        self.wakeups = 0
+        self.events_read = 0
+        self._base_seqno = None
+
+        self.running = False
+        self.thread = None
+        self._load_calibration()
+
+    def _load_calibration(self):
+        if not self.calibration_path:
+            return
+        try:
+            with open(self.calibration_path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Wheel calibration unreadable, using nominal: {e}")
+            return
+        if data.get('pulses_per_rev') == self.pulses_per_rev and data.get('circumference_m'):
+            self.circumference_m = data['circumference_m']
+            self.calibration = data
+            print(f"🛞 Wheel circumference {self.circumference_m:.4f} m (calibrated)")
+
+    def _open_source(self):
+        if GPIOD_AVAILABLE:
+            return GPIODPulseSource(self.pin, self.chip, self.debounce_us)
+        if GPIO_AVAILABLE:
+            return GPIOPulseSource(self.pin, GPIO)
+        return None
+
+    def start(self):
+        if self.source is None:
+            try:
+                self.source = self._open_source()
+            except Exception as e:
+                print(f"⚠️ Wheel encoder setup failed: {e}")
+                self.source = None
+        if self.source is None:
+            print("⚠️ No GPIO edge source - wheel encoder disabled")
+            return False
+        self.running = True
+        self.thread = threading.Thread(target=self._count_loop, name="wheel_encoder", daemon=True)
+        self.thread.start()
+        print(f"🛞 Wheel encoder on GPIO {self.pin} ({self.pulses_per_rev} pulses/rev, "
+              f"{self.circumference_m:.3f} m)")
+        return True
+
+    def stop(self):
+        self.running = False
+        if self.source:
+            self.source.close()
+        if self.thread:
+            self.thread.join(timeout=1.0)
+
+    def _count_loop(self):
+        while self.running:
+            try:
+                batch = self.source.wait(0.5)
+            except Exception as e:
+                print(f"❌ Wheel encoder error: {e}")
+                time.sleep(1)
+                continue
+            if batch is None:
+                continue
+            seqno, timestamp_ns, events = batch
+            if self._base_seqno is None:
+                self._base_seqno = seqno - events
+            # Sequence numbers also count edges the kernel had to drop
+            self.pulses = seqno - self._base_seqno
+            self.last_pulse_ns = timestamp_ns
+            self.wakeups += 1
+            self.events_read += events
+
+    # --- Readers (any thread, no lock) ---
+
+    def distance_km(self):
+        """Cumulative distance since start"""
+        return self.pulses * self.circumference_m / self.pulses_per_rev / 1000.0
+
+    def has_signal(self, window_s=300.0):
+        """
+        Trustworthy as a distance source: calibrated against GPS, or pulsed
+        within window_s. A running encoder on an unwired pin is neither.
+        """
+        if not self.running:
+            return False
+        if self.calibration is not None:
+            return True
+        # Edge timestamps are CLOCK_MONOTONIC (gpiod and the fallbacks alike)
+        last = self.last_pulse_ns
+        return last is not None and time.monotonic_ns() - last <= window_s * 1e9
+
+    # --- Calibration ---
+
+    def calibrate(self, gps_manager, distance_km=1.0, timeout_s=900.0, min_speed_kmh=10.0,
+                  max_hdop=2.0, max_change=0.2):
+        """
+        Drive at least distance_km on good GPS and fit the circumference to it.
+        Only spans between two consecutive good fixes count (moving, low HDOP),
+        so stops and poor-signal stretches don't bias the result. Blocking.
+        """
+        deadline = time.monotonic() + timeout_s
+        seq = gps_manager.get_fix().seq
+        previous = None
+        gps_m = 0.0
+        pulses = 0
+        print(f"🛞 Calibrating wheel against GPS over {distance_km:g} km...")
+        while gps_m < distance_km * 1000.0 and time.monotonic() < deadline:
+            fix = gps_manager.wait_for_fix(seq, timeout=2.0)
+            count = self.pulses
+            if fix is None:
+                previous = None
+                continue
+            seq = fix.seq
+            good = (fix.fix and fix.lat is not None and fix.speed >= min_speed_kmh
+                    and (fix.hdop is None or fix.hdop <= max_hdop))
+            if good and previous is not None:
+                step_m = (fix.distance - previous[0]) * 1000.0
+                if step_m >= 0:  # Trip counters were not reset in between
+                    gps_m += step_m
+                    pulses += count - previous[1]
+            previous = (fix.distance, count) if good else None
+
+        result = {
+            'gps_km': round(gps_m / 1000.0, 4),
+            'pulses': pulses,
+            'previous_m': self.circumference_m,
+        }
+        if gps_m < distance_km * 1000.0 or not pulses:
+            result['status'] = "incomplete"
+            print(f"⚠️ Wheel calibration incomplete ({gps_m:.0f} m, {pulses} pulses)")
+            return result
+
+        circumference = gps_m / pulses * self.pulses_per_rev
+        change = circumference / self.nominal_circumference_m - 1.0
+        result.update({'circumference_m': round(circumference, 5),
+                       'change_pct': round(change * 100, 2)})
+        if abs(change) > max_change:
+            result['status'] = "rejected"
+            print(f"⚠️ Wheel calibration rejected: {circumference:.4f} m is "
+                  f"{change * 100:+.1f}% from nominal")
+            return result
+
+        self.circumference_m = circumference
+        result['status'] = "ok"
+        self.calibration = {
+            'pulses_per_rev': self.pulses_per_rev,
+            'circumference_m': circumference,
+            'gps_km': result['gps_km'],
+            'pulses': pulses,
+            'wall_time': time.time(),
+        }
+        self._save_calibration()
+        print(f"✅ Wheel circumference calibrated: {circumference:.4f} m ({change * 100:+.1f}%)")
+        return result
+
+    def calibrate_in_background(self, gps_manager, **kwargs):
+        """Run calibrate() on its own thread (it waits for a good-GPS drive)"""
+        thread = threading.Thread(target=self.calibrate, args=(gps_manager,), kwargs=kwargs,
+                                  name="wheel_calibration", daemon=True)
+        thread.start()
+        return thread
+
+    def _save_calibration(self):
+        if not self.calibration_path:
+            return
+        try:
+            tmp_path = self.calibration_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.calibration, f)
+            os.replace(tmp_path, self.calibration_path)
+        except OSError as e:
+            print(f"⚠️ Wheel calibration save failed: {e}")
+
+    def get_status(self):
+        return {
+            'active': self.running,
+            'pin': self.pin,
+            'pulses': self.pulses,
+            'distance_km': round(self.distance_km(), 4),
+            'pulses_per_rev': self.pulses_per_rev,
+            'circumference_m': round(self.circumference_m, 5),
+            'calibrated': self.calibration is not None,
+            'events_per_wakeup': round(self.events_read / self.wakeups, 1) if self.wakeups else 0,
+        }
@@ -1,5 +1,6 @@
 """
 Graph Widget - Draws live sensor data (G-Force) with Red Spikes
+Updated: Draws per-frame min/max envelopes so short impacts stay visible
 """
 from PyQt5.QtWidgets import QWidget
 from PyQt5.QtGui import QPainter, QPen, QColor, QFont
@@ -7,17 +8,23 @@ from PyQt5.QtCore import Qt
 from collections import deque
 
 class SensorGraphWidget(QWidget):
-    def __init__(self, max_points=100):
+    def __init__(self, max_points=150):
         super().__init__()
         self.max_points = max_points
         # Initialize with 1.0G (standard gravity)
         self.data = deque([1.0] * max_points, maxlen=max_points)
+        # Per-frame envelope: (min, max) G for each point
+        self.envelope = deque([(1.0, 1.0)] * max_points, maxlen=max_points)
         self.setMinimumHeight(120)
         self.setStyleSheet("background-color: #000; border-top: 1px solid #333;")
 
     def update_value(self, value):
-        self.data.append(value)
-        self.update() # Trigger repaint
+        self.update_frame(value, value, value)
+
+    def update_frame(self, min_g, max_g, last_g):
+        self.data.append(last_g)
+        self.envelope.append((min_g, max_g))
+        self.update() # Trigger repaint (Qt coalesces pending repaints)
 
     def paintEvent(self, event):
         painter = QPainter(self)
@@ -47,9 +54,9 @@ class SensorGraphWidget(QWidget):
         scale_y = h / 4.0  
         step_x = w / (self.max_points - 1)
         
-        # Determine Color (Red if crash spike > 2.5G, else Green)
-        current_g = self.data[-1]
-        if current_g > 2.5:
+        # Determine Color (Red if crash spike > 2.5G in the recent frames, else Green)
+        recent_max = max(high for _, high in list(self.envelope)[-5:])
+        if recent_max > 2.5:
             line_color = QColor("#FF0000") # Red Spike
             line_width = 3
         else:
@@ -73,3 +80,13 @@ class SensorGraphWidget(QWidget):
             y2 = int(h - (val2 * scale_y))
             
             painter.drawLine(x1, y1, x2, y2)
+
+        # 5. Draw min/max envelope where a frame spread beyond its last value
+        spike_pen = QPen(QColor("#FF0000"))
+        spike_pen.setWidth(2)
+        for i, (low, high) in enumerate(self.envelope):
+            if high - low < 0.05:
+                continue
+            x = int(i * step_x)
+            painter.setPen(spike_pen if high > 2.5 else path_pen)
+            painter.drawLine(x, int(h - min(low, 4.0) * scale_y), x, int(h - min(high, 4.0) * scale_y))
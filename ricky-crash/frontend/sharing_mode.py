@@ -1,9 +1,10 @@
 """
 Sharing Mode UI - Ricky Theme
 Individual seat cards - Screen Fit / Auto-Scaling
+Updated: Any seat count (two rows of cards above four seats)
 """
 
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, 
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
                            QLabel, QFrame, QSizePolicy)
 from PyQt5.QtCore import Qt, pyqtSlot
 
@@ -15,9 +16,10 @@ ACCENT_GOLD = "#FFD700"
 TEXT_SUB = "#8E8E93"
 
 class PassengerCard(QFrame):
-    def __init__(self, passenger_id):
+    def __init__(self, passenger_id, compact=False):
         super().__init__()
         self.passenger_id = passenger_id
+        self.compact = compact  # Smaller minimum size when cards share two rows
         self.setup_ui()
     
     def setup_ui(self):
@@ -28,8 +30,8 @@ class PassengerCard(QFrame):
         self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         
         # Set a minimum size to prevent crushing on very small screens
-        self.setMinimumWidth(220)
-        self.setMinimumHeight(180)
+        self.setMinimumWidth(120 if self.compact else 220)
+        self.setMinimumHeight(140 if self.compact else 180)
         
         layout = QVBoxLayout()
         layout.setSpacing(10)
@@ -109,21 +111,23 @@ class PassengerCard(QFrame):
         self.stats_lbl.setText(f"{distance:.1f} km")
 
 class SharingModeWidget(QWidget):
-    def __init__(self):
+    def __init__(self, seats=3):
         super().__init__()
+        self.seats = seats
         self.cards = []
         self.setup_ui()
     
     def setup_ui(self):
-        # Use QHBoxLayout to arrange columns side-by-side
-        layout = QHBoxLayout()
+        # Cards side-by-side; more than four seats wrap onto a second row
+        layout = QGridLayout()
         layout.setSpacing(15)
         layout.setContentsMargins(10, 5, 10, 5) # Minimal margins to maximize screen usage
+        columns = self.seats if self.seats <= 4 else (self.seats + 1) // 2
         
-        for i in range(3):
-            card = PassengerCard(i + 1)
+        for i in range(self.seats):
+            card = PassengerCard(i + 1, compact=self.seats > 4)
             self.cards.append(card)
-            layout.addWidget(card)
+            layout.addWidget(card, i // columns, i % columns)
         
         # Main layout container
         main_layout = QVBoxLayout()
@@ -138,7 +142,7 @@ class SharingModeWidget(QWidget):
         self.setLayout(main_layout)
 
     def update_passenger(self, pid, onboard):
-        if 0 <= pid < 3:
+        if 0 <= pid < self.seats:
             try:
                 curr_fare = float(self.cards[pid].fare_lbl.text().replace('₹',''))
             except:
@@ -146,12 +150,12 @@ class SharingModeWidget(QWidget):
             self.cards[pid].update_data(curr_fare, onboard)
 
     def update_fare(self, pid, fare):
-        if 0 <= pid < 3:
+        if 0 <= pid < self.seats:
             self.cards[pid].update_data(fare, True)
 
     def update_total_info(self, total_dist, wait_time):
         self.info_lbl.setText(f"TRIP: {total_dist:.1f} km • WAITING: {wait_time} min")
 
     def update_card_live_data(self, pid, distance):
-        if 0 <= pid < 3:
+        if 0 <= pid < self.seats:
             self.cards[pid].update_live_info(distance)
\ No newline at end of file
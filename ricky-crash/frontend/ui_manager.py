@@ -1,6 +1,8 @@
 """
 UI Manager - Ricky Theme (Split Screen Layout)
 Updated: Added Countdown Animation & SOS Locking Logic
+Updated: For Hire status reads one GPSFix snapshot
+Updated: Seat cards follow the configured seat count and read a seat snapshot
 """
 
 import sys
@@ -140,7 +142,7 @@ class RickyUI(QMainWindow):
         left_layout = QVBoxLayout(self.left_panel)
         
         self.mode_stack = QStackedWidget()
-        self.sharing_widget = SharingModeWidget()
+        self.sharing_widget = SharingModeWidget(self.fare_calculator.seat_count)
         self.private_widget = PrivateModeWidget()
         self.for_hire_widget = self.create_placeholder("🚕 FOR HIRE", "Ready")
         self.waiting_widget = self.create_placeholder("⏸️ WAITING", "Break")
@@ -187,6 +189,10 @@ class RickyUI(QMainWindow):
     def update_graph_data(self, g):
         if hasattr(self, 'sensor_graph'): self.sensor_graph.update_value(g)
 
+    @pyqtSlot(float, float, float)
+    def update_graph_frame(self, min_g, max_g, last_g):
+        if hasattr(self, 'sensor_graph'): self.sensor_graph.update_frame(min_g, max_g, last_g)
+
     def setup_connections(self):
         self.gps_manager.speed_updated.connect(lambda s: setattr(self, 'current_speed', s))
         self.fare_calculator.distance_updated.connect(self._on_dist)
@@ -242,9 +248,13 @@ class RickyUI(QMainWindow):
         s = self.fare_calculator.get_real_time_stats()
         if self.current_mode == "Sharing":
             self.sharing_widget.update_total_info(s['total_distance'], int(s['trip_duration']))
-            for i in range(3):
-                if self.fare_calculator.passengers[i]['onboard']:
-                    self.sharing_widget.update_card_live_data(i, self.fare_calculator.passengers[i]['total_distance'])
+            seats = self.fare_calculator.get_seat_snapshot()
+            for i, onboard in enumerate(seats['onboard']):
+                if onboard:
+                    self.sharing_widget.update_card_live_data(i, seats['distance'][i])
         elif self.current_mode == "For Hire":
             if hasattr(self, 'for_hire_subtitle'):
-                self.for_hire_subtitle.setText(f"GPS Locked • {s['current_speed']:.1f} km/h")
+                if s['gps_fix']:
+                    self.for_hire_subtitle.setText(f"GPS Locked • {s['current_speed']:.1f} km/h")
+                else:
+                    self.for_hire_subtitle.setText("Waiting for GPS fix…")
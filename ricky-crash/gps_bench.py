@@ -0,0 +1,717 @@
+#!/usr/bin/env python3
+"""
+GPS Pipeline Benchmark
+Measures NMEA parsing throughput on a recorded (raw serial bytes) or synthetic
+stream, comparing the old readline()/split() loop with the streaming parser.
+
+Examples:
+    python gps_bench.py nmea --synthetic 3600
+    python gps_bench.py nmea capture.nmea --chunk 64
+    python gps_bench.py ubx --fixes 20000
+    python gps_bench.py filter --synthetic 3600
+    python gps_bench.py geodesy --points 100000
+    python gps_bench.py replay captures/ --speed 0
+    python gps_bench.py history --queries 100000
+    python gps_bench.py simulate route.gpx --minutes 30 --multiplier 0
+    python gps_bench.py deadreckon --outage 30 60 120
+    python gps_bench.py wheel --rates 1000 10000 100000
+"""
+
+import io
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from backend.nmea_parser import NMEAStreamParser, build_sentence
+from backend import ubx_protocol as ubx
+from backend.gps_filter import PositionKalmanFilter
+from backend import geodesy
+from backend.position_history import PositionHistory
+
+
+def _nmea_coord(value, positive, negative, width):
+    hemisphere = positive if value >= 0 else negative
+    value = abs(value)
+    degrees = int(value)
+    return f"{degrees:0{width}d}{(value - degrees) * 60:07.4f}", hemisphere
+
+
+def synthetic_nmea(seconds=600, rate_hz=1, talker="GP", seed=1):
+    """One NEO-6M style epoch (GGA, GSA, GSV x3, RMC, VTG) per fix around Mumbai"""
+    rng = random.Random(seed)
+    out = bytearray()
+    lat, lon = 19.0760, 72.8777
+    heading = 45.0
+    for i in range(int(seconds * rate_hz)):
+        t = i / rate_hz
+        speed = max(0.0, 25 + 10 * math.sin(t / 60.0) + rng.gauss(0, 1))
+        heading = (heading + rng.gauss(0, 2)) % 360
+        step = speed / 3.6 / rate_hz / 111320.0
+        lat += step * math.cos(math.radians(heading))
+        lon += step * math.sin(math.radians(heading)) / math.cos(math.radians(lat))
+
+        hhmmss = time.strftime("%H%M%S", time.gmtime(t)) + f".{int(t * 100) % 100:02d}"
+        la, ns = _nmea_coord(lat, "N", "S", 2)
+        lo, ew = _nmea_coord(lon, "E", "W", 3)
+        sats = rng.randint(6, 11)
+        knots = speed / 1.852
+        out += build_sentence(f"{talker}GGA,{hhmmss},{la},{ns},{lo},{ew},1,{sats:02d},1.1,"
+                              f"{rng.uniform(10, 20):.1f},M,-64.5,M,,")
+        out += build_sentence(f"{talker}GSA,A,3,04,05,09,12,17,24,25,,,,,,2.1,1.1,1.8")
+        for n in range(1, 4):
+            sats_field = ",".join(f"{rng.randint(1, 32):02d},{rng.randint(5, 85):02d},"
+                                  f"{rng.randint(0, 359):03d},{rng.randint(20, 45):02d}"
+                                  for _ in range(4))
+            out += build_sentence(f"GPGSV,3,{n},12,{sats_field}")
+        out += build_sentence(f"{talker}RMC,{hhmmss},A,{la},{ns},{lo},{ew},{knots:.3f},"
+                              f"{heading:.2f},170326,,,A")
+        out += build_sentence(f"{talker}VTG,{heading:.2f},T,,M,{knots:.3f},N,{speed:.3f},K,A")
+    return bytes(out)
+
+
+class ReplayPort:
+    """Serial port stand-in over a byte string (pyserial read/in_waiting semantics)"""
+
+    def __init__(self, data, chunk=256):
+        self.data = memoryview(data)
+        self.pos = 0
+        self.chunk = chunk  # Bytes the UART driver has buffered per read
+
+    @property
+    def in_waiting(self):
+        return min(self.chunk, len(self.data) - self.pos)
+
+    def read(self, size=1):
+        out = bytes(self.data[self.pos:self.pos + size])
+        self.pos += len(out)
+        return out
+
+    def readline(self):
+        # pyserial's readline() is read_until(): one read(1) call per byte
+        line = bytearray()
+        while True:
+            c = self.read(1)
+            if not c:
+                break
+            line += c
+            if c == b"\n":
+                break
+        return bytes(line)
+
+
+def legacy_parse(data, used=None):
+    """The original GPSManager._serial_loop: readline, decode, split, $GP only"""
+    port = ReplayPort(data)
+    count = 0
+    for raw in iter(port.readline, b""):
+        line = raw.decode("ascii", errors="replace").strip()
+        try:
+            if line.startswith("$GPGGA"):
+                parts = line.split(",")
+                if len(parts) < 15 or not parts[2] or not parts[4] or parts[6] == '0':
+                    continue
+                lat = float(parts[2][:2]) + float(parts[2][2:]) / 60.0
+                lon = float(parts[4][:3]) + float(parts[4][3:]) / 60.0
+                alt = float(parts[9]) if parts[9] else 0.0
+                sats = int(parts[7]) if parts[7] else 0
+            elif line.startswith("$GPVTG"):
+                parts = line.split(",")
+                if len(parts) <= 7 or not parts[7]:
+                    continue
+                speed = float(parts[7])
+            elif line.startswith("$GPGSA"):
+                parts = line.split(",")
+                if len(parts) <= 2:
+                    continue
+            else:
+                continue
+        except Exception:
+            continue
+        count += 1
+        if used is not None:
+            used.add(line)
+    return count
+
+
+def streaming_parse(data, chunk, types=None):
+    parser = NMEAStreamParser(types=types)
+    port = ReplayPort(data, chunk)
+    count = 0
+    while port.in_waiting:
+        count += len(parser.read_from(port))
+    return count, parser
+
+
+def corrupt(data, rate, seed=2):
+    """Flip one byte in roughly `rate` of the sentences (UART noise)"""
+    rng = random.Random(seed)
+    out = bytearray(data)
+    for i in range(len(out)):
+        if out[i] == 0x24 and rng.random() < rate:  # '$'
+            j = i + rng.randint(7, 40)
+            if j < len(out) and out[j] not in (0x0D, 0x0A, 0x24, 0x2A):
+                out[j] ^= 0x04
+    return bytes(out)
+
+
+def _timed(func, *args, repeat=3):
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench_nmea(args):
+    if args.inputs:
+        streams = []
+        for path in args.inputs:
+            with open(path, "rb") as f:
+                streams.append((os.path.basename(path), f.read()))
+    else:
+        streams = [(f"synthetic-{args.synthetic / 60:.0f}min",
+                    synthetic_nmea(args.synthetic, talker=args.talker))]
+
+    reports = []
+    for name, data in streams:
+        sentences = data.count(b"\n")
+        legacy_s, legacy_count = _timed(legacy_parse, data)
+        # Same three sentence types as the old loop, then everything GPSManager decodes
+        core_s, _ = _timed(streaming_parse, data, args.chunk, (b"GGA", b"VTG", b"GSA"))
+        stream_s, (stream_count, parser) = _timed(streaming_parse, data, args.chunk)
+        _, (_, noisy) = _timed(streaming_parse, corrupt(data, args.corrupt), args.chunk, repeat=1)
+        # Corrupted sentences the old loop would have acted on
+        clean_lines = set(data.decode("ascii", errors="replace").split("\r\n"))
+        noisy_used = set()
+        legacy_parse(corrupt(data, args.corrupt), noisy_used)
+        noisy_legacy = len(noisy_used - clean_lines)
+        reports.append({
+            'stream': name,
+            'bytes': len(data),
+            'sentences': sentences,
+            'legacy_sentences_per_sec': round(sentences / legacy_s),
+            'legacy_used': legacy_count,
+            'streaming_sentences_per_sec': round(sentences / core_s),
+            'speedup_x': round(legacy_s / core_s, 2),
+            'streaming_all_sentences_per_sec': round(sentences / stream_s),
+            'streaming_all_used': stream_count,
+            'streaming_all_mb_per_sec': round(len(data) / stream_s / 1e6, 2),
+            'us_per_sentence': round(stream_s * 1e6 / sentences, 2) if sentences else None,
+            'corrupt_rate': args.corrupt,
+            'corrupt_rejected': noisy.checksum_errors + noisy.malformed,
+            'corrupt_accepted_by_legacy': noisy_legacy,
+        })
+    return reports
+
+
+def _receiver_output(model, messages, fixes, rate_hz):
+    """Bytes an emulated receiver sends for `fixes` epochs with only `messages` enabled"""
+    rx = ubx.EmulatedUBXReceiver(model=model)
+    rx.rates = {key: 1 for key in messages}
+    rx.out_proto = ubx.PROTO_UBX | ubx.PROTO_NMEA
+    return b"".join(bytes(rx._epoch_bytes(i / rate_hz)) for i in range(fixes))
+
+
+def bench_ubx(args):
+    nmea = [(ubx.CLS_NMEA, m) for m in (ubx.NMEA_GGA, ubx.NMEA_GSA, ubx.NMEA_RMC, ubx.NMEA_VTG)]
+    # NAV-DOP rides along with every UBX solution (hDOP for the quality gates)
+    neo6 = [(ubx.CLS_NAV, m) for m in (ubx.NAV_POSLLH, ubx.NAV_VELNED, ubx.NAV_SOL, ubx.NAV_DOP)]
+    pvt = [(ubx.CLS_NAV, m) for m in (ubx.NAV_PVT, ubx.NAV_DOP)]
+    configs = [
+        ("nmea GGA+GSA+RMC+VTG", "neo6m", nmea, NMEAStreamParser, 1),
+        ("ubx NEO-6M POSLLH+VELNED+SOL+DOP", "neo6m", neo6, ubx.UBXStreamParser, 5),
+        ("ubx NAV-PVT+DOP", "m8", pvt, ubx.UBXStreamParser, 10),
+    ]
+    reports = []
+    for name, model, messages, parser_cls, max_rate in configs:
+        data = _receiver_output(model, messages, args.fixes, max_rate)
+        bytes_per_fix = len(data) / args.fixes
+
+        def run():
+            parser = parser_cls()
+            port = ReplayPort(data, args.chunk)
+            while port.in_waiting:
+                parser.read_from(port)
+            return parser
+
+        elapsed, _ = _timed(run)
+        reports.append({
+            'stream': name,
+            'fixes': args.fixes,
+            'bytes_per_fix': round(bytes_per_fix, 1),
+            'us_per_fix': round(elapsed * 1e6 / args.fixes, 2),
+            'max_rate_hz_at_9600': round(960 / bytes_per_fix, 1),
+            'max_rate_hz_at_115200': round(11520 / bytes_per_fix, 1),
+            'nav_rate_hz': max_rate,
+        })
+    return reports
+
+
+def noisy_drive(seconds=3600, rate_hz=1, stop_every_s=600, stop_s=180, sigma_m=3.0, seed=3):
+    """
+    Ground-truth drive with regular stops and GGA+VTG output carrying realistic
+    error: slowly wandering (Gauss-Markov, tau 30 s) plus white position noise.
+    Returns (nmea bytes, true distance km, [(start_s, end_s) of stops]).
+    """
+    rng = random.Random(seed)
+    lat, lon, heading = 19.0760, 72.8777, 30.0
+    m_per_deg = 111320.0
+    drift_e = drift_n = 0.0
+    alpha = math.exp(-1.0 / (30.0 * rate_hz))
+    truth_km = 0.0
+    stops = []
+    out = bytearray()
+    for i in range(int(seconds * rate_hz)):
+        t = i / rate_hz
+        phase = t % stop_every_s
+        stopped = phase >= stop_every_s - stop_s
+        if stopped and not (stops and stops[-1][1] > t):
+            stops.append((t, t + stop_s))
+        speed = 0.0 if stopped else max(3.0, 25 + 10 * math.sin(t / 45.0))
+        if not stopped:
+            heading = (heading + rng.gauss(0, 1.5)) % 360
+            step = speed / 3.6 / rate_hz
+            truth_km += step / 1000.0
+            lat += step * math.cos(math.radians(heading)) / m_per_deg
+            lon += step * math.sin(math.radians(heading)) / (m_per_deg * math.cos(math.radians(lat)))
+
+        drift_e = alpha * drift_e + rng.gauss(0, sigma_m * math.sqrt(1 - alpha * alpha))
+        drift_n = alpha * drift_n + rng.gauss(0, sigma_m * math.sqrt(1 - alpha * alpha))
+        m_lat = lat + (drift_n + rng.gauss(0, sigma_m / 2)) / m_per_deg
+        m_lon = lon + (drift_e + rng.gauss(0, sigma_m / 2)) / (m_per_deg * math.cos(math.radians(lat)))
+        m_speed = abs(speed + rng.gauss(0, 0.4))
+        m_course = (heading + rng.gauss(0, 2 if speed else 90)) % 360
+
+        hhmmss = time.strftime("%H%M%S", time.gmtime(t)) + f".{int(t * 100) % 100:02d}"
+        la, ns = _nmea_coord(m_lat, "N", "S", 2)
+        lo, ew = _nmea_coord(m_lon, "E", "W", 3)
+        out += build_sentence(f"GPGGA,{hhmmss},{la},{ns},{lo},{ew},1,08,1.0,14.0,M,-64.5,M,,")
+        out += build_sentence(f"GPVTG,{m_course:.2f},T,,M,{m_speed / 1.852:.3f},N,{m_speed:.3f},K,A")
+    return bytes(out), truth_km, stops
+
+
+def bench_filter(args):
+    from backend.gps_manager import GPSManager
+
+    data, truth_km, stops = noisy_drive(args.synthetic, args.rate, sigma_m=args.sigma)
+    stop_seconds = sum(end - start for start, end in stops)
+    reports = []
+    for use_filter in (False, True):
+        gps = GPSManager(force_simulation=True, use_filter=use_filter)
+        parser = NMEAStreamParser()
+        port = ReplayPort(data, 256)
+        phantom_raw = phantom_filtered = 0.0
+        fix = 0
+        stop_index = 0
+        in_stop = False
+        at_stop = (0.0, 0.0)
+        started = time.perf_counter()
+        while port.in_waiting:
+            for message in parser.read_from(port):
+                gps._handle_nmea(message)
+                if message['type'] != "GGA":
+                    continue
+                t = fix / args.rate
+                fix += 1
+                if stop_index < len(stops) and not in_stop and t >= stops[stop_index][0]:
+                    in_stop = True
+                    at_stop = (gps.raw_distance_traveled, gps.total_distance_traveled)
+                elif in_stop and t >= stops[stop_index][1]:
+                    in_stop = False
+                    stop_index += 1
+                    phantom_raw += gps.raw_distance_traveled - at_stop[0]
+                    phantom_filtered += gps.total_distance_traveled - at_stop[1]
+        elapsed = time.perf_counter() - started
+
+        distance = gps.total_distance_traveled
+        report = {
+            'stream': f"{'kalman' if use_filter else 'raw'} ({args.synthetic / 60:.0f} min, "
+                      f"{args.rate:g} Hz, {args.sigma:g} m)",
+            'true_km': round(truth_km, 3),
+            'billed_km': round(distance, 3),
+            'error_pct': round((distance - truth_km) * 100.0 / truth_km, 2),
+            'stopped_minutes': round(stop_seconds / 60.0, 1),
+            'phantom_km_while_stopped': round(phantom_filtered if use_filter else phantom_raw, 3),
+            'us_per_fix_pipeline': round(elapsed * 1e6 / fix, 2),
+        }
+        if use_filter:
+            report['raw_km_same_run'] = round(gps.raw_distance_traveled, 3)
+            report['outliers_rejected'] = gps.filter.outliers
+        reports.append(report)
+
+    # Filter cost alone
+    kf = PositionKalmanFilter()
+    n = 100000
+    started = time.perf_counter()
+    for i in range(n):
+        kf.update(19.0 + i * 1e-7, 72.0, i * 0.2, 4.0)
+    reports[-1]['us_per_filter_update'] = round((time.perf_counter() - started) * 1e6 / n, 2)
+    return reports
+
+
+def legacy_distance(lat1, lon1, lat2, lon2):
+    """GPSManager.calculate_distance before the geodesy module"""
+    if not all([lat1, lon1, lat2, lon2]):
+        return 0.0
+    try:
+        R = 6371.0
+        lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
+        dlat = lat2 - lat1
+        dlon = lon2 - lon1
+        a = math.sin(dlat/2)**2 + math.cos(lat1)*math.cos(lat2)*math.sin(dlon/2)**2
+        return 2 * R * math.asin(math.sqrt(a))
+    except Exception:
+        return 0.0
+
+
+def bench_geodesy(args):
+    rng = random.Random(4)
+    lats, lons, times = [19.0760], [72.8777], [0.0]
+    for i in range(1, args.points):
+        lats.append(lats[-1] + rng.gauss(0, 2e-5))
+        lons.append(lons[-1] + rng.gauss(0, 2e-5))
+        times.append(i * 0.2)
+    n = args.points
+
+    def loop_legacy():
+        total = 0.0
+        for i in range(n - 1):
+            total += legacy_distance(lats[i], lons[i], lats[i + 1], lons[i + 1])
+        return total
+
+    def loop_scalar():
+        total = 0.0
+        haversine = geodesy.haversine_km
+        for i in range(n - 1):
+            total += haversine(lats[i], lons[i], lats[i + 1], lons[i + 1])
+        return total
+
+    def vectorized():
+        odometer = geodesy.cumulative_distance_km(lats, lons)
+        geodesy.segment_bearings_deg(lats, lons)
+        geodesy.segment_speeds_kmh(lats, lons, times)
+        return float(odometer[-1])
+
+    legacy_s, legacy_km = _timed(loop_legacy)
+    scalar_s, scalar_km = _timed(loop_scalar)
+    vector_s, vector_km = _timed(vectorized)
+    distance_only_s, _ = _timed(geodesy.path_length_km, lats, lons)
+    return [{
+        'stream': f"{n} point trace",
+        'numpy': geodesy.NUMPY_AVAILABLE,
+        'legacy_loop_ms': round(legacy_s * 1000, 2),
+        'scalar_loop_ms': round(scalar_s * 1000, 2),
+        'vectorized_distance_ms': round(distance_only_s * 1000, 2),
+        'vectorized_dist_bearing_speed_ms': round(vector_s * 1000, 2),
+        'speedup_scalar_x': round(legacy_s / scalar_s, 1),
+        'speedup_vectorized_x': round(legacy_s / distance_only_s, 1),
+        'total_km': round(vector_km, 6),
+        'max_abs_diff_km': max(abs(legacy_km - scalar_km), abs(legacy_km - vector_km)),
+    }]
+
+
+def bench_history(args):
+    rng = random.Random(5)
+    rate_hz = 5.0
+    fixes = int(args.hours * 3600 * rate_hz)
+    history = PositionHistory(capacity=fixes)
+    lat, lon = 19.0760, 72.8777
+    for i in range(fixes):
+        lat += rng.gauss(0, 2e-5)
+        lon += rng.gauss(0, 2e-5)
+        history.append(i / rate_hz, lat, lon, 20.0)
+    end = (fixes - 1) / rate_hz
+    queries = [rng.uniform(0, end) for _ in range(args.queries)]
+
+    reports = []
+    for method in ("linear", "great_circle"):
+        def loop():
+            return [history.at(ts, method) for ts in queries]
+
+        loop_s, points = _timed(loop)
+        batch_s, (lats, lons) = _timed(history.at_many, queries, method)
+        diff = max(max(abs(p[0] - a), abs(p[1] - b)) for p, a, b in zip(points, lats, lons))
+        reports.append({
+            'stream': f"{args.queries} timestamps over {fixes} fixes ({method})",
+            'numpy': geodesy.NUMPY_AVAILABLE,
+            'per_query_loop_ms': round(loop_s * 1000, 2),
+            'per_query_us': round(loop_s / args.queries * 1e6, 2),
+            'batch_ms': round(batch_s * 1000, 2),
+            'speedup_x': round(loop_s / batch_s, 1),
+            'max_abs_diff_deg': diff,
+        })
+    return reports
+
+
+def bench_simulate(args):
+    from backend.gps_manager import GPSManager
+    from backend.route_simulator import RouteSimulator
+
+    def make_simulator():
+        return RouteSimulator(args.route, fix_rate_hz=args.rate, duration_s=args.minutes * 60,
+                              stop_every_km=args.stop_every, noise_m=args.noise, seed=7)
+
+    # Same seed, so this is exactly the drive GPSManager sees
+    truth_km = None
+    for fix in make_simulator().fixes():
+        truth_km = fix['odometer_km']
+
+    reports = []
+    for multiplier in args.multiplier:
+        simulator = make_simulator()
+        gps = GPSManager(simulator=simulator, simulation_speed=multiplier)
+        fixes = []
+        original = gps._publish_fix
+        gps._publish_fix = lambda: (fixes.append(1), original())
+        started = time.perf_counter()
+        gps.start()
+        gps.thread.join()
+        elapsed = time.perf_counter() - started
+        reports.append({
+            'stream': f"{args.minutes:g} min ride at {f'{multiplier:g}x' if multiplier else 'max'} speed",
+            'route_km': round(simulator.length_m / 1000, 3),
+            'fixes': len(fixes),
+            'wall_seconds': round(elapsed, 3),
+            'time_multiplier_achieved': round(args.minutes * 60 / elapsed, 1),
+            'true_distance_km': round(truth_km, 3),
+            'distance_km': round(gps.total_distance_traveled, 3),
+            'raw_distance_km': round(gps.raw_distance_traveled, 3),
+            'ttff_s': round(gps.ttff_s, 4) if gps.ttff_s is not None else None,
+        })
+    return reports
+
+
+def bench_deadreckon(args):
+    from backend.gps_fix import GPSFix
+    from backend.dead_reckoning import DeadReckoning, G
+    from backend.route_simulator import RouteSimulator
+
+    class FixSource:  # Stands in for GPSManager: only .fix is read
+        fix = GPSFix()
+
+    imu_hz, batch = 500, 10
+    lsb = 2048.0 / G
+    reports = []
+    for outage_s in args.outage:
+        rng = random.Random(11)
+        warmup_s = 300.0
+        simulator = RouteSimulator(fix_rate_hz=5.0, duration_s=warmup_s + outage_s + 30,
+                                   stop_every_km=args.stop_every, noise_m=3.0, seed=3)
+        gps = FixSource()
+        dr = DeadReckoning(gps)
+        seq = 0
+        samples = 0
+        cost = 0.0
+        previous = None
+        truth_start = truth_end = None
+        for fix in simulator.fixes():
+            t = fix['t']
+            in_outage = warmup_s <= t < warmup_s + outage_s
+            if t >= warmup_s and truth_start is None:
+                truth_start = previous['odometer_km'] if previous else 0.0
+            if t >= warmup_s + outage_s and truth_end is None:
+                truth_end = fix['odometer_km']
+            if previous is not None:
+                # Forward acceleration over the last 0.2 s, plus mounting tilt and vibration
+                dt = t - previous['t']
+                accel = (fix['true_speed_kmh'] - previous['true_speed_kmh']) / 3.6 / dt
+                vibration = args.vibration * G if fix['true_speed_kmh'] > 0 else 0.002 * G
+                n = int(round(dt * imu_hz))
+                for start in range(0, n, batch):
+                    count = min(batch, n - start)
+                    block = [(int((accel + args.bias + rng.gauss(0.0, vibration)) * lsb), 0, 2048)
+                             for _ in range(count)]
+                    end_t = previous['t'] + (start + count) / imu_hz
+                    began = time.perf_counter()
+                    dr.add_batch(int(end_t * 1e9), int(1e9 / imu_hz), block)
+                    cost += time.perf_counter() - began
+                    samples += count
+            if not in_outage and int(t * 5) % 5 == 0:  # 1 Hz GPS
+                seq += 1
+                gps.fix = GPSFix(seq=seq, timestamp=t, lat=fix['lat'], lon=fix['lon'],
+                                 speed=fix['speed_kmh'], heading=fix['heading'], fix=True)
+            previous = fix
+
+        outage = dr.last_outage or {}
+        truth = truth_end - truth_start
+        reports.append({
+            'stream': f"{outage_s:g} s GPS outage, {args.bias:g} m/s^2 tilt, {args.vibration:g} g vibration",
+            'per_sample_us': round(cost / samples * 1e6, 3),
+            'true_km': round(truth, 4),
+            'imu_km': outage.get('imu_km'),
+            'corrected_km': outage.get('corrected_km'),
+            'bounds_km': [outage.get('low_km'), outage.get('high_km')],
+            'chord_km': outage.get('chord_km'),
+            'error_pct': round((outage['corrected_km'] - truth) / truth * 100, 1) if outage and truth else None,
+            'learned_bias': round(dr.bias, 3),
+        })
+    return reports
+
+
+def bench_wheel(args):
+    from backend.wheel_encoder import WheelEncoder, SimulatedPulseSource
+
+    reports = []
+    for rate in args.rates:
+        source = SimulatedPulseSource(buffer_size=args.buffer)
+        encoder = WheelEncoder(pulses_per_rev=args.ppr, circumference_m=args.circumference,
+                               source=source)
+        encoder.start()
+        cpu = time.process_time()
+        source.set_rate(rate)
+        time.sleep(args.seconds)
+        source.set_rate(0.0)
+        time.sleep(0.2)  # Let the counter drain the queue
+        cpu = time.process_time() - cpu
+        encoder.stop()
+
+        generated = source.seqno
+        speed_kmh = rate / args.ppr * args.circumference * 3.6
+        reports.append({
+            'stream': f"{rate:g} pulses/s for {args.seconds:g} s (= {speed_kmh:,.0f} km/h "
+                      f"at {args.ppr} pulses/rev)",
+            'generated': generated,
+            'counted': encoder.pulses,
+            'missed': generated - encoder.pulses,
+            'kernel_buffer_drops': source.dropped,
+            'wakeups': encoder.wakeups,
+            'events_per_wakeup': encoder.get_status()['events_per_wakeup'],
+            'cpu_us_per_pulse': round(cpu / generated * 1e6, 3) if generated else None,
+            'distance_km': round(encoder.distance_km(), 4),
+        })
+    return reports
+
+
+def bench_replay(args):
+    from backend.gps_manager import GPSManager
+
+    reports = []
+    for path in args.inputs:
+        for use_filter in (False, True):
+            gps = GPSManager(replay=path, replay_speed=args.speed, use_filter=use_filter)
+            fixes = []
+            original = gps._update_position
+            gps._update_position = lambda *a, **k: (fixes.append(a[:2]), original(*a, **k))
+            started = time.perf_counter()
+            gps.start()
+            gps.thread.join()
+            elapsed = time.perf_counter() - started
+            stats = gps.ubx if gps.protocol == "ubx" else gps.nmea
+            reports.append({
+                'stream': f"{os.path.basename(path.rstrip('/'))} ({'kalman' if use_filter else 'raw'})",
+                'protocol': gps.protocol,
+                'bytes': gps.serial.bytes_replayed,
+                'fixes': len(fixes),
+                'wall_seconds': round(elapsed, 3),
+                'fixes_per_sec': round(len(fixes) / elapsed) if elapsed else None,
+                'distance_km': round(gps.total_distance_traveled, 3),
+                'raw_distance_km': round(gps.raw_distance_traveled, 3),
+                'checksum_errors': stats.checksum_errors,
+                'last_location': gps.current_location,
+            })
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the GPS processing pipeline")
+    sub = parser.add_subparsers(dest="command")
+
+    nmea = sub.add_parser("nmea", help="NMEA sentence parsing throughput")
+    nmea.add_argument("inputs", nargs="*", help="Raw NMEA captures (serial bytes)")
+    nmea.add_argument("--synthetic", type=float, default=3600, metavar="SECONDS",
+                      help="Length of the synthetic 1 Hz drive when no input is given")
+    nmea.add_argument("--talker", default="GP", help="Talker ID for synthetic GGA/RMC/VTG/GSA")
+    nmea.add_argument("--chunk", type=int, default=256, help="Bytes per serial read")
+    nmea.add_argument("--corrupt", type=float, default=0.01, help="Fraction of sentences to corrupt")
+    nmea.add_argument("--json", action="store_true", help="Print reports as JSON")
+    nmea.set_defaults(run=bench_nmea)
+
+    ubx_cmd = sub.add_parser("ubx", help="Per-fix cost of NMEA vs UBX navigation output")
+    ubx_cmd.add_argument("--fixes", type=int, default=20000, help="Navigation epochs to parse")
+    ubx_cmd.add_argument("--chunk", type=int, default=256, help="Bytes per serial read")
+    ubx_cmd.add_argument("--json", action="store_true", help="Print reports as JSON")
+    ubx_cmd.set_defaults(run=bench_ubx)
+
+    kf = sub.add_parser("filter", help="Billed distance with and without the Kalman filter")
+    kf.add_argument("--synthetic", type=float, default=3600, metavar="SECONDS", help="Drive length")
+    kf.add_argument("--rate", type=float, default=1.0, help="Fix rate (Hz)")
+    kf.add_argument("--sigma", type=float, default=3.0, help="Position error 1-sigma (m)")
+    kf.add_argument("--json", action="store_true", help="Print reports as JSON")
+    kf.set_defaults(run=bench_filter)
+
+    geo = sub.add_parser("geodesy", help="Trace distance: per-call loop vs vectorized")
+    geo.add_argument("--points", type=int, default=100000, help="Points in the trace")
+    geo.add_argument("--json", action="store_true", help="Print reports as JSON")
+    geo.set_defaults(run=bench_geodesy)
+
+    hist = sub.add_parser("history", help="Geotagging timestamps from the position history")
+    hist.add_argument("--hours", type=float, default=2.0, help="History length at 5 Hz")
+    hist.add_argument("--queries", type=int, default=100000, help="Timestamps to geotag")
+    hist.add_argument("--json", action="store_true", help="Print reports as JSON")
+    hist.set_defaults(run=bench_history)
+
+    sim = sub.add_parser("simulate", help="Simulated ride through GPSManager at a time multiplier")
+    sim.add_argument("route", nargs="?", help="GPX/CSV route (default: the built-in Mumbai loop)")
+    sim.add_argument("--minutes", type=float, default=30, help="Simulated ride length")
+    sim.add_argument("--multiplier", type=float, nargs="+", default=[0, 60],
+                     help="Time multipliers to run (0 = as fast as possible)")
+    sim.add_argument("--rate", type=float, default=1.0, help="Fix rate (Hz)")
+    sim.add_argument("--stop-every", type=float, default=0.8, help="Stop every N km")
+    sim.add_argument("--noise", type=float, default=3.0, help="Position noise 1-sigma (m)")
+    sim.add_argument("--json", action="store_true", help="Print reports as JSON")
+    sim.set_defaults(run=bench_simulate)
+
+    dr = sub.add_parser("deadreckon", help="IMU dead-reckoned distance across GPS outages")
+    dr.add_argument("--outage", type=float, nargs="+", default=[30, 60, 120],
+                    help="Outage lengths (s) to simulate")
+    dr.add_argument("--bias", type=float, default=0.1, help="Accelerometer bias / tilt (m/s^2)")
+    dr.add_argument("--vibration", type=float, default=0.05, help="Vibration noise 1-sigma (g)")
+    dr.add_argument("--stop-every", type=float, default=0.8, help="Stop every N km")
+    dr.add_argument("--json", action="store_true", help="Print reports as JSON")
+    dr.set_defaults(run=bench_deadreckon)
+
+    wh = sub.add_parser("wheel", help="Wheel encoder counting at simulated pulse rates")
+    wh.add_argument("--rates", type=float, nargs="+", default=[1000, 10000, 100000, 300000],
+                    help="Pulse rates (Hz) to generate")
+    wh.add_argument("--seconds", type=float, default=2.0, help="Duration per rate")
+    wh.add_argument("--buffer", type=int, default=1024, help="Kernel edge queue size (events)")
+    wh.add_argument("--ppr", type=int, default=60, help="Pulses per wheel revolution")
+    wh.add_argument("--circumference", type=float, default=1.35, help="Wheel circumference (m)")
+    wh.add_argument("--json", action="store_true", help="Print reports as JSON")
+    wh.set_defaults(run=bench_wheel)
+
+    rp = sub.add_parser("replay", help="Run GPS captures (.rgps) through GPSManager")
+    rp.add_argument("inputs", nargs="+", help="Capture files or directories")
+    rp.add_argument("--speed", type=float, default=0, help="Replay speed (1 = real time, 0 = max)")
+    rp.add_argument("--json", action="store_true", help="Print reports as JSON")
+    rp.set_defaults(run=bench_replay)
+
+    args = parser.parse_args()
+    if not args.command:
+        parser.print_help()
+        return 1
+
+    for report in args.run(args):
+        if args.json:
+            print(json.dumps(report))
+            continue
+        print("=" * 55)
+        print(f"📊 {args.command}: {report['stream']}")
+        print("=" * 55)
+        for key, value in report.items():
+            if key != 'stream':
+                print(f"   {key:<32} {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -42,6 +42,10 @@ from backend.mode_controller import ModeController
 from backend.sos_system import SOSSystem
 from backend.gsm_manager import GSMManager
 from backend.crash_detector import CrashDetector
+from backend.dead_reckoning import DeadReckoning
+from backend.wheel_encoder import WheelEncoder
+from backend.tariff import load_tariff
+from backend.ride_journal import RideJournal
 
 class VideoWindow(QWidget):
     """Fullscreen Video Window"""
@@ -83,9 +87,46 @@ class RickyAutometer:
         self.loading_path = os.path.join(base_path, 'assets', 'load.mp4')
 
         # --- Initialize Backend ---
-        self.gpio_manager = GPIOManager()
-        self.gps_manager = GPSManager()
-        self.fare_calculator = FareCalculator(self.gps_manager)
+        # RICKY_SEATS: passenger seats with a seat switch (3 on an auto, up to 8 on e-rickshaws)
+        self.seats = int(os.environ.get("RICKY_SEATS", "3"))
+        self.gpio_manager = GPIOManager(seats=self.seats)
+        # RICKY_GPS_CAPTURE=<dir> records raw receiver bytes;
+        # RICKY_GPS_REPLAY=<file|dir> drives the app from a capture instead of the UART
+        # RICKY_GPS_STATE=<file> holds the last fix / ephemerides for a hot start
+        # RICKY_GPS_SIM_ROUTE=<gpx|csv> simulates driving a route (RICKY_GPS_SIM_SPEED=60 -> 60x)
+        self.gps_manager = GPSManager(
+            capture_directory=os.environ.get("RICKY_GPS_CAPTURE"),
+            replay=os.environ.get("RICKY_GPS_REPLAY"),
+            replay_speed=float(os.environ.get("RICKY_GPS_REPLAY_SPEED", "1")),
+            state_path=os.environ.get("RICKY_GPS_STATE", os.path.join(base_path, "gps_state.json")),
+            simulation_route=os.environ.get("RICKY_GPS_SIM_ROUTE"),
+            simulation_speed=float(os.environ.get("RICKY_GPS_SIM_SPEED", "1"))
+        )
+        # Distance from the IMU while GPS is out (fed by the crash detector)
+        self.dead_reckoning = DeadReckoning(self.gps_manager)
+        # Wheel pulses for distance without GPS - only with RICKY_WHEEL_ENCODER=1, i.e. a
+        # sensor is wired to GPIO 17 (RICKY_WHEEL_PPR pulses per revolution,
+        # RICKY_WHEEL_CIRCUMFERENCE metres until calibrated against GPS)
+        self.wheel_encoder = None
+        if os.environ.get("RICKY_WHEEL_ENCODER") == "1":
+            self.wheel_encoder = WheelEncoder(
+                pin=GPIOManager.PINS['wheel_encoder'],
+                pulses_per_rev=int(os.environ.get("RICKY_WHEEL_PPR", "1")),
+                circumference_m=float(os.environ.get("RICKY_WHEEL_CIRCUMFERENCE", "1.35")),
+                calibration_path=os.path.join(base_path, "wheel_calibration.json")
+            )
+        # RICKY_TARIFF=<tariff.json> replaces the flat ₹12/km default (see backend/tariff.py)
+        tariff_path = os.environ.get("RICKY_TARIFF")
+        # RICKY_RIDE_JOURNAL=<file>: rides in progress survive a power cut (replayed here)
+        self.ride_journal = RideJournal(
+            os.environ.get("RICKY_RIDE_JOURNAL", os.path.join(base_path, "ride_journal.rjnl")))
+        self.fare_calculator = FareCalculator(self.gps_manager, dead_reckoning=self.dead_reckoning,
+                                              wheel_encoder=self.wheel_encoder,
+                                              tariff=load_tariff(tariff_path) if tariff_path else None,
+                                              seats=self.seats, journal=self.ride_journal)
+        # Restored seats count as occupied: a switch found open at boot ends the ride
+        for seat in self.fare_calculator.restored_seats:
+            self.gpio_manager.passenger_states[seat] = True
         self.mode_controller = ModeController(self.gpio_manager)
         
         # GSM (Check your port!)
@@ -95,7 +136,8 @@ class RickyAutometer:
         
         # --- CRASH DETECTOR WITH MONITOR ---
         # Enable debug=True to see the live data in terminal
-        self.crash_detector = CrashDetector(sensitivity_g=3.0, debug=True) 
+        self.crash_detector = CrashDetector(sensitivity_g=3.0, debug=True, gps_manager=self.gps_manager,
+                                            dead_reckoning=self.dead_reckoning)
         
         # --- Initialize Frontend ---
         self.ui = RickyUI(self.fare_calculator, self.mode_controller, self.sos_system)
@@ -113,8 +155,9 @@ class RickyAutometer:
         
         # Connect Crash Detector
         self.crash_detector.crash_detected.connect(self.sos_system.handle_crash_trigger)
-       # Connect Live Graph Data
-        self.crash_detector.live_data.connect(self.ui.update_graph_data)
+        self.sos_system.sos_activated.connect(self.crash_detector.record_sos_event)
+       # Connect Live Graph Data (one min/max/last frame per display refresh)
+        self.crash_detector.live_frame.connect(self.ui.update_graph_frame)
 
 
     def play_mode_transition(self, mode_name):
@@ -130,6 +173,9 @@ class RickyAutometer:
         # Start all services
         self.gpio_manager.start()
         self.gps_manager.start()
+        if (self.wheel_encoder and self.wheel_encoder.start()
+                and not self.wheel_encoder.calibration):
+            self.wheel_encoder.calibrate_in_background(self.gps_manager)
         self.fare_calculator.start()
         self.mode_controller.start()
         self.sos_system.start()
@@ -156,6 +202,8 @@ class RickyAutometer:
         try:
             self.fare_calculator.stop()
             self.gps_manager.stop()
+            if self.wheel_encoder:
+                self.wheel_encoder.stop()
             self.sos_system.stop()
             self.mode_controller.stop()
             self.crash_detector.stop() 